@@ -1,15 +1,32 @@
+import math
+import random
 import uuid
 from enum import Enum
-from typing import List, Dict
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 from registry import Item, Recipe
 
 class LocID:
-    def __init__(self, name: str):
+    def __init__(self, name: str, x: int = 0, y: int = 0):
         self.name = name
+        # Cell on the planet's surface, see world.py
+        self.x = x
+        self.y = y
+
+    def distance(self, other: "LocID") -> float:
+        return math.hypot(self.x - other.x, self.y - other.y)
 
 MachineStatus = Enum('MachineStatus', "ACTIVE PAUSED STOPPED")
 
 class Machine:
+    # Production statistics of the machine's owner (stats.ProductionStats), if any
+    stats = None
+    # Random numbers of the machine's owner (rng.RandomService), if any
+    rng = None
+    # Power the machine needs while active, in MW
+    powerUsage = 0.0
+    # Power circuit the machine is part of (power.Circuit), without one it runs at full speed
+    circuit = None
+
     def __init__(self, machineType: str, recipe: Recipe, loc: LocID):
         self.uuid = str(uuid.uuid4())
         self.type = machineType
@@ -23,6 +40,7 @@ class Machine:
     def process(self) -> None:
         if self.status != MachineStatus.ACTIVE:
             return
+        self.advanceInputs()
         # Check if inputs are available and process the recipe
         if self.canProcess():
             self.pull()
@@ -30,7 +48,7 @@ class Machine:
 
     def canProcess(self) -> bool:
         # Check if all required inputs are available
-        for input_res, qty in self.recipe.inputs.items():
+        for input_res, qty in self.recipe.inputs:
             if self.inventory.get(input_res, 0) < qty:
                 return False
         return True
@@ -38,23 +56,54 @@ class Machine:
     def pull(self) -> None:
         # Pull items from connected machines
         for conn in self.inputs:
-            if conn.source and conn.source.inventory.get(conn.resourceType, 0) > 0:
-                self.inventory[conn.resourceType] = self.inventory.get(conn.resourceType, 0) + 1
-                conn.source.inventory[conn.resourceType] -= 1
+            if conn:
+                conn.transfer()
+
+    # Every tick the items on the incoming belts move on, whether the machine can work or not
+    def advanceInputs(self) -> None:
+        for conn in self.inputs:
+            if conn:
+                conn.advance()
 
     def produce(self) -> None:
-        # Produce outputs based on recipe
-        for outputRes, qty in self.recipe.outputs.items():
+        # Produce outputs based on recipe, using up the inputs. A missing input
+        # is an error of the caller, nothing is changed then
+        for inputRes, qty in self.recipe.inputs:
+            if self.inventory.get(inputRes, 0) < qty:
+                raise KeyError(f"{self.type} needs {qty}x {inputRes.ID} for {self.recipe.ID}")
+        for inputRes, qty in self.recipe.inputs:
+            self.inventory[inputRes] -= qty
+        for outputRes, qty in self.recipe.outputs:
             self.inventory[outputRes] = self.inventory.get(outputRes, 0) + qty
+            if self.stats:
+                self.stats.record(outputRes, produced=qty)
+
+    # Share of the power it needs that the machine gets
+    def powerRatio(self) -> float:
+        return self.circuit.satisfaction if self.circuit else 1.0
+
+    # Seconds per cycle of the recipe, slower when the power runs short
+    def baseTime(self) -> float:
+        return self.recipe.time
+
+    def cycleTime(self) -> float:
+        ratio = self.powerRatio()
+        return self.baseTime() / ratio if ratio > 0 else math.inf
+
+    def setStatus(self, status: MachineStatus) -> None:
+        self.status = status
+        # Only active machines draw or generate power
+        if self.circuit:
+            self.circuit.recount()
 
     def stop(self) -> None:
-        self.status = MachineStatus.STOPPED
+        self.setStatus(MachineStatus.STOPPED)
 
     def pause(self) -> None:
-        self.status = MachineStatus.PAUSED
+        self.setStatus(MachineStatus.PAUSED)
 
     def resume(self) -> None:
-        self.status = MachineStatus.ACTIVE
+        self.setStatus(MachineStatus.ACTIVE)
 
     def info(self) -> Dict:
         return {
@@ -72,25 +121,131 @@ class Connection:
         self.target = target
         self.resourceType = resourceType
 
+    # Distance the items travel
+    def length(self) -> float:
+        return self.source.loc.distance(self.target.loc)
+
+    # Move one item from source to target right away
+    def transfer(self) -> int:
+        if self.source and self.source.inventory.get(self.resourceType, 0) > 0:
+            self.target.inventory[self.resourceType] = self.target.inventory.get(self.resourceType, 0) + 1
+            self.source.inventory[self.resourceType] -= 1
+            return 1
+        return 0
+
+    # Items only travel on belts, see Belt.advance
+    def advance(self) -> int:
+        return 0
+
+    # Put the connection into the output slots of the source and the input slots of the target
+    def plug(self) -> "Connection":
+        attach(self.source.outputs, self)
+        attach(self.target.inputs, self)
+        return self
+
+# First free slot, machines with unlimited slots get a new one
+def attach(slots: list, conn: Connection) -> None:
+    if None in slots:
+        slots[slots.index(None)] = conn
+    else:
+        slots.append(conn)
+
+# A conveyor belt: items take their time to travel and only so many fit on it.
+# Every tick one batch of items enters the belt, the belt is a ring buffer with
+# one batch per tick of travel time, so advancing it is O(1) however much it
+# carries: the batch under the head arrives and its place takes the new batch.
+class Belt(Connection):
+    def __init__(self, source: Machine, target: Machine, resourceType: Item,
+                 tiles: Optional[int] = None, speed: float = 1.0, capacity: int = 4):
+        if speed <= 0 or capacity <= 0:
+            raise ValueError("Belt speed and capacity must be greater than 0.")
+        super().__init__(source, target, resourceType)
+        # Tiles long (default: the distance of the machines), tiles per tick, items per tile
+        self.tiles = tiles if tiles is not None else max(1, round(self.length()))
+        self.speed = speed
+        self.capacity = capacity
+        # Items that can enter per tick: as many as fit on the tiles that pass the start
+        self.perTick = max(1, int(capacity * speed))
+        # Items entered n ticks ago are at batches[(head - n) % len], they arrive after len ticks
+        self.batches = [0] * max(1, math.ceil(self.tiles / speed))
+        self.head = 0
+        self.carried = 0
+
+    # Belts deliver on their own, the target machine advances them every tick
+    def transfer(self) -> int:
+        return 0
+
+    # One tick: deliver the oldest batch, load a new one from the source. Returns what arrived.
+    def advance(self) -> int:
+        item = self.resourceType
+        arrived = self.batches[self.head]
+        if arrived:
+            self.target.inventory[item] = self.target.inventory.get(item, 0) + arrived
+            self.carried -= arrived
+
+        loaded = min(self.perTick, self.source.inventory.get(item, 0)) if self.source else 0
+        if loaded:
+            self.source.inventory[item] -= loaded
+            self.carried += loaded
+        self.batches[self.head] = loaded
+        self.head = (self.head + 1) % len(self.batches)
+        return arrived
+
 # Miners are special, they take a ressource instead of a recipe
 class Miner(Machine):
+    powerUsage = 5.0
+
     def __init__(self, recipe: Recipe, loc: LocID):
         super().__init__("miner", recipe, loc)
         self.inputs = []  # Miners have 0 inputs
         self.outputs = [None]  # 1 output slot
 
+    def baseTime(self) -> float:
+        return self.recipe.miningTime
+
+    # Mine up to amount blocks (the block is passed as recipe) from the deposit at
+    # the miner's location, returns how many blocks were mined. Each of them drops
+    # items by the block's drop rates, like mining by hand. world is a world.World.
+    def extract(self, world, amount: int = 1) -> int:
+        block = self.recipe
+        mined = world.mine(self.loc, block, amount)
+        if mined:
+            draws = self.rng.stream("mining").floats(mined) if self.rng else [random.random() for _ in range(mined)]
+            dropped = block.dropRates.roll(draws)
+            self.inventory[block.dropItem] = self.inventory.get(block.dropItem, 0) + dropped
+            if self.stats:
+                self.stats.record(block.dropItem, produced=dropped)
+        return mined
+
 class Constructor(Machine):
+    inputSlots = 2
+    powerUsage = 4.0
+
     def __init__(self, recipe: Recipe, loc: LocID):
         super().__init__("constructor", recipe, loc)
-        self.inputs = [None] * 2  # 2 input slots
+        self.inputs = [None] * self.inputSlots  # 2 input slots
         self.outputs = [None]  # 1 output slot
 
 class Assembler(Machine):
+    inputSlots = 3
+    powerUsage = 15.0
+
     def __init__(self, recipe: Recipe, loc: LocID):
         super().__init__("assembler", recipe, loc)
-        self.inputs = [None] * 3  # 3 input slots
+        self.inputs = [None] * self.inputSlots  # 3 input slots
         self.outputs = [None]  # 1 output slot
 
+# Generators feed power into their circuit while active
+class Generator(Machine):
+    def __init__(self, powerOutput: float, loc: LocID):
+        super().__init__("generator", None, loc)
+        self.powerOutput = powerOutput  # MW
+        self.inputs = []
+        self.outputs = []
+
+    def process(self) -> None:
+        pass
+
 class Storage(Machine):
     def __init__(self, resourceType: Item, loc: LocID):
         super().__init__("storage", None, loc)
@@ -99,6 +254,11 @@ class Storage(Machine):
         self.inputs = []  # Unlimited inputs
         self.outputs = []  # Unlimited outputs
 
+    # Storages don't produce, they only take in what their belts deliver
+    def process(self) -> None:
+        if self.status == MachineStatus.ACTIVE:
+            self.advanceInputs()
+
     def addInput(self, conn: Connection) -> None:
         self.inputs.append(conn)  # No limit on inputs
 
@@ -120,4 +280,120 @@ class Storage(Machine):
             taken = min(amount, self.inventory[self.resourceType])
             self.inventory[self.resourceType] -= taken
             return {self.resourceType: taken}
-        return {}
\ No newline at end of file
+        return {}
+
+# Grid index over all placed machines, so location queries only look at the
+# grid cells around the query instead of every machine. Keep it up to date with
+# place, move and remove.
+class MachineIndex:
+    def __init__(self, cellSize: int = 16):
+        self.cellSize = cellSize
+        # Grid cell -> uuid -> machine
+        self.cells: Dict[Tuple[int, int], Dict[str, Machine]] = {}
+        # uuid -> grid cell of the machine
+        self.placed: Dict[str, Tuple[int, int]] = {}
+        # Smallest and largest cell ever used (x0, y0, x1, y1), only grows
+        self.bounds: Optional[Tuple[int, int, int, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.placed)
+
+    def __iter__(self) -> Iterator[Machine]:
+        for cell in self.cells.values():
+            yield from cell.values()
+
+    def cellOf(self, x: float, y: float) -> Tuple[int, int]:
+        return (int(x // self.cellSize), int(y // self.cellSize))
+
+    def place(self, machine: Machine) -> None:
+        if machine.uuid in self.placed:
+            self.remove(machine)
+        key = self.cellOf(machine.loc.x, machine.loc.y)
+        self.cells.setdefault(key, {})[machine.uuid] = machine
+        self.placed[machine.uuid] = key
+        if self.bounds is None:
+            self.bounds = key + key
+        else:
+            x0, y0, x1, y1 = self.bounds
+            self.bounds = (min(x0, key[0]), min(y0, key[1]), max(x1, key[0]), max(y1, key[1]))
+
+    def move(self, machine: Machine, loc: LocID) -> None:
+        machine.loc = loc
+        self.place(machine)
+
+    def remove(self, machine: Machine) -> None:
+        key = self.placed.pop(machine.uuid, None)
+        if key is None:
+            return
+        cell = self.cells[key]
+        del cell[machine.uuid]
+        if not cell:
+            del self.cells[key]
+
+    # Machines with x0 <= x <= x1 and y0 <= y <= y1
+    def region(self, x0: float, y0: float, x1: float, y1: float) -> List[Machine]:
+        cx0, cy0 = self.cellOf(x0, y0)
+        cx1, cy1 = self.cellOf(x1, y1)
+        found = []
+        # Sparse grids: walking the occupied cells is cheaper than the covered ones
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) > len(self.cells):
+            keys = [key for key in self.cells if cx0 <= key[0] <= cx1 and cy0 <= key[1] <= cy1]
+        else:
+            keys = [(cx, cy) for cx in range(cx0, cx1 + 1) for cy in range(cy0, cy1 + 1)]
+        for key in keys:
+            for machine in self.cells.get(key, {}).values():
+                if x0 <= machine.loc.x <= x1 and y0 <= machine.loc.y <= y1:
+                    found.append(machine)
+        return found
+
+    # Machines within radius of loc, nearest first
+    def near(self, loc: LocID, radius: float) -> List[Machine]:
+        found = [
+            machine for machine in self.region(loc.x - radius, loc.y - radius, loc.x + radius, loc.y + radius)
+            if machine.loc.distance(loc) <= radius
+        ]
+        found.sort(key=lambda machine: machine.loc.distance(loc))
+        return found
+
+    # Nearest machine that matches the filter, searched in growing rings of grid cells
+    def nearest(self, loc: LocID, match: Optional[Callable[[Machine], bool]] = None) -> Optional[Machine]:
+        if not self.cells:
+            return None
+        cx, cy = self.cellOf(loc.x, loc.y)
+        # Beyond this ring there are no occupied cells left
+        x0, y0, x1, y1 = self.bounds
+        reach = max(cx - x0, x1 - cx, cy - y0, y1 - cy)
+
+        best, bestDistance = None, math.inf
+        for ring in range(reach + 1):
+            # Everything in this ring and beyond is at least this far away
+            if (ring - 1) * self.cellSize >= bestDistance:
+                break
+            for key in self.ring(cx, cy, ring):
+                for machine in self.cells.get(key, {}).values():
+                    distance = machine.loc.distance(loc)
+                    if distance < bestDistance and (match is None or match(machine)):
+                        best, bestDistance = machine, distance
+        return best
+
+    def ring(self, cx: int, cy: int, r: int) -> Iterator[Tuple[int, int]]:
+        if r == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - r, cx + r + 1):
+            yield (x, cy - r)
+            yield (x, cy + r)
+        for y in range(cy - r + 1, cy + r):
+            yield (cx - r, y)
+            yield (cx + r, y)
+
+    # Nearest storage with at least amount of the item
+    def nearestStorage(self, loc: LocID, item: Item, amount: int = 1) -> Optional["Storage"]:
+        return self.nearest(loc, lambda machine: isinstance(machine, Storage) and machine.inventory.get(item, 0) >= amount)
+
+    # Connect the machine to the nearest storage that holds the item
+    def route(self, machine: Machine, item: Item) -> Optional[Connection]:
+        storage = self.nearestStorage(machine.loc, item)
+        if storage is None:
+            return None
+        return Connection(storage, machine, item).plug()
@@ -0,0 +1,608 @@
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+# Small benchmark runner: 'python bench.py [name ...]' runs the given (or all) benchmarks
+benchmarks = {}
+
+def benchmark(name: str):
+    def register(func):
+        benchmarks[name] = func
+        return func
+    return register
+
+# Mean time of a function call in seconds
+def timed(func, number: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - start) / number
+
+def report(name: str, seconds: float, extra: str = ""):
+    print(f"{name:<50} {seconds * 1e6:>12.1f} µs {extra}")
+
+# Wall time of a fresh interpreter running the given code
+def coldRun(code: str, number: int = 5) -> float:
+    best = float('inf')
+    for _ in range(number):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+@benchmark("banner")
+def benchBanner():
+    import colors
+    from main import asciiArtLogo, asciiArtPlanet
+
+    def render():
+        colors.gradientText(asciiArtLogo, ("#FBC2EB", "#A6C1EE"), "lr")
+        colors.gradientText(asciiArtPlanet, ("#E4BDD4", "#4839A1"), "td")
+
+    def renderCached():
+        colors.cachedGradientText(asciiArtLogo, ("#FBC2EB", "#A6C1EE"), "lr")
+        colors.cachedGradientText(asciiArtPlanet, ("#E4BDD4", "#4839A1"), "td")
+
+    colors.gradientSteps.cache_clear()
+    report("banner: first render", timed(render))
+    report("banner: memoized render", timed(render, 100))
+    renderCached()
+    report("banner: disk cache", timed(renderCached, 100))
+    report("colorText", timed(lambda: colors.colorText("⊛ Done", "#A7E06F"), 10000))
+
+@benchmark("startup")
+def benchStartup():
+    shutil.rmtree(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "banners"), ignore_errors=True)
+    code = (
+        "from main import asciiArtLogo, asciiArtPlanet; from colors import cachedGradientText; "
+        "cachedGradientText(asciiArtLogo, ('#FBC2EB', '#A6C1EE'), 'lr'); "
+        "cachedGradientText(asciiArtPlanet, ('#E4BDD4', '#4839A1'), 'td')"
+    )
+    report("startup: interpreter only", coldRun("pass"))
+    report("startup: banner (cold cache)", coldRun(code, 1))
+    report("startup: banner (warm cache)", coldRun(code))
+
+# Budget for 'import main' in a fresh interpreter, above it the benchmark fails
+coldStartBudget = 0.05
+
+@benchmark("coldstart")
+def benchColdStart():
+    base = coldRun("pass")
+    cold = coldRun("import main") - base
+    report("coldstart: import main", cold)
+    report("coldstart: import main + prompt_toolkit", coldRun("import main, prompt_toolkit.shortcuts") - base)
+    if cold > coldStartBudget:
+        sys.exit(f"Cold start regression: {cold * 1000:.1f} ms > {coldStartBudget * 1000:.0f} ms budget")
+
+# Slowest imports of the game entry point by cumulative time ('python -X importtime')
+@benchmark("imports")
+def benchImports(top: int = 15):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main, prompt_toolkit.shortcuts"],
+        capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__))
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), module.rstrip()))
+    for cumulative, module in sorted(rows, reverse=True)[:top]:
+        report(f"import {module.strip()}", cumulative / 1e6)
+
+# Latency of consecutive prompts on one session, with a changing message like the game loop
+@benchmark("prompt")
+def benchPrompt(number: int = 300):
+    from prompt_toolkit.input import create_pipe_input
+    from prompt_toolkit.output import DummyOutput
+    from main import Player, createSession
+
+    speechLines = [f"Speech line number {i}, what now? # " for i in range(16)]
+    for typed in ("", "mine coal 5"):
+        with create_pipe_input() as pipe:
+            session = createSession(Player("bench"), input=pipe, output=DummyOutput())
+            counter = iter(range(10 ** 9))
+
+            def prompt():
+                pipe.send_text(typed + "\r")
+                session.prompt(speechLines[next(counter) % len(speechLines)])
+
+            prompt()
+            best = min(timed(prompt, number // 5) for _ in range(5))
+        report(f"prompt: per prompt, typing {typed!r}", best)
+
+# Planning a long synthetic production chain: every tier needs the previous one and a raw material
+@benchmark("planner")
+def benchPlanner(tiers: int = 150):
+    from planner import Planner
+    from registry import Block, Item, Recipe
+
+    recipes, blocks = [], []
+    previous = None
+    for i in range(tiers):
+        raw = Item(f"raw_{i}", f"Raw {i}")
+        block = Block(f"ore_{i}")
+        block.dropItem = raw
+        blocks.append(block)
+
+        product = Item(f"part_{i}", f"Part {i}")
+        recipe = Recipe(f"part_{i}")
+        recipe.inputs = [(raw, 2)] + ([(previous, 1)] if previous else [])
+        recipe.outputs = [(product, 1)]
+        recipes.append(recipe)
+        previous = product
+
+    planner = Planner(recipes=recipes, blocks=blocks)
+    report(f"planner: build {tiers} tiers", timed(lambda: Planner(recipes=recipes, blocks=blocks), 10))
+    for mode in ("balanced", "min-machines"):
+        report(f"planner: {mode}, {tiers} tiers", timed(lambda: planner.plan({previous: 60}, mode), 3))
+    real = Planner()
+    report("planner: brass ingots", timed(lambda: real.plan({Item.BRASS_INGOT: 60}), 100))
+
+# Per-draw cost of the seeded streams against the global random module, and mining in bulk
+@benchmark("rng")
+def benchRng(number: int = 100000):
+    import asyncio
+    import random
+    from main import Player, gameOutput
+    from registry import Block
+    from rng import RandomStream
+
+    stream = RandomStream(1)
+    draw = random.random
+    report("rng: 1000 draws, random.random()", timed(lambda: [draw() for _ in range(1000)], number // 1000))
+    report("rng: 1000 draws, stream.random()", timed(lambda: [stream.random() for _ in range(1000)], number // 1000))
+    report("rng: 1000 draws, stream.floats(1000)", timed(lambda: stream.floats(1000), number // 1000))
+
+    # Deposits are finite, so this mines everything at the places of a row
+    with open(os.devnull, "w") as devnull:
+        gameOutput.set(devnull)
+        player = Player("testable", seed=1)
+        player.inventory.maxSlots = 10 ** 6
+        mined = []
+
+        def mine():
+            player.moveTo(len(mined), 0)
+            before = player.inventory.totalItems()
+            asyncio.run(player.mine("coal", 10000))
+            mined.append(player.inventory.totalItems() - before)
+        seconds = timed(mine, 20)
+        report("rng: mine all coal at a place, per block", seconds / max(1, sum(mined) / len(mined)))
+
+    coal = Block.get("coal")
+    report("rng: drops of 10000 coal", timed(lambda: coal.dropRates.roll(stream.floats(10000)), 100))
+
+# Visiting new chunks of the world, revisiting cached ones and paging mined chunks
+@benchmark("world")
+def benchWorld(chunks: int = 200):
+    import tempfile
+    from auto import LocID
+    from registry import Block
+    from world import World
+
+    with tempfile.TemporaryDirectory() as path:
+        world = World(seed=1, maxChunks=chunks // 2, path=path)
+        locs = [LocID(f"loc{i}", i * World.chunkSize, 0) for i in range(chunks)]
+        report("world: generate chunk", timed(lambda: [world.deposits(loc) for loc in locs]) / chunks)
+        report("world: cached deposits", timed(lambda: world.deposits(locs[-1]), 10000))
+
+        coal = Block.get("coal")
+        def mineAll():
+            for loc in locs:
+                world.mine(loc, coal)
+        report("world: mine with paging, per chunk", timed(mineAll, 3) / chunks)
+
+# Location queries over many machines: grid index against scanning all of them
+@benchmark("machines")
+def benchMachines(count: int = 20000):
+    import random
+    from auto import Constructor, LocID, MachineIndex, Storage
+    from registry import Item, Recipe
+
+    rng = random.Random(1)
+    index = MachineIndex()
+    machines = []
+    for i in range(count):
+        loc = LocID(f"loc{i}", rng.randint(-2000, 2000), rng.randint(-2000, 2000))
+        machine = Storage(Item.IRON_INGOT, loc) if i % 10 == 0 else Constructor(Recipe.IRON_INGOT, loc)
+        machines.append(machine)
+    report(f"machines: place {count}", timed(lambda: [index.place(m) for m in machines]))
+
+    queries = [LocID("q", rng.randint(-2000, 2000), rng.randint(-2000, 2000)) for _ in range(100)]
+
+    def isStorage(machine):
+        return isinstance(machine, Storage)
+
+    report("machines: nearest storage, scan", timed(lambda: [min((m for m in machines if isStorage(m)), key=lambda m: m.loc.distance(q)) for q in queries]) / len(queries))
+    report("machines: nearest storage, index", timed(lambda: [index.nearest(q, isStorage) for q in queries], 10) / len(queries))
+    report("machines: within 100, scan", timed(lambda: [[m for m in machines if m.loc.distance(q) <= 100] for q in queries]) / len(queries))
+    report("machines: within 100, index", timed(lambda: [index.near(q, 100) for q in queries], 10) / len(queries))
+
+# Matching a stream of synthetic limit orders around a moving price in one order book
+@benchmark("market")
+def benchMarket(count: int = 1000000):
+    import random
+    from market import BUY, SELL, Order, OrderBook
+    from registry import Item
+
+    rng = random.Random(1)
+    item = Item.COAL
+    orders = [
+        Order(i, None, item, BUY if rng.random() < 0.5 else SELL, 100 + int(rng.gauss(0, 5)), rng.randint(1, 64))
+        for i in range(count)
+    ]
+    book = OrderBook(item)
+    fills = 0
+    start = time.perf_counter()
+    for order in orders:
+        fills += len(book.submit(order))
+    elapsed = time.perf_counter() - start
+    report(f"market: match {count} orders, per order", elapsed / count, f"({elapsed:.2f}s total, {fills} fills)")
+
+# Cost of recording one production event, and of reading a series back
+@benchmark("stats")
+def benchStats(number: int = 100000):
+    from registry import Item
+    from stats import ProductionStats
+
+    clock = [0.0]
+    stats = ProductionStats(lambda: clock[0])
+
+    def record():
+        clock[0] += 0.01
+        stats.record(Item.COAL, produced=3)
+    report("stats: record one event", timed(record, number))
+    real = ProductionStats()
+    report("stats: record one event, real clock", timed(lambda: real.record(Item.COAL, produced=3), number))
+    report("stats: minute series", timed(lambda: stats.series(Item.COAL, "minute"), 1000))
+
+# Hot paths keyed by items: lookups, a full inventory and a running constructor
+@benchmark("items")
+def benchItems(number: int = 100000):
+    from auto import Connection, Constructor, LocID, Storage
+    from main import Inventory
+    from registry import Item, Recipe
+
+    items = Item.all()
+    byItem = {item: 1 for item in items}
+    byIndex = [1] * len(items)
+    coal = Item.COAL
+    report("items: 1000x dict[item]", timed(lambda: [byItem[coal] for _ in range(1000)], number // 1000))
+    report("items: 1000x list[item.index]", timed(lambda: [byIndex[coal.index] for _ in range(1000)], number // 1000))
+
+    # All 32 slots in use
+    inventory = Inventory()
+    for item in items:
+        inventory.addItem(item, 64)
+    inventory.addItem(coal, 64 * (inventory.maxSlots - len(items)))
+    report("items: totalItemsOf, full inventory", timed(lambda: inventory.totalItemsOf(Item.STEEL_INGOT), number))
+    report("items: add and remove one item", timed(lambda: (inventory.removeItem(coal), inventory.addItem(coal)), number // 10))
+
+    storage = Storage(Item.RAW_IRON, LocID("storage"))
+    constructor = Constructor(Recipe.IRON_INGOT, LocID("constructor"))
+    constructor.inputs = [Connection(storage, constructor, Item.RAW_IRON)]
+    constructor.inventory[Item.RAW_IRON] = 1
+    storage.add(10 ** 9)
+    report("items: constructor cycle", timed(constructor.process, number))
+
+# Advancing belts: the cost per tick must not depend on their length or load
+@benchmark("belts")
+def benchBelts(ticks: int = 10000):
+    from auto import Belt, LocID, Storage
+    from registry import Item
+
+    for tiles in (8, 8000):
+        source = Storage(Item.RAW_IRON, LocID("source"))
+        target = Storage(Item.RAW_IRON, LocID("target"))
+        source.add(10 ** 9)
+        belt = Belt(source, target, Item.RAW_IRON, tiles=tiles, capacity=64).plug()
+        report(f"belts: advance, {tiles} tiles", timed(belt.advance, ticks), f"({belt.carried} items on the belt)")
+
+# Changing power lines in a large grid only recounts the circuit they belong to
+@benchmark("power")
+def benchPower(circuits: int = 1000, size: int = 20):
+    from auto import Constructor, Generator, LocID
+    from power import PowerGrid
+    from registry import Recipe
+
+    grid = PowerGrid()
+    chains = [
+        [Generator(60.0, LocID("generator"))] + [Constructor(Recipe.IRON_INGOT, LocID("constructor")) for _ in range(size - 1)]
+        for _ in range(circuits)
+    ]
+    def build():
+        for chain in chains:
+            for a, b in zip(chain, chain[1:]):
+                grid.connect(a, b)
+    report(f"power: connect {circuits * size} machines", timed(build), f"({len(grid.circuits())} circuits)")
+
+    chain = chains[0]
+    middle = size // 2
+    def cutAndJoin():
+        grid.disconnect(chain[middle - 1], chain[middle])
+        grid.connect(chain[middle - 1], chain[middle])
+    report("power: cut and rejoin a line", timed(cutAndJoin, 1000))
+    report("power: pause and resume a machine", timed(lambda: (chain[1].pause(), chain[1].resume()), 1000))
+    report("power: cycle time of a machine", timed(chain[1].cycleTime, 10000))
+
+# Sizes, hit rates and evictions of prompt_toolkit's caches after a few prompts,
+# for tuning their maxsize. Hits of dictionary caches are only counted here.
+@benchmark("caches")
+def benchCaches(number: int = 50):
+    from prompt_toolkit.cache import cache_info, count_cache_hits, reset_cache_stats
+    from prompt_toolkit.input import create_pipe_input
+    from prompt_toolkit.output import DummyOutput
+    from main import Player, createSession
+
+    count_cache_hits()
+    with create_pipe_input() as pipe:
+        session = createSession(Player("bench"), input=pipe, output=DummyOutput())
+        reset_cache_stats()
+        for i in range(number):
+            pipe.send_text(("mine coal 5", "stats minute", "plan iron_ingot 30")[i % 3] + "\r")
+            session.prompt(f"Speech line number {i}, what now? # ")
+    count_cache_hits(False)
+
+    print(f"{'cache':<50} {'size':>8} {'max':>8} {'hits':>8} {'misses':>8} {'evicted':>8} {'hit rate':>9}")
+    for info in cache_info():
+        if not info.hits + info.misses:
+            continue
+        maxsize = "-" if info.maxsize is None else info.maxsize
+        print(f"{info.name[:50]:<50} {info.size:>8} {maxsize:>8} {info.hits:>8} {info.misses:>8} "
+              f"{info.evictions:>8} {info.hit_rate:>9.1%}")
+
+    # A few hot keys between many keys that are used once, in a cache that is
+    # too small for all of them: FIFO keeps discarding the hot keys as well
+    from prompt_toolkit.cache import FastDictCache
+    for policy in ("fifo", "lru"):
+        cache = FastDictCache(lambda *key: key, size=1000, name="bench", policy=policy)
+        def lookups():
+            for i in range(100000):
+                cache[i % 100, "hot"]
+                cache[i, "once"]
+        elapsed = timed(lookups)
+        report(f"caches: FastDictCache {policy}, 200k lookups", elapsed,
+               f"({cache.stats.misses - 100000} misses of hot keys)")
+
+# One full-screen frame: a styled layout written into the screen and diffed to a terminal
+@benchmark("screen")
+def benchScreen(number: int = 50):
+    import io
+    import prompt_toolkit.renderer
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.application.current import set_app
+    from prompt_toolkit.data_structures import Size
+    from prompt_toolkit.layout import HSplit, Layout, VSplit, Window
+    from prompt_toolkit.layout.controls import FormattedTextControl
+    from prompt_toolkit.output.vt100 import Vt100_Output
+    from prompt_toolkit.widgets import Frame
+
+    # Time spent diffing the screens, as part of the whole render
+    outputScreenDiff = prompt_toolkit.renderer._output_screen_diff
+    diffTime = [0.0]
+    # Rows the diff skips as unchanged, rows it compares and the time the comparisons take
+    rowStats = [0, 0, 0.0]
+    def timedDiff(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return outputScreenDiff(*args, **kwargs)
+        finally:
+            diffTime[0] += time.perf_counter() - start
+            screen, previous = args[2], args[5]
+            if previous is not None:
+                start = time.perf_counter()
+                for y in range(min(max(screen.height, previous.height), 50)):
+                    rowStats[0] += screen.data_buffer[y] == previous.data_buffer[y]
+                    rowStats[1] += 1
+                rowStats[2] += time.perf_counter() - start
+    prompt_toolkit.renderer._output_screen_diff = timedDiff
+
+    # Asking a tty for its size is a system call; count how often the renderer has to
+    sizeQueries = [0]
+    def getSize():
+        sizeQueries[0] += 1
+        return Size(rows=50, columns=200)
+
+    lines = [f"Line {i}: " + "mine coal, smelt iron, build constructors " * 3 for i in range(100)]
+    # Every row changes (the log scrolls), or only the status line does
+    for scrolling, arrayScreen in ((True, False), (True, True), (False, False), (False, True)):
+        stdout = io.StringIO()
+        output = Vt100_Output(stdout, getSize, term="xterm-256color")
+        app = Application(output=output, full_screen=True)
+        control = FormattedTextControl(lambda: [("class:text", "\n".join(lines[app.render_counter % 2 if scrolling else 0:]))])
+        status = FormattedTextControl(lambda: f"tick {app.render_counter}")
+        body = VSplit([Frame(Window(control, style="bg:#202030"), title="log"), Window(width=40, style="bg:#303040")])
+        app.layout = Layout(HSplit([body, Window(status, height=1, style="reverse")]))
+        app.renderer.array_screen = arrayScreen
+
+        def render():
+            # Controls cache their content per render_counter, like Application._redraw
+            app.render_counter += 1
+            app.renderer.render(app, app.layout)
+            stdout.seek(0)
+            stdout.truncate()
+
+        with set_app(app):
+            render()
+            diffTime[0] = 0.0
+            rowStats[:] = [0, 0, 0.0]
+            sizeQueries[0] = 0
+            best = min(timed(render, number // 5) for _ in range(5))
+        changes = "all rows change" if scrolling else "one row changes"
+        report(f"screen: render 200x50, {changes}, {'ArrayScreen' if arrayScreen else 'Screen'}", best,
+               f"(diff {diffTime[0] / number * 1e6:.0f} µs, {rowStats[0] / rowStats[1]:.0%} of the rows skipped, "
+               f"comparing them {rowStats[2] / number * 1e6:.0f} µs, {sizeQueries[0]} size queries)")
+    prompt_toolkit.renderer._output_screen_diff = outputScreenDiff
+
+# Output of large redraws: bytes per frame and time per frame, including the write to a file
+@benchmark("output")
+def benchOutput(number: int = 50):
+    import io
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.application.current import set_app
+    from prompt_toolkit.data_structures import Size
+    from prompt_toolkit.layout import HSplit, Layout, VSplit, Window
+    from prompt_toolkit.layout.controls import FormattedTextControl
+    from prompt_toolkit.output.vt100 import Vt100_Output
+    from prompt_toolkit.widgets import Frame
+
+    words = ["mine", "coal,", "smelt", "iron,", "build", "constructors"]
+    styles = ["", "fg:ansired", "fg:#ffaa00 bold", "bg:#202030", "fg:ansigreen underline"]
+    lines = []
+    for i in range(100):
+        lines += [(styles[(i + j) % len(styles)], words[(i * j) % len(words)] + " ") for j in range(30)]
+        lines.append(("", "\n"))
+
+    # Redraw the whole screen, or scroll the log by one line
+    for fullRedraw in (True, False):
+        with open(os.devnull, "w") as devnull:
+            for stdout in (io.StringIO(), devnull):
+                output = Vt100_Output(stdout, lambda: Size(rows=50, columns=200), term="xterm-256color")
+                app = Application(output=output, full_screen=True)
+                control = FormattedTextControl(lambda: lines[(app.render_counter % 2) * 31:])
+                body = VSplit([Frame(Window(control), title="log"), Window(width=40, style="bg:#303040")])
+                app.layout = Layout(HSplit([body, Window(height=1, style="reverse")]))
+
+                def render():
+                    app.render_counter += 1
+                    if fullRedraw:
+                        app.renderer.reset()
+                    app.renderer.render(app, app.layout)
+
+                with set_app(app):
+                    render()
+                    if isinstance(stdout, io.StringIO):
+                        stdout.seek(0)
+                        stdout.truncate()
+                        render()
+                        frameBytes = len(stdout.getvalue().encode("utf-8"))
+                    else:
+                        elapsed = min(timed(render, number // 5) for _ in range(5))
+        kind = "full redraw" if fullRedraw else "scrolling"
+        report(f"output: 200x50 {kind}, render and write", elapsed, f"({frameBytes} bytes per frame)")
+
+# Background output invalidating the UI every millisecond while someone types: frames drawn and
+# how long a key press takes to appear, with no interval, a fixed interval and a FramePacer
+@benchmark("pacing")
+def benchPacing(seconds: float = 2.0):
+    import asyncio
+    import io
+    from prompt_toolkit.application import Application, FramePacer
+    from prompt_toolkit.buffer import Buffer
+    from prompt_toolkit.data_structures import Size
+    from prompt_toolkit.input import create_pipe_input
+    from prompt_toolkit.layout import HSplit, Layout, Window
+    from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+    from prompt_toolkit.output.vt100 import Vt100_Output
+
+    async def run(pipe, **kwargs):
+        log = []
+        buffer = Buffer()
+        output = Vt100_Output(io.StringIO(), lambda: Size(rows=50, columns=200), term="xterm-256color")
+        layout = Layout(HSplit([
+            Window(FormattedTextControl(lambda: [("class:log", "\n".join(log[-48:]))]), style="bg:#202030"),
+            Window(BufferControl(buffer), height=1),
+        ]), focused_element=buffer)
+        app = Application(layout=layout, input=pipe, output=output, full_screen=True, **kwargs)
+        latencies = []
+        sent = {}
+        frames = [0]
+
+        def afterRender(_):
+            frames[0] += 1
+            key = len(buffer.text)
+            if key in sent:
+                latencies.append(time.perf_counter() - sent.pop(key))
+        app.after_render += afterRender
+
+        # A thousand log lines per second, however long the renders take
+        async def background():
+            start = time.perf_counter()
+            while (elapsed := time.perf_counter() - start) < seconds:
+                while len(log) < elapsed * 1000:
+                    log.append(f"{len(log)}: mined 5 coal, smelted 3 iron ingots " * 3)
+                app.invalidate()
+                await asyncio.sleep(0.001)
+            app.exit()
+
+        async def typing():
+            while True:
+                await asyncio.sleep(0.05)
+                sent[len(buffer.text) + 1] = time.perf_counter()
+                pipe.send_text("x")
+
+        tasks = [asyncio.ensure_future(background()), asyncio.ensure_future(typing())]
+        await app.run_async()
+        for task in tasks:
+            task.cancel()
+        return frames[0], latencies
+
+    for name, kwargs in (("no interval", {}), ("min_redraw_interval=0.05", {"min_redraw_interval": 0.05}),
+                         ("FramePacer", {"frame_pacer": FramePacer()})):
+        with create_pipe_input() as pipe:
+            frames, latencies = asyncio.run(run(pipe, **kwargs))
+        latency = sum(latencies) / max(1, len(latencies))
+        report(f"pacing: {name}, key press latency", latency,
+               f"({frames / seconds:.0f} frames/s, max latency {max(latencies, default=0) * 1000:.1f} ms)")
+
+# A log view of many lines: the cost of a frame should depend on the visible rows only
+@benchmark("bigview")
+def benchBigView(number: int = 10):
+    import io
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.application.current import set_app
+    from prompt_toolkit.data_structures import Point, Size
+    from prompt_toolkit.layout import Layout, ScrollbarMargin, Window
+    from prompt_toolkit.layout.controls import FormattedTextControl
+    from prompt_toolkit.output.vt100 import Vt100_Output
+
+    for lineCount in (1000, 100000):
+        fragments = []
+        for i in range(lineCount):
+            fragments += [("class:number", f"{i:>7} "), ("", "mined 5 coal " * (i % 12)), ("", "\n")]
+        output = Vt100_Output(io.StringIO(), lambda: Size(rows=50, columns=120), term="xterm-256color")
+        # Follow the end of the log, like a tail
+        control = FormattedTextControl(fragments, get_cursor_position=lambda: Point(x=0, y=lineCount))
+        window = Window(control, wrap_lines=True, right_margins=[ScrollbarMargin()])
+        app = Application(layout=Layout(window), output=output, full_screen=True)
+
+        def render():
+            app.render_counter += 1
+            app.renderer.render(app, app.layout)
+
+        with set_app(app):
+            render()
+            report(f"bigview: render {lineCount} line log", timed(render, number))
+
+# A wide view of long, wrapped log lines where one line changes per frame
+@benchmark("wrap")
+def benchWrap(number: int = 50):
+    import io
+    from prompt_toolkit.application import Application
+    from prompt_toolkit.application.current import set_app
+    from prompt_toolkit.data_structures import Size
+    from prompt_toolkit.layout import Layout, Window
+    from prompt_toolkit.layout.controls import FormattedTextControl
+    from prompt_toolkit.output.vt100 import Vt100_Output
+
+    lines = [f"{i}: " + "mined 5 coal, smelted 3 iron ingots, built 1 constructor; " * 8 for i in range(20)]
+    output = Vt100_Output(io.StringIO(), lambda: Size(rows=60, columns=200), term="xterm-256color")
+    app = Application(output=output, full_screen=True)
+    control = FormattedTextControl(lambda: [("class:log", "\n".join(lines + [f"tick {app.render_counter}"]))])
+    app.layout = Layout(Window(control, wrap_lines=True))
+
+    def render():
+        app.render_counter += 1
+        app.renderer.render(app, app.layout)
+
+    with set_app(app):
+        render()
+        report("wrap: render 200x60 of wrapped lines", min(timed(render, number // 5) for _ in range(5)))
+
+if __name__ == "__main__":
+    for name in sys.argv[1:] or list(benchmarks):
+        if name not in benchmarks:
+            sys.exit(f"Unknown benchmark '{name}', available: {', '.join(benchmarks)}")
+        benchmarks[name]()
@@ -0,0 +1,112 @@
+import hashlib
+import os
+import re
+from functools import lru_cache
+
+RESET = "\033[0m"
+
+# Precompiled pattern for ANSI color escape sequences
+ansiPattern = re.compile(r'\033\[[0-9;]*m')
+
+# Pre-rendered banners are stored here, so the gradients are only computed once
+cacheDir = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "banners")
+
+# Remove ANSI escape sequences for colors
+def stripColor(text: str) -> str:
+    return ansiPattern.sub('', text)
+
+# Convert hex color to RGB tuple
+@lru_cache(maxsize=256)
+def hexToRGB(hexColor: str) -> tuple[int, int, int]:
+    hexColor = hexColor.lstrip('#')
+    return tuple(int(hexColor[i:i + 2], 16) for i in (0, 2, 4))
+
+# Truecolor foreground escape for an RGB tuple
+@lru_cache(maxsize=4096)
+def rgbToEscape(rgb: tuple[int, int, int]) -> str:
+    return f"\033[38;2;{rgb[0]};{rgb[1]};{rgb[2]}m"
+
+# Truecolor foreground escape for a hex color
+@lru_cache(maxsize=256)
+def hexToEscape(hexColor: str) -> str:
+    return rgbToEscape(hexToRGB(hexColor))
+
+# Interpolate multiple colors based on a factor (0.0 to 1.0)
+def interpolateMultiColor(colors: list[tuple[int, int, int]], factor: float) -> tuple[int, int, int]:
+    if factor <= 0:
+        return colors[0]
+    if factor >= 1:
+        return colors[-1]
+
+    totalSegments = len(colors) - 1
+    scaled = factor * totalSegments
+    index = int(scaled)
+    innerFac = scaled - index
+
+    color_start = colors[index]
+    color_end = colors[index + 1]
+
+    return tuple(
+        int(cs + (ce - cs) * innerFac)
+        for cs, ce in zip(color_start, color_end)
+    )
+
+# Escape sequences for a gradient of n steps, shared by all lines of the same length
+@lru_cache(maxsize=512)
+def gradientSteps(hexColors: tuple[str], n: int) -> tuple[str]:
+    rgbColors = [hexToRGB(h) for h in hexColors]
+    total = n - 1 if n > 1 else 1
+    return tuple(rgbToEscape(interpolateMultiColor(rgbColors, i / total)) for i in range(n))
+
+# Gradient text function
+def gradientText(text: str, hexColors: tuple[str], direction: str = "lr") -> str:
+    if len(hexColors) < 2:
+        raise ValueError("At least two colors are required.")
+
+    hexColors = tuple(hexColors)
+    lines = text.splitlines()
+
+    if direction in ("td", "bu"):
+        steps = gradientSteps(hexColors, len(lines))
+        if direction == "bu":
+            steps = steps[::-1]
+        # Reset every line at the end
+        return "\n".join(step + line + RESET for step, line in zip(steps, lines))
+
+    elif direction in ("lr", "rl"):
+        result = []
+        for line in lines:
+            steps = gradientSteps(hexColors, len(line))
+            if direction == "rl":
+                steps = steps[::-1]
+            result.append("".join(step + c for step, c in zip(steps, line)) + RESET)
+        return "\n".join(result)
+
+    else:
+        raise ValueError("Direction must be one of: 'lr', 'rl', 'td', 'bu'")
+
+# Color text function
+def colorText(text: str, hexColor: str) -> str:
+    return f"{hexToEscape(hexColor)}{text}{RESET}"
+
+# Gradient text that is rendered once and then read from the disk cache
+def cachedGradientText(text: str, hexColors: tuple[str], direction: str = "lr") -> str:
+    key = hashlib.sha1(repr((text, tuple(hexColors), direction)).encode()).hexdigest()
+    path = os.path.join(cacheDir, key + ".ans")
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        pass
+
+    rendered = gradientText(text, hexColors, direction)
+    try:
+        os.makedirs(cacheDir, exist_ok=True)
+        # Write to a temporary file first, so a crash never leaves half a banner
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(rendered)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # A read-only install just renders the banner every time
+    return rendered
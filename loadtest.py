@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from prompt_toolkit.contrib.telnet.protocol import IAC, IS, NAWS, SB, SE, TTYPE, WILL
+
+# Load test for the ZarsianX server: simulates many pioneers that log in and
+# send commands, and reports the command round trip times.
+# 'python loadtest.py --clients 300' starts its own server, pass --port to use a running one.
+
+# Once a place is mined out, mining ends with a warning instead
+mined = ("You've mined", "See what's here", "were left")
+
+# Commands of one simulated session, each with the texts that can mark the end of its output
+session = [
+    ("inventory", ("Total Items",)),
+    ("mine coal 2", mined),
+    ("recipe iron_ingot", ("Outputs",)),
+    ("mine iron 2", mined),
+    ("status", ("Stacks",)),
+    ("process iron_ingot", ("Possible",)),
+    ("help", ("Exit the game",)),
+]
+
+# Answer the server's telnet negotiation: window size and terminal type
+def handshake(rows: int = 40, columns: int = 120) -> bytes:
+    return (
+        IAC + WILL + NAWS + IAC + SB + NAWS + bytes((0, columns, 0, rows)) + IAC + SE
+        + IAC + WILL + TTYPE + IAC + SB + TTYPE + IS + b"xterm" + IAC + SE
+    )
+
+async def readUntil(reader: asyncio.StreamReader, markers: tuple[bytes, ...], timeout: float) -> None:
+    data = b""
+    while not any(marker in data for marker in markers):
+        chunk = await asyncio.wait_for(reader.read(65536), timeout)
+        if not chunk:
+            raise ConnectionError("Server closed the connection")
+        # Keep only the tail, a marker can't be longer than that
+        data = data[-256:] + chunk
+
+async def client(host: str, port: int, index: int, rounds: int, timeout: float, latencies: list[float]):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(handshake())
+        await readUntil(reader, (b"name again",), timeout)
+        # 'testable' pioneers get the test tool, so mining doesn't sleep
+        writer.write(b"testable\r")
+        await readUntil(reader, (b"Good luck",), timeout)
+        # The pioneers share the server's world, each one mines at a place of its own
+        writer.write(f"move {index} 0\r".encode())
+        await readUntil(reader, (b"Moved to",), timeout)
+
+        for _ in range(rounds):
+            for command, markers in session:
+                start = time.perf_counter()
+                writer.write(command.encode() + b"\r")
+                await readUntil(reader, tuple(marker.encode() for marker in markers), timeout)
+                latencies.append(time.perf_counter() - start)
+
+        writer.write(b"exit\r")
+        await readUntil(reader, (b"Memory encrypted",), timeout)
+    finally:
+        writer.close()
+
+async def run(args) -> None:
+    server = None
+    if args.port is None:
+        from server import createServer
+
+        args.port = 23230
+        ready = asyncio.Event()
+        server = asyncio.create_task(createServer(args.host, args.port).run(ready_cb=ready.set))
+        await ready.wait()
+
+    latencies: list[float] = []
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(client(args.host, args.port, i, args.rounds, args.timeout, latencies) for i in range(args.clients)),
+        return_exceptions=True,
+    )
+    elapsed = time.perf_counter() - start
+    failures = [r for r in results if isinstance(r, BaseException)]
+
+    if server:
+        server.cancel()
+        await asyncio.gather(server, return_exceptions=True)
+
+    print(f"Clients:   {args.clients} ({len(failures)} failed)")
+    print(f"Commands:  {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    if latencies:
+        latencies.sort()
+        print(f"Latency:   mean {statistics.mean(latencies) * 1000:.1f} ms, "
+              f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms")
+    for failure in failures[:5]:
+        print(f"Failure:   {type(failure).__name__}: {failure}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate many pioneers on a ZarsianX server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None, help="Port of a running server (default: start one)")
+    parser.add_argument("--clients", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=3, help="How often every client runs the command session")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
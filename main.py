@@ -1,16 +1,34 @@
+import asyncio
 import difflib
-import time
-import random
 import string
 import copy
-import re
-from typing import Union
+import sys
+import threading
+from contextvars import ContextVar
+from typing import Optional, TextIO, Union
 from enum import Enum
-from registry import Item, Tool, Block, Recipe, DropRateEnum
+import registry
+from registry import Item, Tool, Block, Recipe
+from auto import LocID
+from rng import RandomService, RandomStream
+from market import Market
+from stats import ProductionStats, resolutions
+from colors import cachedGradientText, colorText, gradientText, stripColor
+from world import World
 
-from prompt_toolkit import PromptSession
-from prompt_toolkit.history import InMemoryHistory
-from prompt_toolkit.completion import Completer, Completion, NestedCompleter
+# Where game output goes. Unset means stdout, the server points it at the
+# connection of the player whose command is running.
+gameOutput: ContextVar[Optional[TextIO]] = ContextVar("gameOutput", default=None)
+
+def say(*values, **kwargs):
+    print(*values, file=gameOutput.get() or sys.stdout, **kwargs)
+
+# Whether mining and processing take their time. Replays turn it off.
+realTime: ContextVar[bool] = ContextVar("realTime", default=True)
+
+async def wait(seconds: float):
+    if realTime.get():
+        await asyncio.sleep(seconds)
 
 class LogLevel(Enum):
     ERROR = {"color": "#FF6961", "symbol": "⊘"}
@@ -23,11 +41,6 @@ def log(message: str, level: LogLevel) -> str:
     symbol = level.value["symbol"]
     return f"{colorText(symbol + ' ' + message, color)}"
 
-def stripColor(text: str) -> str:
-    # Remove ANSI escape sequences for colors
-    ansi_pattern = re.compile(r'\033\[[0-9;]*m')
-    return ansi_pattern.sub('', text)
-
 class Inventory:
     stack: int = 64
 
@@ -36,51 +49,90 @@ class Inventory:
         # Every slot is a Dictionary with "item" and "count"
         self.slots = []
         self.maxSlots: int = 32
+        # (item ID, count) -> rendered table cell, see __str__
+        self._cellCache = {}
+
+    @property
+    def slots(self) -> list:
+        return self._slots
+
+    # Assigning the slots (e.g. a rollback to a backup) recounts the totals
+    @slots.setter
+    def slots(self, slots: list):
+        self._slots = slots
+        # Item index -> count over all slots, kept in step with the slots
+        self._totals = []
+        for slot in slots:
+            self._count(slot["item"].index, slot["count"])
+
+    def _count(self, index: int, delta: int):
+        totals = self._totals
+        if index >= len(totals):
+            totals.extend([0] * (index + 1 - len(totals)))
+        totals[index] += delta
 
     def addItem(self, item: Item, quantity: int = 1):
+        index = item.index
+        requested = quantity
         # Try to use existing stacks to fill up
-        for slot in self.slots:
-            if slot["item"] == item and slot["count"] < self.stack:
+        for slot in self._slots:
+            if slot["item"].index == index and slot["count"] < self.stack:
                 space = self.stack - slot["count"]
                 add = min(space, quantity)
                 slot["count"] += add
                 quantity -= add
                 if quantity == 0:
-                    return True
+                    break
         # If quantity is remaining, add new slots – if there is still space in the inventory
         while quantity > 0:
-            if len(self.slots) < self.maxSlots:
+            if len(self._slots) < self.maxSlots:
                 add = min(self.stack, quantity)
-                self.slots.append({"item": item, "count": add})
+                self._slots.append({"item": item, "count": add})
                 quantity -= add
             else:
-                print(log(f"No free space inventory space for {item.name}!", LogLevel.WARNING))
+                self._count(index, requested - quantity)
+                say(log(f"No free space inventory space for {item.name}!", LogLevel.WARNING))
                 return False
+        self._count(index, requested)
         return True
 
     def removeItem(self, item: Item, quantity: int = 1):
+        index = item.index
         removed: int = 0
-        for slot in self.slots:
-            if slot["item"] == item:
+        for slot in self._slots:
+            if slot["item"].index == index:
                 canRemove = min(slot["count"], quantity - removed)
                 slot["count"] -= canRemove
                 removed += canRemove
         # Remove empty slots
-        self.slots = [slot for slot in self.slots if slot["count"] > 0]
+        self._slots = [slot for slot in self._slots if slot["count"] > 0]
+        self._count(index, -removed)
         if removed < quantity:
-            print(log(f"Not enough {item.name} to remove!", LogLevel.WARNING))
+            say(log(f"Not enough {item.name} to remove!", LogLevel.WARNING))
             return False
         return True
 
+    # Remove and add items as one step: when any of it fails, the inventory is
+    # restored and False returned
+    def transaction(self, remove: list = (), add: list = ()) -> bool:
+        # The slot dictionaries are the only thing that changes, items are shared
+        backupSlots = [dict(slot) for slot in self._slots]
+        for item, quantity in remove:
+            if not self.removeItem(item, quantity):
+                self.slots = backupSlots
+                return False
+        for item, quantity in add:
+            if not self.addItem(item, quantity):
+                self.slots = backupSlots
+                return False
+        return True
+
     def totalItemsOf(self, item: Item):
-        total: int = 0
-        for slot in self.slots:
-            if slot["item"] == item:
-                total += slot["count"]
-        return total
+        index = item.index
+        return self._totals[index] if index < len(self._totals) else 0
 
     def totalItems(self):
-        return sum(slot["count"] for slot in self.slots)
+        return sum(self._totals)
 
     def hasItem(self, item: Item, quantity=1):
         return self.totalItemsOf(item) >= quantity
@@ -114,6 +166,19 @@ class Inventory:
         lv = "│"
         lh = "─"
 
+        # Rendered cells of the last call, keyed by slot contents. Only slots
+        # whose item or count changed since then are formatted again.
+        oldCells = self._cellCache
+        cells = {}
+
+        def cell(item, count):
+            key = (item.ID, count)
+            text = oldCells.get(key)
+            if text is None:
+                text = f" {item.name:<{cWidth}} {lv} {str(count):>{aWidth - 1}}x {lv}"
+            cells[key] = text
+            return text
+
         # Row formatting functions
         def bRow(left, mid, right):
             parts = []
@@ -121,13 +186,11 @@ class Inventory:
                 parts.append(lh * (cWidth + 2) + mid + lh * (aWidth + 2))
             return f"{left}{mid.join(parts)}{right}\n"
 
-        def cRow(items):
-            row = lv
-            for name, amount in items:
-                row += f" {name:<{cWidth}} {lv} {amount:>{aWidth - 1}}x {lv}"
-            for _ in range(columns - len(items)):
-                row += f" {' ' * (cWidth)} {lv} {' ' * (aWidth)} {lv}"
-            return row + "\n"
+        emptyCell = f" {' ' * (cWidth)} {lv} {' ' * (aWidth)} {lv}"
+
+        def cRow(slots):
+            row = lv + "".join(cell(slot["item"], slot["count"]) for slot in slots)
+            return row + emptyCell * (columns - len(slots)) + "\n"
 
         def hRow():
             header = lv
@@ -135,51 +198,48 @@ class Inventory:
                 header += f" {'Item':<{cWidth}} {lv} {'Amount':>{aWidth - 1}} {lv}"
             return header + "\n"
 
-        output = "\n"
-        output += bRow(ctl, st, ctr)
-        output += hRow()
-        output += bRow(sl, sm, sr)
+        output = ["\n", bRow(ctl, st, ctr), hRow(), bRow(sl, sm, sr)]
 
         # Even when empty, show one empty row
         if slotCount == 0:
-            rows = [cRow([])]
+            output.append(cRow([]))
         else:
-            rows = []
             for i in range(0, slotCount, columns):
-                group = []
-                for j in range(columns):
-                    idx = i + j
-                    if idx < slotCount:
-                        item = sortedSlots[idx]
-                        group.append((item["item"].name, str(item["count"])))
-                rows.append(cRow(group))
+                output.append(cRow(sortedSlots[i:i + columns]))
 
-        output += "".join(rows)
+        self._cellCache = cells
 
         # Footer
         tWidth = (cWidth + aWidth + 6) * columns + 1
 
         if columns == 1:
-            output += f"{sl}{lh * ftWidth}{st}{lh * (cWidth + 2 - (ftWidth + 1))}{sb}{lh * (aWidth + 2)}{sr}\n"
+            output.append(f"{sl}{lh * ftWidth}{st}{lh * (cWidth + 2 - (ftWidth + 1))}{sb}{lh * (aWidth + 2)}{sr}\n")
         elif columns == 2:
-            output += f"{sl}{lh * ftWidth}{st}{lh * (cWidth + 2 - (ftWidth + 1))}{sb}{lh * (aWidth + 2)}{sb}{lh * (cWidth + 2)}{sb}{lh * (aWidth + 2)}{sr}\n"
+            output.append(f"{sl}{lh * ftWidth}{st}{lh * (cWidth + 2 - (ftWidth + 1))}{sb}{lh * (aWidth + 2)}{sb}{lh * (cWidth + 2)}{sb}{lh * (aWidth + 2)}{sr}\n")
         else:
-            output += f"{sl}{lh * ftWidth}{st}{lh * (cWidth + 2 - (ftWidth + 1))}{sb}{lh * (aWidth + 2)}{sb}"
+            footer = f"{sl}{lh * ftWidth}{st}{lh * (cWidth + 2 - (ftWidth + 1))}{sb}{lh * (aWidth + 2)}{sb}"
             for _ in range(columns - 2):
-                output += f"{lh * (cWidth + 2)}{sb}{lh * (aWidth + 2)}{sb}"
-            output += f"{lh * (cWidth + 2)}{sb}{lh * (aWidth + 2)}{sr}\n"
+                footer += f"{lh * (cWidth + 2)}{sb}{lh * (aWidth + 2)}{sb}"
+            output.append(footer + f"{lh * (cWidth + 2)}{sb}{lh * (aWidth + 2)}{sr}\n")
 
-        output += f"{lv} Total Items │ {(str(self.totalItems()) + '/' + str(self.stack * self.maxSlots)):>{tWidth - 18}} {lv}\n"
-        output += f"{lv} Stacks      │ {(str(len(self.slots)) + '/' + str(self.maxSlots)):>{tWidth - 18}} {lv}\n"
+        output.append(f"{lv} Total Items │ {(str(self.totalItems()) + '/' + str(self.stack * self.maxSlots)):>{tWidth - 18}} {lv}\n")
+        output.append(f"{lv} Stacks      │ {(str(len(self.slots)) + '/' + str(self.maxSlots)):>{tWidth - 18}} {lv}\n")
         money_str = self.owner.displayMoney() if self.owner else "N/A"
-        output += f"{lv} Money       │ {money_str:>{tWidth - 19}} {lv}\n"
-        output += f"{cbl}{lh * ftWidth}{sb}{lh * (tWidth - 16)}{cbr}\n"
+        output.append(f"{lv} Money       │ {money_str:>{tWidth - 19}} {lv}\n")
+        output.append(f"{cbl}{lh * ftWidth}{sb}{lh * (tWidth - 16)}{cbr}\n")
 
-        return output
+        return "".join(output)
 
 class Player:
-    def __init__(self, name):
+    def __init__(self, name, seed: Optional[int] = None, world: Optional[World] = None):
         self.name = name
+        # All randomness of the player comes from here, the same seed plays the same game
+        self.rng = RandomService(seed)
+        # The planet's deposits, shared on a server, otherwise generated from the seed
+        self.world = world if world is not None else World(self.rng.seed)
+        self.loc = LocID(name, 0, 0)  # Where the pioneer stands, planetfall at (0, 0)
+        # Produced and consumed items over time, see 'stats'
+        self.stats = ProductionStats()
         self.inventory = Inventory(owner=self)
         self.tool = Tool.get("wooden_pickaxe")  # Start with a wooden pickaxe
         self.money = 0
@@ -187,76 +247,92 @@ class Player:
         if name == "testable":  # Special test player
             self.tool = Tool.get("test_tool")  # Start with a test tool
 
-    def mine(self, material: str, amount: int = 1):
+    async def mine(self, material: str, amount: int = 1):
         block = Block.get(material)
 
         if not block or not Block.exists(material):
-            print(log(f"Unable to mine '{material}' because it's not scannable!", LogLevel.WARNING))
+            say(log(f"Unable to mine '{material}' because it's not scannable!", LogLevel.WARNING))
             return
 
         # Check if the mining level of the tool is sufficient
         if self.tool.miningLevel < block.miningLevel and self.tool.miningLevel != -1:
-            print(log(f"Tool too weak to mine {block.ID}!", LogLevel.WARNING))
+            say(log(f"Tool too weak to mine {block.ID}!", LogLevel.WARNING))
             return
         
+        # Deposits are finite, only what is left at the player's location can be mined
+        left = self.world.deposits(self.loc).get(block.ID, 0)
+        if left <= 0:
+            say(log(f"No {block.ID} left at {self.locName()}. See what's here with 'scan' or 'move' on.", LogLevel.WARNING))
+            return
+        if amount > left:
+            say(log(f"Only {left}x {block.ID} left at {self.locName()}.", LogLevel.WARNING))
+            amount = left
+
         if amount > self.inventory.stack * 4:
             log("Why so much?", LogLevel.WARNING)
 
-        total = 0
-        for _ in range(amount):
-            drops = block.dropRates
-            _min = drops.getRateFor(DropRateEnum.MIN)
-            _max = drops.getRateFor(DropRateEnum.MAX)
-
-            # Drop amount based on drop rates calculation
-            while _min < _max:
-                if random.random() <= drops.getRateFor(DropRateEnum.RATE):
-                    _min += 1
-                else:
-                    break
-            total += _min
+        # Drop amount based on drop rates calculation, one draw per block
+        draws = self.rng.stream("mining").floats(amount)
+        total = block.dropRates.roll(draws)
 
         # Testing available space in inventory
         possible = (self.inventory.maxSlots * self.inventory.stack) - self.inventory.totalItems()
         if possible <= total:
-            print(log("Inventory is full!", LogLevel.WARNING))
+            say(log("Inventory is full!", LogLevel.WARNING))
             return
 
         # Mining time calculation
         totalTime = 0 if self.tool.miningLevel == -1 else block.miningTime * amount / self.tool.timeFac
-        print(f"\nTool: {self.tool.name}\nMining: {block.ID} ({amount}x)\nTime: ~{totalTime:.2f}s\n")
+        say(f"\nTool: {self.tool.name}\nMining: {block.ID} ({amount}x)\nTime: ~{totalTime:.2f}s\n")
 
         # Simulate mining time
-        time.sleep(totalTime)
+        await wait(totalTime)
+
+        # Other pioneers may have mined here in the meantime
+        mined = self.world.mine(self.loc, block, amount)
+        if mined < amount:
+            say(log(f"Someone was faster, only {mined}x {block.ID} were left.", LogLevel.WARNING))
+            if not mined:
+                return
+            amount = mined
+            total = block.dropRates.roll(draws[:mined])
         added = self.inventory.addItem(block.dropItem, total)
 
         if added:
-            print(f"You've mined {amount}x {block.ID} and received {total}x {block.dropItem.name}.\n")
+            self.stats.record(block.dropItem, produced=total)
+            say(f"You've mined {amount}x {block.ID} and received {total}x {block.dropItem.name}.\n")
         else:
-            print(log("Not all items could be added to the inventory.", LogLevel.WARNING))
-            print(log("Go clean it up.\n", LogLevel.WARNING))
+            say(log("Not all items could be added to the inventory.", LogLevel.WARNING))
+            say(log("Go clean it up.\n", LogLevel.WARNING))
+
+    def moveTo(self, x: int, y: int):
+        self.loc = LocID(self.name, x, y)
+        say(log(f"Moved to {self.locName()}.", LogLevel.SUCCESS))
+
+    def locName(self) -> str:
+        return f"({self.loc.x}, {self.loc.y})"
 
     def hasMoney(self, amount) -> bool:
         return self.money >= amount
 
     def addMoney(self, amount):
         self.money += amount
-        print(f"Added {self.displayMoney()} to your account. Total: {self.money} (Rwo)")
+        say(f"Added {self.displayMoney()} to your account. Total: {self.money} (Rwo)")
 
     def removeMoney(self, amount):
         if self.hasMoney(amount):
             self.money -= amount
-            print(f"Removed {self.displayMoney()} from your account. Total: {self.money} (Rwo)")
+            say(f"Removed {self.displayMoney()} from your account. Total: {self.money} (Rwo)")
         else:
-            print(log(f"Not enough money! You have only {self.displayMoney()}.", LogLevel.WARNING))
+            say(log(f"Not enough money! You have only {self.displayMoney()}.", LogLevel.WARNING))
 
     def displayMoney(self):
         return f"{self.money}チ (Chi)"
 
 class Processor:
-    def process(self, player: Player, recipe: Recipe, amount: Union[int, str] = 1):
+    async def process(self, player: Player, recipe: Recipe, amount: Union[int, str] = 1):
         if not recipe:
-            print(log(f"No recipe found for {recipe}.", LogLevel.WARNING))
+            say(log(f"No recipe found for {recipe}.", LogLevel.WARNING))
             return
 
         possible = float('inf')
@@ -270,34 +346,37 @@ class Processor:
         if amount is None:
             amount = 1
         if amount < 1:
-            print(log("Amount must be at least 1.", LogLevel.WARNING))
+            say(log("Amount must be at least 1.", LogLevel.WARNING))
             return
 
         possible = float('inf')
-        print("\n╭────────────────────────────────────────┬─────────╮")
         colored = colorText(str(recipe.ID), '#A6C1EE')
         plain = stripColor(colored)
         padding = 38 + (len(colored) - len(plain))
-        print(f"│ {colored:<{padding}} │ {str(amount):>6}x │")
-        print("├───────────────────────┬────────────────┼─────────┤")
-        print("│ Needed Items          │ Available      │ Missing │")
-        print("├───────────────────────┼────────────────┼─────────┤")
+        lines = [
+            "\n╭────────────────────────────────────────┬─────────╮",
+            f"│ {colored:<{padding}} │ {str(amount):>6}x │",
+            "├───────────────────────┬────────────────┼─────────┤",
+            "│ Needed Items          │ Available      │ Missing │",
+            "├───────────────────────┼────────────────┼─────────┤",
+        ]
         for item, n in recipe.inputs:
             required = n * amount
             available = player.inventory.totalItemsOf(item)
             possible = min(possible, available // n)
             missing = max(0, required - available)
-            print(f"│ {item.name:<21} │ {(str(available) + '/' + str(required)):<14} │ {missing:>6}x │")
-        print("├──────────┬────────────┴────────────────┴─────────┤")
-        print(f"│ Possible │ {possible:>36}x │")
-        print("╰──────────┴───────────────────────────────────────╯\n")
+            lines.append(f"│ {item.name:<21} │ {(str(available) + '/' + str(required)):<14} │ {missing:>6}x │")
+        lines.append("├──────────┬────────────┴────────────────┴─────────┤")
+        lines.append(f"│ Possible │ {possible:>36}x │")
+        lines.append("╰──────────┴───────────────────────────────────────╯\n")
+        emit(lines)
 
         if possible == 0:
-            print(log("Not enough materials for processing.\n", LogLevel.WARNING))
+            say(log("Not enough materials for processing.\n", LogLevel.WARNING))
             return
         
         if amount > possible:
-            print(log(f"Cannot process {amount}x {recipe.ID}. Only {possible} possible due to limited materials.\n", LogLevel.WARNING))
+            say(log(f"Cannot process {amount}x {recipe.ID}. Only {possible} possible due to limited materials.\n", LogLevel.WARNING))
             return
 
         # **Critical**: Safe state of inventory (deepcopy of slots)
@@ -306,62 +385,69 @@ class Processor:
         # Remove inputs
         for i, n in recipe.inputs:
             if not player.inventory.removeItem(i, n * amount):
-                print(log(f"Failed to remove {n * amount}x {i.name} from inventory. Rolling back.", LogLevel.WARNING))
+                say(log(f"Failed to remove {n * amount}x {i.name} from inventory. Rolling back.", LogLevel.WARNING))
                 # restore from backup: rollback
                 player.inventory.slots = backupSlots
                 return
 
         # Processing time
         totalTime = 0 if player.tool.miningLevel == -1 else recipe.time * amount
-        print(f"Processing {amount}x {recipe.ID}... Estimated time: ~{totalTime:.2f}s")
-        time.sleep(totalTime)
+        say(f"Processing {amount}x {recipe.ID}... Estimated time: ~{totalTime:.2f}s")
+        await wait(totalTime)
 
         # Add outputs to inventory
         for i, n in recipe.outputs:
             if not player.inventory.addItem(i, n * amount):
-                print(log(f"No room in inventory for the output {i.name}! Rolling back inputs.", LogLevel.WARNING))
+                say(log(f"No room in inventory for the output {i.name}! Rolling back inputs.", LogLevel.WARNING))
                 # Restore from backup: rollback
                 player.inventory.slots = backupSlots
                 return
 
-        print(log(f"Successfully processed {amount}x recipe '{recipe.ID}'!\n", LogLevel.SUCCESS))
+        for i, n in recipe.inputs:
+            player.stats.record(i, consumed=n * amount)
+        for i, n in recipe.outputs:
+            player.stats.record(i, produced=n * amount)
+        say(log(f"Successfully processed {amount}x recipe '{recipe.ID}'!\n", LogLevel.SUCCESS))
 
 class Shop:
     def upgrade(self, player: Player, tool: str):
         if not tool or not isinstance(tool, str):
-            print(log(f"Invalid tool name: {tool}.", LogLevel.WARNING))
+            say(log(f"Invalid tool name: {tool}.", LogLevel.WARNING))
             return
 
         newTool = Tool.get(tool)
         if not newTool:
-            print(log(f"No tool found for '{tool}'.", LogLevel.WARNING))
+            say(log(f"No tool found for '{tool}'.", LogLevel.WARNING))
             return
 
         if newTool.miningLevel <= player.tool.miningLevel:
-            print(log(f"Your {player.tool.name} is already at or above the level of {newTool.name}.", LogLevel.WARNING))
+            say(log(f"Your {player.tool.name} is already at or above the level of {newTool.name}.", LogLevel.WARNING))
             return
 
-        print("\n╭────────────────────────────────────────┬─────────╮")
         colored = colorText(str(newTool.name), '#A6C1EE')
         plain = stripColor(colored)
         padding = 38 + (len(colored) - len(plain))
-        print(f"│ {colored:<{padding}} │ Upgrade │")
-        print("├───────────────────────┬────────────────┼─────────┤")
-        print("│ Needed Items          │ Available      │ Missing │")
-        print("├───────────────────────┼────────────────┼─────────┤")
+        lines = [
+            "\n╭────────────────────────────────────────┬─────────╮",
+            f"│ {colored:<{padding}} │ Upgrade │",
+            "├───────────────────────┬────────────────┼─────────┤",
+            "│ Needed Items          │ Available      │ Missing │",
+            "├───────────────────────┼────────────────┼─────────┤",
+        ]
         
         allAvailable = True  # Flag for checking if all required items are available
         for item, required in newTool.costs:
             available = player.inventory.totalItemsOf(item)
             missing = max(0, required - available)
-            print(f"│ {item.name:<21} │ {(str(available) + '/' + str(required)):<14} │ {missing:>6}x │")
+            lines.append(f"│ {item.name:<21} │ {(str(available) + '/' + str(required)):<14} │ {missing:>6}x │")
             if missing > 0:
                 allAvailable = False
         
-        print("╰───────────────────────┴────────────────┴─────────╯\n")
+        lines.append("╰───────────────────────┴────────────────┴─────────╯\n")
+        emit(lines)
 
         if not allAvailable:
-            print(log("Upgrading canceled due to insufficient upgrade ressource supply.", LogLevel.WARNING))
+            say(log("Upgrading canceled due to insufficient upgrade ressource supply.", LogLevel.WARNING))
             return
 
         # **Critical**: Safe state of inventory (deepcopy of slots)
@@ -370,20 +456,45 @@ class Shop:
         # Remove materials from inventory
         for item, quantity in newTool.costs:
             if not player.inventory.removeItem(item, quantity):
-                print(log(f"Failed to remove {quantity}x {item.name}. Rolling back.", LogLevel.WARNING))
+                say(log(f"Failed to remove {quantity}x {item.name}. Rolling back.", LogLevel.WARNING))
                 player.inventory.slots = backupSlots
-                print(log("Inventory restored from backup.", LogLevel.TIP))
+                say(log("Inventory restored from backup.", LogLevel.TIP))
                 return
-            print(log(f"Removed {quantity}x {item.name}.", LogLevel.TIP))
+            say(log(f"Removed {quantity}x {item.name}.", LogLevel.TIP))
 
         # Processing upgrade
         player.tool = newTool
-        print(log(f"Successfully upgraded to {newTool.name}!", LogLevel.SUCCESS))
+        say(log(f"Successfully upgraded to {newTool.name}!", LogLevel.SUCCESS))
 
 # -----------------------------
 # Helper functions
 # -----------------------------
 
+# Write a whole block of lines to the terminal in one buffered write
+def emit(lines: list[str]):
+    stream = gameOutput.get() or sys.stdout
+    stream.write("\n".join(lines) + "\n")
+    stream.flush()
+
+# Cache for rendered views that only depend on the registries (help, recipes).
+# Entries are invalidated as soon as the registry version changes.
+class ViewCache:
+    def __init__(self):
+        self.views = {}  # key -> (registry version, rendered text)
+
+    def get(self, key, render) -> str:
+        cached = self.views.get(key)
+        if cached and cached[0] == registry.version:
+            return cached[1]
+        text = render()
+        self.views[key] = (registry.version, text)
+        return text
+
+    def clear(self):
+        self.views.clear()
+
+views = ViewCache()
+
 # Word wrapping function to split text into lines of max. n characters
 def wordWrap(text: str, n: int = 50) -> list[str]:
     words = text.split()
@@ -404,16 +515,24 @@ def wordWrap(text: str, n: int = 50) -> list[str]:
 # Dynamic way to print all the commands with accurate spacing to the longest command
 commands = [
     ("mine", [(f"<material> [<amount {{1..{Inventory.stack * 4}}}>|all]?1", "Mine a material of additional count (e.g. '... coal 5')")]),
+    ("scan", [(None, "Show the deposits that are left where you stand")]),
+    ("move", [("<x> <y>", "Move to another place on the planet (e.g. '... 3 -2')")]),
     ("inventory", [(None, "Show your current inventory")]),
     ("status", [(None, "Show your status (name, tool, inventory)")]),
     ("process", [("<recipe> <amount>?1", "Process material according to the recipe (e.g. '... iron_ingot 2')")]),
     ("recipe", [("<name>", "Get a recipe by name")]),
+    ("buy", [("<item> <amount> <price>", "Buy items on the market, price per item in Chi")]),
+    ("sell", [("<item> <amount> <price>", "Sell items on the market, price per item in Chi")]),
+    ("market", [("<item>", "Show the open orders for an item and yours")]),
+    ("cancel", [("<order>", "Cancel one of your open market orders")]),
+    ("stats", [("[second|minute|hour]?minute", "Items produced and consumed over the last minute, hour or day")]),
+    ("plan", [("<item> <per minute>?60 [balanced|min-machines]?balanced", "Machines needed to produce an item per minute")]),
     ("upgrade", [("<tool>", "Upgrade tool to higher grade")]),
     ("help", [(None, "Show this help menu")]),
     ("exit", [(None, "!! Exit the game")])
 ]
 
-def printHelp():
+def renderHelp() -> str:
     # Descriptions for command per line is max. n Characters long
     # ╭─────────┬───────────────────────┬────────────────────────────────────────────────────────────────╮
     # │ Command │ Arguments             │ Description                                                    │
@@ -436,13 +555,15 @@ def printHelp():
     maxArgLength = max(len(arg[0]) for cmd in cmds for arg in cmd[1])
     maxDescLength = 50  # Max length for description
 
-    print()
-    print(log("'?' means optional value with default value e.g. 4", LogLevel.TIP))
-    print(log("'|' means or / option", LogLevel.TIP))
+    lines = [
+        "",
+        log("'?' means optional value with default value e.g. 4", LogLevel.TIP),
+        log("'|' means or / option", LogLevel.TIP),
+    ]
 
-    print("\n╭" + "─" * (maxCmdLength + 2) + "┬" + "─" * (maxArgLength + 2) + "┬" + "─" * (maxDescLength + 2) + "╮")
-    print(f"│ {'Command':<{maxCmdLength}} │ {'Arguments':<{maxArgLength}} │ {'Description':<{maxDescLength}} │")
-    print("├" + "─" * (maxCmdLength + 2) + "┼" + "─" * (maxArgLength + 2) + "┼" + "─" * (maxDescLength + 2) + "┤")
+    lines.append("\n╭" + "─" * (maxCmdLength + 2) + "┬" + "─" * (maxArgLength + 2) + "┬" + "─" * (maxDescLength + 2) + "╮")
+    lines.append(f"│ {'Command':<{maxCmdLength}} │ {'Arguments':<{maxArgLength}} │ {'Description':<{maxDescLength}} │")
+    lines.append("├" + "─" * (maxCmdLength + 2) + "┼" + "─" * (maxArgLength + 2) + "┼" + "─" * (maxDescLength + 2) + "┤")
 
     for cmd in commands:
         cmdName = cmd[0]
@@ -454,20 +575,24 @@ def printHelp():
             for j, line in enumerate(descWrapped):
                 # Only print command name for the first argument/description
                 if i == 0 and j == 0:
-                    print(f"│ {cmdName:<{maxCmdLength}} │ {argText:<{maxArgLength}} │ {line:<{maxDescLength}} │")
+                    lines.append(f"│ {cmdName:<{maxCmdLength}} │ {argText:<{maxArgLength}} │ {line:<{maxDescLength}} │")
                 elif j == 0:
-                    print(f"│ {'':<{maxCmdLength}} │ {argText:<{maxArgLength}} │ {line:<{maxDescLength}} │")
+                    lines.append(f"│ {'':<{maxCmdLength}} │ {argText:<{maxArgLength}} │ {line:<{maxDescLength}} │")
                 else:
-                    print(f"│ {'':<{maxCmdLength}} │ {'':<{maxArgLength}} │ {line:<{maxDescLength}} │")
+                    lines.append(f"│ {'':<{maxCmdLength}} │ {'':<{maxArgLength}} │ {line:<{maxDescLength}} │")
             # After first argument, don't print command name again
             if i < len(args) - 1:
-                print(f"│ {'':<{maxCmdLength}} ├{'─' * (maxArgLength + 2)}┼{'─' * (maxDescLength + 2)}┤")
+                lines.append(f"│ {'':<{maxCmdLength}} ├{'─' * (maxArgLength + 2)}┼{'─' * (maxDescLength + 2)}┤")
             cmdName = ""
         # Print a separator line after each command's arguments/descriptions,
         # but only if this is not the last command in the list
         if cmd != commands[-1]:
-            print("├" + "─" * (maxCmdLength + 2) + "┼" + "─" * (maxArgLength + 2) + "┼" + "─" * (maxDescLength + 2) + "┤")
-    print("╰" + "─" * (maxCmdLength + 2) + "┴" + "─" * (maxArgLength + 2) + "┴" + "─" * (maxDescLength + 2) + "╯\n")
+            lines.append("├" + "─" * (maxCmdLength + 2) + "┼" + "─" * (maxArgLength + 2) + "┼" + "─" * (maxDescLength + 2) + "┤")
+    lines.append("╰" + "─" * (maxCmdLength + 2) + "┴" + "─" * (maxArgLength + 2) + "┴" + "─" * (maxDescLength + 2) + "╯\n")
+    return "\n".join(lines)
+
+def printHelp():
+    emit([views.get("help", renderHelp)])
 
 #╭─────────┬─────────────────────────────────────────╮
 #│ Recipe  │ <name>                                  │
@@ -479,22 +604,28 @@ def printHelp():
 #│         │ <name>                       │ <amount> │
 #╰─────────┴──────────────────────────────┴──────────╯
 
-def printRecipe(recipe: Recipe):
-    print("\n╭─────────┬───────────────────────────────────────────────╮")
-    print(f"│ {colorText('Recipe', '#A6C1EE')}  │ {recipe.ID:<45} │")
-    print("├─────────┼────────────────────────────────────┬──────────┤")
+def renderRecipe(recipe: Recipe) -> str:
+    lines = [
+        "\n╭─────────┬───────────────────────────────────────────────╮",
+        f"│ {colorText('Recipe', '#A6C1EE')}  │ {recipe.ID:<45} │",
+        "├─────────┼────────────────────────────────────┬──────────┤",
+    ]
     for item, qty in recipe.inputs:
         if item == recipe.inputs[0][0]: # makes 'Inputs' in first column only show the first input
-            print(f"│ {colorText('Inputs', '#A6C1EE')}  │ {item.name:<34} │ {qty:>7}x │")
+            lines.append(f"│ {colorText('Inputs', '#A6C1EE')}  │ {item.name:<34} │ {qty:>7}x │")
         else:
-            print(f"│         │ {item.name:<34} │ {qty:>7}x │")
-    print("├─────────┼────────────────────────────────────┼──────────┤")
+            lines.append(f"│         │ {item.name:<34} │ {qty:>7}x │")
+    lines.append("├─────────┼────────────────────────────────────┼──────────┤")
     for item, qty in recipe.outputs:
         if item == recipe.outputs[0][0]: # makes 'Outputs' in first column only show the first output
-            print(f"│ {colorText('Outputs', '#A6C1EE')} │ {item.name:<34} │ {qty:>7}x │")
+            lines.append(f"│ {colorText('Outputs', '#A6C1EE')} │ {item.name:<34} │ {qty:>7}x │")
         else:
-            print(f"│         │ {item.name:<34} │ {qty:>7}x │")
-    print("╰─────────┴────────────────────────────────────┴──────────╯\n")
+            lines.append(f"│         │ {item.name:<34} │ {qty:>7}x │")
+    lines.append("╰─────────┴────────────────────────────────────┴──────────╯\n")
+    return "\n".join(lines)
+
+def printRecipe(recipe: Recipe):
+    emit([views.get(("recipe", recipe.ID), lambda: renderRecipe(recipe))])
 
 # Gradients:
 # #FBC2EB -> #A6C1EE
@@ -528,125 +659,34 @@ YMMMU@^
  ^^
 """
 
-# Convert hex color to RGB tuple
-def hexToRGB(hexColor: str) -> tuple[int, int, int]:
-    hexColor = hexColor.lstrip('#')
-    return tuple(int(hexColor[i:i + 2], 16) for i in (0, 2, 4))
-
-# Interpolate multiple colors based on a factor (0.0 to 1.0)
-def interpolateMultiColor(colors: list[tuple[int, int, int]], factor: float) -> tuple[int, int, int]:
-    if factor <= 0:
-        return colors[0]
-    if factor >= 1: 
-        return colors[-1]
-
-    totalSegments = len(colors) - 1
-    scaled = factor * totalSegments
-    index = int(scaled)
-    innerFac = scaled - index
-
-    color_start = colors[index]
-    color_end = colors[index + 1]
-
-    return tuple(
-        int(cs + (ce - cs) * innerFac)
-        for cs, ce in zip(color_start, color_end)
-    )
-
-# Gradient text function
-def gradientText(text: str, hexColors: tuple[str], direction: str = "lr") -> str:
-    if len(hexColors) < 2:
-        raise ValueError("At least two colors are required.")
-
-    rgbColors = [hexToRGB(h) for h in hexColors]
-    lines = text.splitlines()
-
-    def applyGradient(items: list[str], reverse: bool = False) -> list[str]:
-        if reverse:
-            items = items[::-1]
-        total = len(items) - 1 if len(items) > 1 else 1
-        result = []
-        for i, item in enumerate(items):
-            factor = i / total
-            rgb = interpolateMultiColor(rgbColors, factor)
-            result.append(f"\033[38;2;{rgb[0]};{rgb[1]};{rgb[2]}m{item}")
-        if reverse:
-            result = result[::-1]
-        return result
-
-    if direction in ("td", "bu"):
-        reverse = direction == "bu"
-        linesProc = lines[::-1] if reverse else lines
-        coloredLines = applyGradient(linesProc, reverse=False)
-        if reverse:
-            coloredLines = coloredLines[::-1]
-        # Jede Zeile am Ende resetten
-        return "\n".join(line + "\033[0m" for line in coloredLines)
-
-    elif direction in ("lr", "rl"):
-        reverse = direction == "rl"
-        result = []
-        for line in lines:
-            chars = list(line)
-            coloredChars = applyGradient(chars, reverse)
-            result.append("".join(coloredChars) + "\033[0m")
-        return "\n".join(result)
-
-    else:
-        raise ValueError("Direction must be one of: 'lr', 'rl', 'td', 'bu'")
-
-# Color text function
-def colorText(text: str, hexColor: str) -> str:
-    rgb = hexToRGB(hexColor)
-    return f"\033[38;2;{rgb[0]};{rgb[1]};{rgb[2]}m{text}\033[0m"
-
 # Unreadable text
-def obfuscateText(text: str) -> str:
-    charset = string.ascii_letters + string.digits + string.punctuation
-    return ''.join(random.choice(charset) if c != ' ' else ' ' for c in text)
-
-# -----------------------------
-# Main Game Loop
-# -----------------------------
-def main():
-    print(gradientText(asciiArtLogo, ("#FBC2EB", "#A6C1EE"), "lr"))
-    name = input("\nWhat's your name again? # ")
-    player = Player(name)
-    processor = Processor()
-    shop = Shop()
-
-    print(gradientText(asciiArtPlanet, ("#E4BDD4", "#4839A1"), "td"))
-
-    # Welcome message with "story" (ironically)
-    print(f"""
-Welcome on board of the {gradientText('ZarsianX', ('#E4BDD4', '#4839A1'), 'lr')}, pioneer {colorText(player.name, '#FBC2EB')}! We're approaching {gradientText('Zars P14a', ('#FBC2EB', '#A6C1EE'), 'lr')}.
-The air is thin, the ground is rough – but you are ready. As one of the first settlers on this remote planet, it is up to you to tap into its resources and continuously improve your equipment.
-
-Equipped with nothing more than a simple tool, you begin your adventure. Deep beneath the surface, coal, iron ore, and more await – ready to be discovered by you.
-
-Initiating planetfall!
-
-Deploying parachute...
-Skipping parachute... Skipping parachute...! Sk.. i.. {obfuscateText("ipping parachute!")}...
+obfuscateCharset = string.ascii_letters + string.digits + string.punctuation
+textStream = RandomStream()
 
-Planetfall achieved! Now it's your turn...
+def obfuscateText(text: str, stream: Optional[RandomStream] = None) -> str:
+    chars = (stream or textStream).choices(obfuscateCharset, len(text))
+    return ''.join(' ' if c == ' ' else r for c, r in zip(text, chars))
 
-Pioneer acceptable!
-Toolbox opened!
+# --------------------------------------
+# Command completer using prompt_toolkit
+# --------------------------------------
 
-Type '{colorText("help", '#A7E06F')}' to see all available commands.
+# prompt_toolkit pulls in most of its package on import, so it is only imported
+# here. preloadPromptToolkit() starts that import in the background while the
+# banner and the name prompt are shown.
+def preloadPromptToolkit() -> threading.Thread:
+    def load():
+        import prompt_toolkit.shortcuts  # noqa: F401
 
-⌇ Good luck, {colorText(player.name, "#FBC2EB")}.
-⌇ - And remember: Humanity counts on you!
-""")
+    thread = threading.Thread(target=load, name="preload-prompt_toolkit", daemon=True)
+    thread.start()
+    return thread
 
-    # Function to handle exit
-    def handleExit():
-        print(f"\nMemory encrypted!\nPlanet {gradientText('Zars P14a', ('#FBC2EB', '#A6C1EE'))} is waiting for you to return.\n\nData(Player('{player.name}')): [\n\t{obfuscateText('ashdih askdhaiwuihh asiudhwudbn asdhkjhwih aksjdhdwi')}\n]\n")
+def createSession(player: Player, **options):
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.history import InMemoryHistory
+    from prompt_toolkit.completion import Completer, Completion, NestedCompleter
 
-    # --------------------------------------
-    # Command completer using prompt_toolkit
-    # --------------------------------------
     class FuzzyCompleter(Completer):
         def __init__(self, completionsDict):
             self.completions_dict = {
@@ -691,6 +731,12 @@ Type '{colorText("help", '#A7E06F')}' to see all available commands.
                 if tool.miningLevel >= currentLevel and tool != currentTool and tool.ID not in ["test_tool"]
             },
             'process': { recipe.ID: None for recipe in Recipe.all() },
+            'plan': { item.ID: None for item in Item.all() },
+            'buy': { item.ID: None for item in Item.all() },
+            'sell': { item.ID: None for item in Item.all() },
+            'market': { item.ID: None for item in Item.all() },
+            'cancel': None,
+            'stats': { resolution: None for resolution in resolutions },
             'help': None,
             'exit': None
         }
@@ -715,110 +761,392 @@ Type '{colorText("help", '#A7E06F')}' to see all available commands.
                         return
                 # Fallback to nested completer for other commands
                 yield from nestedCompleter.get_completions(document, complete_event)
-            
+        
         return CombinedCompleter()
 
     # Initialize prompt session with history and completer
     history = InMemoryHistory()
     commandCompleter = createCompleter(player)
-    session = PromptSession(
+    return PromptSession(
         history=history,
-        completer=commandCompleter
+        completer=commandCompleter,
+        **options
     )
 
-    # Main game loop with commands
+#╭──────────────┬──────────────────────────────┬──────────╮
+#│ Machine      │ Recipe / Block               │ Count    │
+#├──────────────┼──────────────────────────────┼──────────┤
+#│ <type>       │ <name>                       │ <count>  │ # exact count, built machines in brackets
+#╰──────────────┴──────────────────────────────┴──────────╯
+
+def printPlan(player: Player, item: Item, rate: float, mode: str):
+    from planner import Planner
+
+    try:
+        plan = Planner(player.tool).plan({item: rate}, mode)
+    except ValueError as e:
+        say(log(str(e), LogLevel.WARNING))
+        return
+
+    built = plan.buildCounts()
+    lines = [
+        f"\n{colorText('Plan', '#A6C1EE')}: {rate:g} {item.name} per minute ({mode})",
+        "╭──────────────┬──────────────────────────────┬──────────────╮",
+        f"│ {'Machine':<12} │ {'Recipe / Block':<28} │ {'Count':<12} │",
+        "├──────────────┼──────────────────────────────┼──────────────┤",
+    ]
+    for column, count in plan.machines:
+        key = (column.machineType, column.source.ID)
+        lines.append(f"│ {column.machineType:<12} │ {column.source.ID:<28} │ {count:>6.2f} ({built[key]:>3}) │")
+    lines.append("╰──────────────┴──────────────────────────────┴──────────────╯")
+    lines.append(f"Total: {plan.totalMachines():.2f} machines, build {sum(built.values())}\n")
+    emit(lines)
+
+def trade(player: Player, side: str, item: Item, amount: int, price: int):
+    if amount < 1:
+        say(log("Amount must be at least 1.", LogLevel.WARNING))
+        return
+    order = market.post(player, item, side, amount, price)
+    if order is None:
+        if side == "buy":
+            say(log(f"Not enough money! {amount}x {item.name} at {price}チ cost {amount * price}チ, you have only {player.displayMoney()}.", LogLevel.WARNING))
+        else:
+            say(log(f"Not enough {item.name} to sell {amount}x.", LogLevel.WARNING))
+        return
+    market.settle()
+
+    traded = order.quantity - order.remaining
+    if traded:
+        say(log(f"{'Bought' if side == 'buy' else 'Sold'} {traded}x {item.name}. Money: {player.displayMoney()}", LogLevel.SUCCESS))
+    if order.remaining:
+        say(log(f"Order {order.id}: {order.remaining}x {item.name} at {price}チ wait on the market.", LogLevel.TIP))
+
+sparkBlocks = " ▁▂▃▄▅▆▇█"
+
+# One character per bucket, scaled to the largest bucket
+def sparkline(values: list) -> str:
+    top = max(values)
+    if top <= 0:
+        return " " * len(values)
+    return "".join(sparkBlocks[-(-value * (len(sparkBlocks) - 1) // top)] for value in values)
+
+#╭───────────────────────┬──────────┬──────────┬──────────────────────────────────────────────────────────────╮
+#│ Item                  │ Produced │ Consumed │ Produced per <bucket> (oldest → now)                         │
+#├───────────────────────┼──────────┼──────────┼──────────────────────────────────────────────────────────────┤
+#│ <name>                │ <amount> │ <amount> │ <sparkline>                                                  │
+#╰───────────────────────┴──────────┴──────────┴──────────────────────────────────────────────────────────────╯
+
+def printStats(player: Player, resolution: str):
+    step, size = resolutions[resolution]
+    width = max(size, 38)
+    lines = [
+        f"\n{colorText('Statistics', '#A6C1EE')}: last {size} {resolution}s",
+        f"╭───────────────────────┬──────────┬──────────┬{'─' * (width + 2)}╮",
+        f"│ {'Item':<21} │ {'Produced':>8} │ {'Consumed':>8} │ {'Produced per ' + resolution + ' (oldest → now)':<{width}} │",
+        f"├───────────────────────┼──────────┼──────────┼{'─' * (width + 2)}┤",
+    ]
+    items = player.stats.items()
+    for item in items:
+        produced = player.stats.series(item, resolution, "produced")
+        consumed = player.stats.series(item, resolution, "consumed")
+        lines.append(f"│ {item.name:<21} │ {sum(produced):>7}x │ {sum(consumed):>7}x │ {sparkline(produced):>{width}} │")
+    if not items:
+        lines.append(f"│ {'Nothing produced yet':<{46 + width}} │")
+    lines.append(f"╰───────────────────────┴──────────┴──────────┴{'─' * (width + 2)}╯\n")
+    emit(lines)
+
+#╭──────────────────────┬──────────╮
+#│ Deposit              │ Left     │ # at the player's location
+#├──────────────────────┼──────────┤
+#│ <block>              │ <amount> │
+#╰──────────────────────┴──────────╯
+
+def printScan(player: Player):
+    deposits = player.world.deposits(player.loc)
+    if not deposits:
+        say(log(f"Nothing to mine at {player.locName()}. Try another place with 'move <x> <y>'.", LogLevel.TIP))
+        return
+    lines = [
+        f"\n{colorText('Scan', '#A6C1EE')}: {player.locName()}",
+        "╭──────────────────────┬──────────╮",
+        "│ Deposit              │ Left     │",
+        "├──────────────────────┼──────────┤",
+    ]
+    for ID, left in sorted(deposits.items()):
+        lines.append(f"│ {ID:<20} │ {left:>7}x │")
+    lines.append("╰──────────────────────┴──────────╯\n")
+    emit(lines)
+
+#╭────────┬──────────┬──────────╮
+#│ Side   │ Amount   │ Price    │ # best 5 of each side, then your open orders
+#├────────┼──────────┼──────────┤
+#│ sell   │ <amount> │ <price>  │
+#╰────────┴──────────┴──────────╯
+
+def printMarket(player: Player, item: Item, depth: int = 5):
+    book = market.book(item)
+    lines = [
+        f"\n{colorText('Market', '#A6C1EE')}: {item.name}",
+        "╭────────┬──────────┬──────────╮",
+        "│ Side   │ Amount   │ Price    │",
+        "├────────┼──────────┼──────────┤",
+    ]
+    asks = book.depth("sell")[:depth]
+    bids = book.depth("buy")[:depth]
+    for order in reversed(asks):
+        lines.append(f"│ {'sell':<6} │ {order.remaining:>7}x │ {order.price:>7}チ│")
+    for order in bids:
+        lines.append(f"│ {'buy':<6} │ {order.remaining:>7}x │ {order.price:>7}チ│")
+    if not asks and not bids:
+        lines.append(f"│ {'No open orders':<28} │")
+    lines.append("╰────────┴──────────┴──────────╯")
+    for order in book.depth("sell") + book.depth("buy"):
+        if order.owner is player:
+            lines.append(log(f"Your order {order.id}: {order.side} {order.remaining}x at {order.price}チ", LogLevel.TIP))
+    lines.append("")
+    emit(lines)
+
+# -----------------------------
+# Main Game Loop
+# -----------------------------
+
+def renderWelcome(player: Player) -> str:
+    # Welcome message with "story" (ironically)
+    return cachedGradientText(asciiArtPlanet, ("#E4BDD4", "#4839A1"), "td") + "\n" + f"""
+Welcome on board of the {gradientText('ZarsianX', ('#E4BDD4', '#4839A1'), 'lr')}, pioneer {colorText(player.name, '#FBC2EB')}! We're approaching {gradientText('Zars P14a', ('#FBC2EB', '#A6C1EE'), 'lr')}.
+The air is thin, the ground is rough – but you are ready. As one of the first settlers on this remote planet, it is up to you to tap into its resources and continuously improve your equipment.
+
+Equipped with nothing more than a simple tool, you begin your adventure. Deep beneath the surface, coal, iron ore, and more await – ready to be discovered by you.
+
+Initiating planetfall!
+
+Deploying parachute...
+Skipping parachute... Skipping parachute...! Sk.. i.. {obfuscateText("ipping parachute!", player.rng.stream("text"))}...
+
+Planetfall achieved! Now it's your turn...
+
+Pioneer acceptable!
+Toolbox opened!
+
+Type '{colorText("help", '#A7E06F')}' to see all available commands.
+
+⌇ Good luck, {colorText(player.name, "#FBC2EB")}.
+⌇ - And remember: Humanity counts on you!
+"""
+
+# Function to handle exit
+def handleExit(player: Player):
+    say(f"\nMemory encrypted!\nPlanet {gradientText('Zars P14a', ('#FBC2EB', '#A6C1EE'))} is waiting for you to return.\n\nData(Player('{player.name}')): [\n\t{obfuscateText('ashdih askdhaiwuihh asiudhwudbn asdhkjhwih aksjdhdwi', player.rng.stream('text'))}\n]\n")
+
+# Random speech lines for the player
+speechLines = [
+    "What do you want to do?",
+    "What's your next step, pioneer?",
+    "How can I assist you?",
+    "Ready for the next task?",
+    "What is your command, pioneer?",
+    "The frontier awaits your decision.",
+    "Command received... awaiting further orders.",
+    "What's our next move, trailblazer?",
+    "All systems ready. What's your plan?",
+    "Another day, another mission. What's first?",
+    "Standing by for your instructions.",
+    "What's the next challenge?",
+    "Your journey continues. What's next?",
+    "The unknown calls. How do we proceed?",
+    "You lead the way! What now?",
+    "The universe is vast, and so are your choices.",
+]
+
+
+processor = Processor()
+shop = Shop()
+# Shared by all players of a server
+market = Market()
+
+# Run one command of a player, returns False when the player leaves the game
+async def runCommand(player: Player, command: str) -> bool:
+    parts = command.split()
+
+    if command == "exit":
+        handleExit(player)
+        return False
+    elif command == "help":
+        printHelp()
+    elif command.startswith("mine"):
+        if len(parts) in range(2, 4): # 2-3 parts
+            material = parts[1]
+            anzahl = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 1
+            await player.mine(material, anzahl)
+        else:
+            say(log("Pioneer! Provide a material, e.g. 'mine coal' or with a count 'mine coal 5'.", LogLevel.WARNING))
+    elif command == "scan":
+        printScan(player)
+    elif command.startswith("move"):
+        coords = parts[1:]
+        if len(coords) == 2 and all(c.lstrip("-").isdigit() for c in coords):
+            player.moveTo(int(coords[0]), int(coords[1]))
+        else:
+            say(log("Usage: move <x> <y>", LogLevel.WARNING))
+    elif command == "inventory":
+        emit([str(player.inventory)])
+    elif command == "status":
+        emit([
+            f"\nName: {player.name}",
+            f"Tool: {player.tool.name} (Level {player.tool.miningLevel})",
+            f"Inventory: {player.inventory} \n",
+        ])
+    elif command.startswith("process"):
+        if len(parts) in range(2, 4):
+            recipe = Recipe.get(parts[1])
+            amount = 1
+
+            if len(parts) == 3:
+                if parts[2] == "all":
+                    amount = "all"
+                elif parts[2].isdigit():
+                    amount = int(parts[2])
+                elif not parts[2]:
+                    amount = 1
+                else:
+                    say(log(f"Invalid amount: '{parts[2]}'. Use a number or 'all'.", LogLevel.WARNING))
+                    return True
+
+            if recipe:
+                await processor.process(player, recipe, amount)
+            else:
+                say(log(f"No recipe found with name '{parts[1]}'.", LogLevel.WARNING))
+        else:
+            say(log("Usage: process <recipe> [amount|all]?1", LogLevel.WARNING))
+    elif command.startswith("upgrade"):
+        if len(parts) != 2:
+            say(log("Usage: upgrade <tool-id>", LogLevel.WARNING))
+            return True
+        shop.upgrade(player, parts[1])
+    elif command.startswith("recipe"):
+        if len(parts) == 2:
+            recipeName = parts[1]
+            recipe = Recipe.get(recipeName)
+            if recipe:
+                printRecipe(recipe)
+            else:
+                say(log(f"No recipe found with name '{recipeName}'.", LogLevel.WARNING))
+        else:
+            say(log("Usage: recipe <name>", LogLevel.WARNING))
+    elif parts and parts[0] in ("buy", "sell"):
+        if len(parts) == 4 and parts[2].isdigit() and parts[3].isdigit():
+            item = Item.get(parts[1])
+            if item:
+                trade(player, parts[0], item, int(parts[2]), int(parts[3]))
+            else:
+                say(log(f"No item found with name '{parts[1]}'.", LogLevel.WARNING))
+        else:
+            say(log(f"Usage: {parts[0]} <item> <amount> <price>", LogLevel.WARNING))
+    elif command.startswith("market"):
+        item = Item.get(parts[1]) if len(parts) == 2 else None
+        if item:
+            printMarket(player, item)
+        else:
+            say(log("Usage: market <item>", LogLevel.WARNING))
+    elif command.startswith("cancel"):
+        order = market.orders.get(int(parts[1])) if len(parts) == 2 and parts[1].isdigit() else None
+        if order and order.owner is player:
+            market.cancel(order)
+            say(log(f"Order {order.id} cancelled, the rest is back with you.", LogLevel.SUCCESS))
+        else:
+            say(log("Usage: cancel <order> (one of your open orders, see 'market <item>')", LogLevel.WARNING))
+    elif command.startswith("stats"):
+        resolution = parts[1] if len(parts) == 2 else "minute"
+        if len(parts) <= 2 and resolution in resolutions:
+            printStats(player, resolution)
+        else:
+            say(log(f"Usage: stats [{'|'.join(resolutions)}]?minute", LogLevel.WARNING))
+    elif command.startswith("plan"):
+        if len(parts) in range(2, 5):
+            item = Item.get(parts[1])
+            try:
+                rate = float(parts[2]) if len(parts) > 2 else 60.0
+            except ValueError:
+                rate = 0.0
+            mode = parts[3] if len(parts) > 3 else "balanced"
+            # Also rules out nan and inf, the planner can't build for those
+            if not 0 < rate < float("inf"):
+                say(log(f"'{parts[2]}' is not a rate, give the items per minute as a positive number.", LogLevel.WARNING))
+            elif item:
+                printPlan(player, item, rate, mode)
+            else:
+                say(log(f"No item found with name '{parts[1]}'.", LogLevel.WARNING))
+        else:
+            say(log("Usage: plan <item> [per minute]?60 [balanced|min-machines]?balanced", LogLevel.WARNING))
+    else:
+        say(log("Pioneer! We don't know this one. Type 'help' for an overview!", LogLevel.ERROR))
+    return True
+
+# Game loop of one player, shared by the local game and the server.
+# With a command log every command is recorded, see replay.py.
+async def play(player: Player, session, commandLog = None):
     attempts = 0
+    speech = player.rng.stream("speech")
 
     while True:
         try:
-            # Random speech lines for the player
-            speechLines = [
-                "What do you want to do?",
-                "What's your next step, pioneer?",
-                "How can I assist you?",
-                "Ready for the next task?",
-                "What is your command, pioneer?",
-                "The frontier awaits your decision.",
-                "Command received... awaiting further orders.",
-                "What's our next move, trailblazer?",
-                "All systems ready. What's your plan?",
-                "Another day, another mission. What's first?",
-                "Standing by for your instructions.",
-                "What's the next challenge?",
-                "Your journey continues. What's next?",
-                "The unknown calls. How do we proceed?",
-                "You lead the way! What now?",
-                "The universe is vast, and so are your choices.",
-            ]
-
-            command = session.prompt(f"{'What are you waiting for? Orders, Pioneer!' if attempts == 0 else random.choice(speechLines)} # ").strip()
+            command = (await session.prompt_async(f"{'What are you waiting for? Orders, Pioneer!' if attempts == 0 else speech.choice(speechLines)} # ")).strip()
 
             attempts += 1
+            if commandLog is not None:
+                commandLog.record(command)
 
-            parts = command.split()
-
-            if command == "exit":
-                handleExit()
+            if not await runCommand(player, command):
                 break
-            elif command == "help":
-                printHelp()
-            elif command.startswith("mine"):
-                if len(parts) in range(2, 4): # 2-3 parts
-                    material = parts[1]
-                    anzahl = int(parts[2]) if len(parts) > 2 and parts[2].isdigit() else 1
-                    player.mine(material, anzahl)
-                else:
-                    print(log("Pioneer! Provide a material, e.g. 'mine coal' or with a count 'mine coal 5'.", LogLevel.WARNING))
-            elif command == "inventory":
-                print(player.inventory)
-            elif command == "status":
-                print(f"\nName: {player.name}")
-                print(f"Tool: {player.tool.name} (Level {player.tool.miningLevel})")
-                print("Inventory:", player.inventory, "\n")
-            elif command.startswith("process"):
-                if len(parts) in range(2, 4):
-                    recipe = Recipe.get(parts[1])
-                    amount = 1
-
-                    if len(parts) == 3:
-                        if parts[2] == "all":
-                            amount = "all"
-                        elif parts[2].isdigit():
-                            amount = int(parts[2])
-                        elif not parts[2]:
-                            amount = 1
-                        else:
-                            print(log(f"Invalid amount: '{parts[2]}'. Use a number or 'all'.", LogLevel.WARNING))
-                            continue
-
-                    if recipe:
-                        processor.process(player, recipe, amount)
-                    else:
-                        print(log(f"No recipe found with name '{parts[1]}'.", LogLevel.WARNING))
-                else:
-                    print(log("Usage: process <recipe> [amount|all]?1", LogLevel.WARNING))
-            elif command.startswith("upgrade"):
-                if len(parts) != 2:
-                    print(log("Usage: upgrade <tool-id>", LogLevel.WARNING))
-                    continue
-                shop.upgrade(player, parts[1])
-            elif command.startswith("recipe"):
-                if len(parts) == 2:
-                    recipeName = parts[1]
-                    recipe = Recipe.get(recipeName)
-                    if recipe:
-                        printRecipe(recipe)
-                    else:
-                        print(log(f"No recipe found with name '{recipeName}'.", LogLevel.WARNING))
-                else:
-                    print(log("Usage: recipe <name>", LogLevel.WARNING))
-            else:
-                print(log("Pioneer! We don't know this one. Type 'help' for an overview!", LogLevel.ERROR))
 
-        # Handle exceptions where Ctrl+C is pressed
-        except KeyboardInterrupt:
-            handleExit()
+        # Handle exceptions where Ctrl+C is pressed or the input is closed
+        except (KeyboardInterrupt, EOFError):
+            handleExit(player)
             break
 
+# Mean and slowest time of every render phase over the last frames
+def printRenderProfile(profiler):
+    summary = profiler.summary()
+    if not summary:
+        return
+    say(f"\nRendering, last {len(profiler.frames)} frames (mean / max):")
+    for phase, (mean, worst) in summary.items():
+        say(f"  {phase:<16} {mean * 1000:>8.3f} ms {worst * 1000:>8.3f} ms")
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Play ZarsianX.")
+    parser.add_argument("--seed", type=int, default=None, help="Seed of the game, the same seed plays the same game")
+    parser.add_argument("--record", metavar="FILE", help="Record all commands to a log that 'replay.py' can replay")
+    parser.add_argument("--profile-render", action="store_true", help="Time every phase of the prompt's rendering and print a summary at the end")
+    args = parser.parse_args()
+
+    loader = preloadPromptToolkit()
+    say(cachedGradientText(asciiArtLogo, ("#FBC2EB", "#A6C1EE"), "lr"))
+    name = input("\nWhat's your name again? # ")
+    player = Player(name, args.seed)
+    say(renderWelcome(player))
+
+    commandLog = None
+    if args.record:
+        from replay import CommandLog
+        commandLog = CommandLog(player.name, player.rng.seed)
+
+    # Wait for the background import, then set up the prompt session
+    loader.join()
+    session = createSession(player)
+    if args.profile_render:
+        from prompt_toolkit.render_profiler import RenderProfiler
+        session.app.render_profiler = RenderProfiler(max_frames=1000)
+    try:
+        asyncio.run(play(player, session, commandLog))
+    finally:
+        if commandLog is not None:
+            commandLog.save(args.record, player)
+        if args.profile_render:
+            printRenderProfile(session.app.render_profiler)
+
 # Start the game
-main()
+if __name__ == "__main__":
+    main()
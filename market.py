@@ -0,0 +1,185 @@
+import heapq
+import itertools
+from typing import Dict, List, Optional, Tuple
+
+from registry import Item
+
+# Market where players and automations trade items for money. Every item has
+# its own order book with a heap of buy orders (highest price first) and a heap
+# of sell orders (lowest price first), older orders first at the same price, so
+# matching a new order costs O(log n) per fill. Trades happen at the price of
+# the order that was waiting in the book.
+#
+# Traders are anything with an 'inventory' (main.Inventory) and 'money', e.g. a
+# Player. Posting an order puts its goods in escrow right away: the items of a
+# sell order leave the inventory, the money of a buy order leaves the account.
+# Fills are collected and settled in batches through Inventory.transaction, one
+# transaction per trader and settle().
+
+BUY = "buy"
+SELL = "sell"
+
+class Order:
+    __slots__ = ("id", "owner", "item", "side", "price", "quantity", "remaining")
+
+    def __init__(self, id: int, owner, item: Item, side: str, price: int, quantity: int):
+        self.id = id
+        self.owner = owner
+        self.item = item
+        self.side = side
+        self.price = price
+        self.quantity = quantity
+        self.remaining = quantity  # 0 once filled or cancelled
+
+    def __repr__(self):
+        return f"<Order {self.id}: {self.side} {self.remaining}/{self.quantity}x {self.item.ID} at {self.price}>"
+
+class Fill:
+    __slots__ = ("buy", "sell", "price", "quantity")
+
+    def __init__(self, buy: Order, sell: Order, price: int, quantity: int):
+        self.buy = buy
+        self.sell = sell
+        self.price = price
+        self.quantity = quantity
+
+class OrderBook:
+    def __init__(self, item: Item):
+        self.item = item
+        # Heap entries are (sort price, order id, order); ids grow with time.
+        # Filled and cancelled orders stay in the heaps until they reach the top.
+        self.bids: List[Tuple[int, int, Order]] = []
+        self.asks: List[Tuple[int, int, Order]] = []
+
+    # Best waiting order of a side, dropping dead ones on the way
+    def best(self, side: str) -> Optional[Order]:
+        heap = self.bids if side == BUY else self.asks
+        while heap and heap[0][2].remaining == 0:
+            heapq.heappop(heap)
+        return heap[0][2] if heap else None
+
+    # Match the order against the other side, rest goes into the book
+    def submit(self, order: Order) -> List[Fill]:
+        fills = []
+        heap = self.asks if order.side == BUY else self.bids
+
+        while order.remaining and heap:
+            resting = heap[0][2]
+            if resting.remaining == 0:
+                heapq.heappop(heap)
+                continue
+            # Prices no longer cross: the rest waits in the book
+            if order.side == BUY:
+                noMatch = resting.price > order.price
+            else:
+                noMatch = resting.price < order.price
+            if noMatch:
+                break
+            quantity = min(order.remaining, resting.remaining)
+            order.remaining -= quantity
+            resting.remaining -= quantity
+            if order.side == BUY:
+                fills.append(Fill(order, resting, resting.price, quantity))
+            else:
+                fills.append(Fill(resting, order, resting.price, quantity))
+            if resting.remaining == 0:
+                heapq.heappop(heap)
+
+        if order.remaining:
+            if order.side == BUY:
+                heapq.heappush(self.bids, (-order.price, order.id, order))
+            else:
+                heapq.heappush(self.asks, (order.price, order.id, order))
+        return fills
+
+    # Open orders of one side, best first
+    def depth(self, side: str) -> List[Order]:
+        heap = self.bids if side == BUY else self.asks
+        return [order for _, _, order in sorted(heap) if order.remaining]
+
+class Market:
+    def __init__(self):
+        self.books: Dict[Item, OrderBook] = {}
+        self.ids = itertools.count(1)
+        self.orders: Dict[int, Order] = {}
+        # Matched, not yet settled
+        self.fills: List[Fill] = []
+        # Trader -> [(item, quantity)] that didn't fit into their inventory yet
+        self.undelivered: Dict[object, List[Tuple[Item, int]]] = {}
+
+    def book(self, item: Item) -> OrderBook:
+        book = self.books.get(item)
+        if book is None:
+            book = self.books[item] = OrderBook(item)
+        return book
+
+    # Post an order, None when the trader can't pay for it or doesn't have the items
+    def post(self, owner, item: Item, side: str, quantity: int, price: int) -> Optional[Order]:
+        if side not in (BUY, SELL):
+            raise ValueError("Side must be one of: 'buy', 'sell'")
+        if quantity < 1 or price < 0:
+            raise ValueError("Quantity must be at least 1 and price not negative.")
+
+        if side == BUY:
+            if owner.money < quantity * price:
+                return None
+            owner.money -= quantity * price
+        elif not owner.inventory.hasItem(item, quantity) or not owner.inventory.transaction(remove=[(item, quantity)]):
+            return None
+
+        order = Order(next(self.ids), owner, item, side, price, quantity)
+        self.orders[order.id] = order
+        self.fills.extend(self.book(item).submit(order))
+        if not order.remaining:
+            del self.orders[order.id]
+        return order
+
+    def buy(self, owner, item: Item, quantity: int, price: int) -> Optional[Order]:
+        return self.post(owner, item, BUY, quantity, price)
+
+    def sell(self, owner, item: Item, quantity: int, price: int) -> Optional[Order]:
+        return self.post(owner, item, SELL, quantity, price)
+
+    # Take an open order off the market and give back what is left in escrow
+    def cancel(self, order: Order) -> bool:
+        if self.orders.pop(order.id, None) is None:
+            return False
+        remaining, order.remaining = order.remaining, 0
+        if order.side == BUY:
+            order.owner.money += remaining * order.price
+        else:
+            self.deliver(order.owner, [(order.item, remaining)])
+        return True
+
+    # Hand out everything matched since the last settlement
+    def settle(self) -> int:
+        fills, self.fills = self.fills, []
+        money: Dict[object, int] = {}
+        items: Dict[object, Dict[Item, int]] = {}
+        for fill in fills:
+            buyer, seller = fill.buy.owner, fill.sell.owner
+            money[seller] = money.get(seller, 0) + fill.quantity * fill.price
+            # Buyers paid their own price into escrow, the difference comes back
+            money[buyer] = money.get(buyer, 0) + fill.quantity * (fill.buy.price - fill.price)
+            received = items.setdefault(buyer, {})
+            received[fill.sell.item] = received.get(fill.sell.item, 0) + fill.quantity
+            if not fill.buy.remaining:
+                self.orders.pop(fill.buy.id, None)
+            if not fill.sell.remaining:
+                self.orders.pop(fill.sell.id, None)
+
+        for owner, amount in money.items():
+            owner.money += amount
+        for owner, received in items.items():
+            self.deliver(owner, list(received.items()))
+        # Retry earlier deliveries, the inventory may have room by now
+        for owner in list(self.undelivered):
+            if owner not in items:
+                self.deliver(owner, [])
+        return len(fills)
+
+    # Add items to the trader's inventory in one transaction, keep them for later if they don't fit
+    def deliver(self, owner, received: List[Tuple[Item, int]]):
+        pending = self.undelivered.pop(owner, []) + received
+        if pending and not owner.inventory.transaction(add=pending):
+            self.undelivered[owner] = pending
@@ -0,0 +1,324 @@
+import math
+from typing import Dict, List, Optional, Tuple
+
+from auto import Assembler, Constructor
+from registry import Block, DropRateEnum, Item, Recipe, Tool
+
+# Production planner: how many machines of which type are needed to sustain a
+# production rate. Recipes and miners become columns of a sparse linear system
+# (item -> net items per minute of one machine). Tree-shaped chains are solved
+# by back-substitution, everything else with a small simplex. Rates are always
+# per minute.
+
+# Machines that run recipes, smallest first
+recipeMachines = [("constructor", Constructor.inputSlots), ("assembler", Assembler.inputSlots)]
+
+EPS = 1e-9
+
+# Smallest machine with enough input slots for the recipe
+def machineFor(recipe: Recipe) -> Optional[str]:
+    for machineType, slots in recipeMachines:
+        if len(recipe.inputs) <= slots:
+            return machineType
+    return None
+
+# Expected drops per mined block, following the drop loop of Player.mine
+def expectedDrops(block: Block) -> float:
+    drops = block.dropRates
+    _min = drops.getRateFor(DropRateEnum.MIN)
+    _max = drops.getRateFor(DropRateEnum.MAX)
+    rate = drops.getRateFor(DropRateEnum.RATE)
+    return _min + sum(rate ** k for k in range(1, _max - _min + 1))
+
+class Column:
+    def __init__(self, machineType: str, source, flows: Dict[Item, float]):
+        self.machineType = machineType
+        self.source = source  # Recipe or Block
+        self.flows = flows  # Item -> net items per minute of one machine
+
+    def __repr__(self):
+        return f"<Column: {self.machineType} {self.source.ID}>"
+
+class Plan:
+    def __init__(self, targets: Dict[Item, float], mode: str, machines: List[Tuple[Column, float]]):
+        self.targets = targets
+        self.mode = mode
+        self.machines = machines  # (column, machine count), only used columns
+
+        # Item -> [produced, consumed] per minute
+        self.flows: Dict[Item, List[float]] = {}
+        for column, count in machines:
+            for item, rate in column.flows.items():
+                flow = self.flows.setdefault(item, [0.0, 0.0])
+                if rate > 0:
+                    flow[0] += rate * count
+                else:
+                    flow[1] -= rate * count
+
+    def __repr__(self):
+        return f"<Plan: {self.mode} {len(self.machines)} machine types, {self.totalMachines():.2f} machines>"
+
+    def totalMachines(self) -> float:
+        return sum(count for _, count in self.machines)
+
+    # Whole machines to build, every fractional machine rounds up
+    def buildCounts(self) -> Dict[Tuple[str, str], int]:
+        return {(column.machineType, column.source.ID): math.ceil(count - EPS) for column, count in self.machines}
+
+    # Share of each item's consumption that goes to the given machine
+    def ratios(self, item: Item) -> Dict[Tuple[str, str], float]:
+        consumed = self.flows.get(item, [0.0, 0.0])[1]
+        if consumed <= EPS:
+            return {}
+        return {
+            (column.machineType, column.source.ID): -column.flows[item] * count / consumed
+            for column, count in self.machines
+            if column.flows.get(item, 0) < 0
+        }
+
+    def surplus(self, item: Item) -> float:
+        produced, consumed = self.flows.get(item, [0.0, 0.0])
+        return produced - consumed - self.targets.get(item, 0.0)
+
+class Planner:
+    def __init__(self, tool: Optional[Tool] = None, recipes: Optional[List[Recipe]] = None, blocks: Optional[List[Block]] = None):
+        # Miners use the given tool (speed and mining level), without one they mine at base speed
+        self.tool = tool
+        self.columns: List[Column] = []
+        # Item -> columns that produce it
+        self.producers: Dict[Item, List[Column]] = {}
+
+        for recipe in recipes if recipes is not None else Recipe.all():
+            machineType = machineFor(recipe)
+            if machineType is None or recipe.time <= 0:
+                continue
+            cycles = 60 / recipe.time
+            flows: Dict[Item, float] = {}
+            for item, qty in recipe.inputs:
+                flows[item] = flows.get(item, 0) - qty * cycles
+            for item, qty in recipe.outputs:
+                flows[item] = flows.get(item, 0) + qty * cycles
+            self.addColumn(Column(machineType, recipe, flows))
+
+        timeFac = tool.timeFac if tool and tool.timeFac > 0 else 1.0
+        for block in blocks if blocks is not None else Block.all():
+            if not block.dropItem or block.miningTime <= 0:
+                continue
+            if tool and tool.miningLevel != -1 and tool.miningLevel < block.miningLevel:
+                continue
+            blocksPerMinute = 60 * timeFac / block.miningTime
+            self.addColumn(Column("miner", block, {block.dropItem: expectedDrops(block) * blocksPerMinute}))
+
+    def addColumn(self, column: Column):
+        self.columns.append(column)
+        for item, rate in column.flows.items():
+            if rate > 0:
+                self.producers.setdefault(item, []).append(column)
+
+    # Columns and items that can take part in producing the targets
+    def relevant(self, targets: Dict[Item, float]) -> Tuple[List[Column], List[Item]]:
+        columns: List[Column] = []
+        seen = set()
+        items = list(targets)
+        known = set(items)
+        while items:
+            item = items.pop()
+            for column in self.producers.get(item, []):
+                if id(column) in seen:
+                    continue
+                seen.add(id(column))
+                columns.append(column)
+                for other in column.flows:
+                    if other not in known:
+                        known.add(other)
+                        items.append(other)
+        return columns, list(known)
+
+    # mode "balanced": every item is produced exactly as fast as it is consumed,
+    # only the targets leave the factory.
+    # mode "min-machines": the fewest machines that produce at least the targets,
+    # surplus of any item is allowed.
+    def plan(self, targets: Dict[Item, float], mode: str = "balanced") -> Plan:
+        if mode not in ("balanced", "min-machines"):
+            raise ValueError("Mode must be one of: 'balanced', 'min-machines'")
+
+        columns, items = self.relevant(targets)
+        counts = self.backSubstitute(columns, items, targets) if mode == "balanced" else None
+        if counts is None:
+            sense = "=" if mode == "balanced" else ">="
+            rows = []
+            for item in items:
+                row = {j: column.flows[item] for j, column in enumerate(columns) if item in column.flows}
+                rows.append((row, sense, targets.get(item, 0.0)))
+            counts = solveLP([1.0] * len(columns), rows)
+        if counts is None:
+            names = ", ".join(item.name for item in targets)
+            raise ValueError(f"No {mode} production chain for {names} with the available recipes and miners.")
+
+        return Plan(targets, mode, [(column, count) for column, count in zip(columns, counts) if count > EPS])
+
+    # Balanced counts when every item has at most one producer with a single
+    # output and the chain has no cycles: walk from the targets down to the raw
+    # materials, each item once all of its consumers are known. None otherwise.
+    def backSubstitute(self, columns: List[Column], items: List[Item], targets: Dict[Item, float]) -> Optional[List[float]]:
+        producer: Dict[Item, int] = {}
+        for j, column in enumerate(columns):
+            outputs = [item for item, rate in column.flows.items() if rate > 0]
+            if len(outputs) != 1 or outputs[0] in producer:
+                return None
+            producer[outputs[0]] = j
+
+        consumers = {item: 0 for item in items}
+        for column in columns:
+            for item, rate in column.flows.items():
+                if rate < 0:
+                    consumers[item] += 1
+
+        demand = {item: targets.get(item, 0.0) for item in items}
+        counts = [0.0] * len(columns)
+        ready = [item for item in items if consumers[item] == 0]
+        done = 0
+        while ready:
+            item = ready.pop()
+            done += 1
+            j = producer.get(item)
+            if j is None:
+                if demand[item] > EPS:
+                    return None  # Needed, but nothing makes it
+                continue
+            column = columns[j]
+            counts[j] = demand[item] / column.flows[item]
+            for other, rate in column.flows.items():
+                if rate < 0:
+                    demand[other] -= rate * counts[j]
+                    consumers[other] -= 1
+                    if consumers[other] == 0:
+                        ready.append(other)
+        return counts if done == len(items) else None
+
+# Minimize costs·x subject to rows and x >= 0, where every row is
+# ({column: coefficient}, "=" | ">=" | "<=", rhs). Returns x or None when infeasible.
+# Two-phase simplex on a dense tableau, pivots only touch the non-zeros of the pivot row.
+def solveLP(costs: List[float], rows: List[Tuple[Dict[int, float], str, float]]) -> Optional[List[float]]:
+    n = len(costs)
+    m = len(rows)
+
+    # Normalize to rhs >= 0
+    normalized = []
+    for row, sense, rhs in rows:
+        if rhs < 0:
+            row = {j: -a for j, a in row.items()}
+            sense = {"=": "=", ">=": "<=", "<=": ">="}[sense]
+            rhs = -rhs
+        normalized.append((row, sense, rhs))
+
+    slackCount = sum(1 for _, sense, _ in normalized if sense != "=")
+    artificialStart = n + slackCount
+    width = artificialStart + m + 1  # + right hand side
+
+    tableau = []
+    basis = []
+    slack = n
+    artificial = artificialStart
+    for row, sense, rhs in normalized:
+        line = [0.0] * width
+        for j, a in row.items():
+            line[j] = a
+        if sense == "<=":
+            line[slack] = 1.0
+            basis.append(slack)
+            slack += 1
+        else:
+            if sense == ">=":
+                line[slack] = -1.0
+                slack += 1
+            line[artificial] = 1.0
+            basis.append(artificial)
+            artificial += 1
+        line[-1] = rhs
+        tableau.append(line)
+    usedArtificials = artificial
+
+    # The objective is kept as an extra row of reduced costs, pivoted along with the others
+    def pivot(r: int, c: int, objective: List[float]):
+        line = tableau[r]
+        factor = line[c]
+        nonzero = [k for k in range(width) if line[k] != 0.0]
+        for k in nonzero:
+            line[k] /= factor
+        for other in tableau + [objective]:
+            if other is line:
+                continue
+            f = other[c]
+            if f != 0.0:
+                for k in nonzero:
+                    other[k] -= f * line[k]
+        basis[r] = c
+
+    def reducedCosts(costs: List[float]) -> List[float]:
+        objective = costs + [0.0]
+        for i, c in enumerate(basis):
+            f = objective[c]
+            if f != 0.0:
+                line = tableau[i]
+                for k in range(width):
+                    objective[k] -= f * line[k]
+        return objective
+
+    def optimize(objective: List[float], allowed: int) -> bool:
+        degenerate = False
+        while True:
+            # Dantzig's rule (most negative reduced cost), Bland's rule after a
+            # degenerate step so the simplex can't cycle
+            entering = -1
+            best = -EPS
+            for c in range(allowed):
+                if objective[c] < best:
+                    entering = c
+                    if degenerate:
+                        break
+                    best = objective[c]
+            if entering < 0:
+                return True
+
+            leaving = -1
+            best = math.inf
+            for i in range(m):
+                a = tableau[i][entering]
+                if a > EPS:
+                    ratio = tableau[i][-1] / a
+                    if ratio < best - EPS or (abs(ratio - best) <= EPS and basis[i] < basis[leaving]):
+                        best = ratio
+                        leaving = i
+            if leaving < 0:
+                return False  # Unbounded
+            degenerate = best <= EPS
+            pivot(leaving, entering, objective)
+
+    # Phase 1: drive the artificial variables out
+    phase1 = [0.0] * (width - 1)
+    for c in range(artificialStart, usedArtificials):
+        phase1[c] = 1.0
+    objective = reducedCosts(phase1)
+    optimize(objective, usedArtificials)
+    if -objective[-1] > 1e-6:
+        return None
+
+    # Pivot remaining (zero) artificials out of the basis where possible
+    for i in range(m):
+        if basis[i] >= artificialStart:
+            for c in range(artificialStart):
+                if abs(tableau[i][c]) > EPS and c not in basis:
+                    pivot(i, c, objective)
+                    break
+
+    # Phase 2: the real objective, artificial columns are no longer allowed
+    objective = reducedCosts(list(costs) + [0.0] * (width - 1 - n))
+    if not optimize(objective, artificialStart):
+        return None
+
+    x = [0.0] * n
+    for i, c in enumerate(basis):
+        if c < n:
+            x[c] = tableau[i][-1]
+    return x
@@ -0,0 +1,124 @@
+from typing import Dict, Iterable, List, Set
+
+from auto import Generator, Machine, MachineStatus
+
+# Power network. Machines are joined by power lines; every connected group of
+# machines is one circuit that shares its generators' output. When a circuit
+# needs more than it generates, every machine in it gets the same share
+# (the satisfaction) and its cycles take that much longer, see
+# Machine.cycleTime. Changes to the lines only recount the circuits they touch:
+# joining two circuits merges the smaller into the larger, cutting a line
+# searches the one circuit it was part of for a split.
+
+class Circuit:
+    def __init__(self, members: Iterable[Machine] = ()):
+        self.members: Set[Machine] = set()
+        self.demand = 0.0  # MW needed by the active machines
+        self.supply = 0.0  # MW generated by the active generators
+        self.satisfaction = 1.0
+        for machine in members:
+            self.members.add(machine)
+            machine.circuit = self
+        self.recount()
+
+    def __repr__(self):
+        return f"<Circuit: {len(self.members)} machines, {self.supply:g}/{self.demand:g} MW>"
+
+    @staticmethod
+    def usage(machine: Machine):
+        if machine.status != MachineStatus.ACTIVE:
+            return 0.0, 0.0
+        if isinstance(machine, Generator):
+            return 0.0, machine.powerOutput
+        return machine.powerUsage, 0.0
+
+    def recount(self):
+        self.demand = self.supply = 0.0
+        for machine in self.members:
+            demand, supply = self.usage(machine)
+            self.demand += demand
+            self.supply += supply
+        self.update()
+
+    def update(self):
+        self.satisfaction = 1.0 if self.demand <= 0 else min(1.0, self.supply / self.demand)
+
+    # Take over all machines of another circuit
+    def absorb(self, other: "Circuit"):
+        for machine in other.members:
+            machine.circuit = self
+        self.members |= other.members
+        self.demand += other.demand
+        self.supply += other.supply
+        self.update()
+
+class PowerGrid:
+    def __init__(self):
+        # Machine -> machines it has power lines to
+        self.lines: Dict[Machine, Set[Machine]] = {}
+
+    def circuits(self) -> List[Circuit]:
+        unique = {id(machine.circuit): machine.circuit for machine in self.lines}
+        return list(unique.values())
+
+    def add(self, machine: Machine):
+        if machine not in self.lines:
+            self.lines[machine] = set()
+            Circuit([machine])
+
+    def remove(self, machine: Machine):
+        neighbours = self.lines.pop(machine, set())
+        for other in neighbours:
+            self.lines[other].discard(machine)
+        circuit = machine.circuit
+        machine.circuit = None
+        if circuit is None:
+            return
+        circuit.members.discard(machine)
+        self.split(circuit, neighbours)
+
+    def connect(self, a: Machine, b: Machine):
+        self.add(a)
+        self.add(b)
+        self.lines[a].add(b)
+        self.lines[b].add(a)
+        if a.circuit is not b.circuit:
+            big, small = (a.circuit, b.circuit) if len(a.circuit.members) >= len(b.circuit.members) else (b.circuit, a.circuit)
+            big.absorb(small)
+
+    def disconnect(self, a: Machine, b: Machine):
+        if b not in self.lines.get(a, ()):
+            return
+        self.lines[a].discard(b)
+        self.lines[b].discard(a)
+        self.split(a.circuit, [a, b])
+
+    # After lines of the circuit were cut: every group of machines that is no
+    # longer reachable from the others becomes a circuit of its own
+    def split(self, circuit: Circuit, starts: Iterable[Machine]):
+        remaining = set(circuit.members)
+        groups = []
+        for start in starts:
+            if start not in remaining:
+                continue
+            group = {start}
+            stack = [start]
+            while stack:
+                for other in self.lines[stack.pop()]:
+                    if other not in group:
+                        group.add(other)
+                        stack.append(other)
+            remaining -= group
+            groups.append(group)
+            if not remaining:
+                break
+
+        if len(groups) <= 1:
+            circuit.recount()
+            return
+        # The largest group keeps the circuit, the others get new ones
+        groups.sort(key=len, reverse=True)
+        circuit.members = groups[0]
+        circuit.recount()
+        for group in groups[1:]:
+            Circuit(group)
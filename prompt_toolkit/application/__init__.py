@@ -11,6 +11,7 @@ from .current import (
     set_app,
 )
 from .dummy import DummyApplication
+from .frame_pacer import FramePacer
 from .run_in_terminal import in_terminal, run_in_terminal
 
 __all__ = [
@@ -26,6 +27,8 @@ __all__ = [
     "set_app",
     # Dummy.
     "DummyApplication",
+    # Frame pacing.
+    "FramePacer",
     # Run_in_terminal
     "in_terminal",
     "run_in_terminal",
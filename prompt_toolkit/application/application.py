@@ -18,6 +18,7 @@ from asyncio import (
 )
 from contextlib import ExitStack, contextmanager
 from subprocess import Popen
+from time import perf_counter
 from traceback import format_tb
 from typing import (
     Any,
@@ -72,6 +73,7 @@ from prompt_toolkit.layout.controls import BufferControl, UIControl
 from prompt_toolkit.layout.dummy import create_dummy_layout
 from prompt_toolkit.layout.layout import Layout, walk
 from prompt_toolkit.output import ColorDepth, Output
+from prompt_toolkit.render_profiler import RenderProfiler
 from prompt_toolkit.renderer import Renderer, print_formatted_text
 from prompt_toolkit.search import SearchState
 from prompt_toolkit.styles import (
@@ -87,6 +89,7 @@ from prompt_toolkit.styles import (
 from prompt_toolkit.utils import Event, in_main_thread
 
 from .current import get_app_session, set_app
+from .frame_pacer import FramePacer
 from .run_in_terminal import in_terminal, run_in_terminal
 
 __all__ = [
@@ -116,6 +119,8 @@ class Application(Generic[_AppResult]):
     :param color_depth: Any :class:`~.ColorDepth` value, a callable that
         returns a :class:`~.ColorDepth` or `None` for default.
     :param erase_when_done: (bool) Clear the application output when it finishes.
+    :param array_screen: (bool) Render into an :class:`~.ArrayScreen`, rows
+        preallocated for the terminal size, instead of a :class:`~.Screen`.
     :param reverse_vi_search_direction: Normally, in Vi mode, a '/' searches
         forward and a '?' searches backward. In Readline mode, this is usually
         reversed.
@@ -130,10 +135,17 @@ class Application(Generic[_AppResult]):
         `invalidate` call has not been executed yet, nothing will happen in any
         case.
 
+        Invalidations caused by key presses are never delayed.
+
     :param max_render_postpone_time: When there is high CPU (a lot of other
         scheduled calls), postpone the rendering max x seconds.  '0' means:
         don't postpone. '.5' means: try to draw at least twice a second.
 
+    :param frame_pacer: :class:`~prompt_toolkit.application.FramePacer` that
+        adapts the interval between redraws to the measured cost of rendering
+        and to how long key presses wait before they are drawn. When given,
+        it takes the place of `min_redraw_interval`.
+
     :param refresh_interval: Automatically invalidate the UI every so many
         seconds. When `None` (the default), only invalidate when `invalidate`
         has been called.
@@ -199,9 +211,11 @@ class Application(Generic[_AppResult]):
         paste_mode: FilterOrBool = False,
         editing_mode: EditingMode = EditingMode.EMACS,
         erase_when_done: bool = False,
+        array_screen: bool = False,
         reverse_vi_search_direction: FilterOrBool = False,
         min_redraw_interval: float | int | None = None,
         max_render_postpone_time: float | int | None = 0.01,
+        frame_pacer: FramePacer | None = None,
         refresh_interval: float | None = None,
         terminal_size_polling_interval: float | None = 0.5,
         cursor: AnyCursorShapeConfig = None,
@@ -251,6 +265,7 @@ class Application(Generic[_AppResult]):
         self.enable_page_navigation_bindings = enable_page_navigation_bindings
         self.min_redraw_interval = min_redraw_interval
         self.max_render_postpone_time = max_render_postpone_time
+        self.frame_pacer = frame_pacer
         self.refresh_interval = refresh_interval
         self.terminal_size_polling_interval = terminal_size_polling_interval
 
@@ -310,6 +325,7 @@ class Application(Generic[_AppResult]):
             full_screen=full_screen,
             mouse_support=mouse_support,
             cpr_not_supported_callback=self.cpr_not_supported_callback,
+            array_screen=array_screen,
         )
 
         #: Render counter. This one is increased every time the UI is rendered.
@@ -317,13 +333,21 @@ class Application(Generic[_AppResult]):
         #: rendering.
         self.render_counter = 0
 
+        #: :class:`~prompt_toolkit.render_profiler.RenderProfiler` that records
+        #: the duration of every phase of a frame. `None` to disable.
+        self.render_profiler: RenderProfiler | None = None
+
         # Invalidate flag. When 'True', a repaint has been scheduled.
         self._invalidated = False
         self._invalidate_events: list[
             Event[object]
         ] = []  # Collection of 'invalidate' Event objects.
         self._last_redraw_time = 0.0  # Unix timestamp of last redraw. Used when
-        # `min_redraw_interval` is given.
+        # `min_redraw_interval` or `frame_pacer` is given.
+        self._redraw_delayed = False  # The scheduled redraw waits for the interval.
+        self._processing_input = False  # Key presses are being processed.
+        self._input_received: float | None = None  # When the keys that were not
+        # drawn yet arrived. (`perf_counter` value.)
 
         #: The `InputProcessor` instance.
         self.key_processor = KeyProcessor(_CombinedRegistry(self))
@@ -455,10 +479,15 @@ class Application(Generic[_AppResult]):
         if self.loop is None or self.loop.is_closed():
             return
 
+        # Key presses are drawn right away, without waiting for the redraw
+        # interval. (Background invalidations should never make typing lag.)
+        urgent = self._processing_input
+
         # Never schedule a second redraw, when a previous one has not yet been
         # executed. (This should protect against other threads calling
-        # 'invalidate' many times, resulting in 100% CPU.)
-        if self._invalidated:
+        # 'invalidate' many times, resulting in 100% CPU.) Unless a key press
+        # has to overtake a redraw that waits for the interval.
+        if self._invalidated and not (urgent and self._redraw_delayed):
             return
         else:
             self._invalidated = True
@@ -467,22 +496,35 @@ class Application(Generic[_AppResult]):
         self.loop.call_soon_threadsafe(self.on_invalidate.fire)
 
         def redraw() -> None:
+            # Skip if an earlier redraw already took care of this.
+            if not self._invalidated:
+                return
             self._invalidated = False
+            self._redraw_delayed = False
             self._redraw()
 
         def schedule_redraw() -> None:
+            # (Key presses don't wait for other scheduled work either.)
             call_soon_threadsafe(
-                redraw, max_postpone_time=self.max_render_postpone_time, loop=self.loop
+                redraw,
+                max_postpone_time=None if urgent else self.max_render_postpone_time,
+                loop=self.loop,
             )
 
-        if self.min_redraw_interval:
+        if self.frame_pacer is not None:
+            interval = self.frame_pacer.interval
+        else:
+            interval = self.min_redraw_interval or 0
+
+        if interval and not urgent:
             # When a minimum redraw interval is set, wait minimum this amount
             # of time between redraws.
             diff = time.time() - self._last_redraw_time
-            if diff < self.min_redraw_interval:
+            if diff < interval:
+                self._redraw_delayed = True
 
                 async def redraw_in_future() -> None:
-                    await sleep(cast(float, self.min_redraw_interval) - diff)
+                    await sleep(interval - diff)
                     schedule_redraw()
 
                 self.loop.call_soon_threadsafe(
@@ -509,13 +551,21 @@ class Application(Generic[_AppResult]):
         def run_in_context() -> None:
             # Only draw when no sub application was started.
             if self._is_running and not self._running_in_terminal:
-                if self.min_redraw_interval:
-                    self._last_redraw_time = time.time()
+                self._last_redraw_time = time.time()
+                start = perf_counter()
 
                 # Render
                 self.render_counter += 1
+
+                profiler = self.render_profiler
+                if profiler is not None:
+                    profiler.begin_frame(self.render_counter)
+
                 self.before_render.fire()
 
+                if profiler is not None:
+                    profiler.lap("before_render")
+
                 if render_as_done:
                     if self.erase_when_done:
                         self.renderer.erase()
@@ -532,6 +582,18 @@ class Application(Generic[_AppResult]):
 
                 self._update_invalidate_events()
 
+                if profiler is not None:
+                    profiler.lap("after_render")
+                    profiler.end_frame()
+
+                pacer = self.frame_pacer
+                if pacer is not None:
+                    end = perf_counter()
+                    pacer.record_render(end - start)
+                    if self._input_received is not None:
+                        pacer.record_input_latency(end - self._input_received)
+                self._input_received = None
+
         # NOTE: We want to make sure this Application is the active one. The
         #       invalidate function is often called from a context where this
         #       application is not the active one. (Like the
@@ -587,6 +649,20 @@ class Application(Generic[_AppResult]):
         """
         self.invalidate()
 
+    def _process_input_keys(self) -> None:
+        """
+        Process the keys that were received from the input. Invalidations in
+        here are caused by the user, and get priority over background ones.
+        """
+        if self._input_received is None:
+            self._input_received = perf_counter()
+
+        self._processing_input = True
+        try:
+            self.key_processor.process_keys()
+        finally:
+            self._processing_input = False
+
     def _on_resize(self) -> None:
         """
         When the window size changes, we erase the current output and request
@@ -595,6 +671,7 @@ class Application(Generic[_AppResult]):
         """
         # Erase, request position (when cursor is at the start position)
         # and redraw again. -- The order is important.
+        self.output.invalidate_size()
         self.renderer.erase(leave_alternate_screen=False)
         self._request_absolute_cursor_position()
         self._redraw()
@@ -672,6 +749,9 @@ class Application(Generic[_AppResult]):
             self.reset()
             self._pre_run(pre_run)
 
+            # The terminal could have been resized while we were not running.
+            self.output.invalidate_size()
+
             # Feed type ahead input first.
             self.key_processor.feed_multiple(get_typeahead(self.input))
             self.key_processor.process_keys()
@@ -691,7 +771,7 @@ class Application(Generic[_AppResult]):
 
                 # Feed to key processor.
                 self.key_processor.feed_multiple(keys)
-                self.key_processor.process_keys()
+                self._process_input_keys()
 
                 # Quit when the input stream was closed.
                 if self.input.closed:
@@ -725,7 +805,7 @@ class Application(Generic[_AppResult]):
                     # Get keys, and feed to key processor.
                     keys = self.input.flush_keys()
                     self.key_processor.feed_multiple(keys)
-                    self.key_processor.process_keys()
+                    self._process_input_keys()
 
                     if self.input.closed:
                         f.set_exception(EOFError)
@@ -871,6 +951,7 @@ class Application(Generic[_AppResult]):
             # paint was scheduled using `call_soon_threadsafe` with
             # `max_postpone_time`.
             self._invalidated = False
+            self._redraw_delayed = False
 
             loop = stack.enter_context(set_loop())
 
@@ -1224,6 +1305,7 @@ class Application(Generic[_AppResult]):
 
         while True:
             await asyncio.sleep(interval)
+            self.output.invalidate_size()
             new_size = self.output.get_size()
 
             if size is not None and new_size != size:
@@ -1433,7 +1515,7 @@ class _CombinedRegistry(KeyBindingsBase):
         self.app = app
         self._cache: SimpleCache[
             tuple[Window, frozenset[UIControl]], KeyBindingsBase
-        ] = SimpleCache()
+        ] = SimpleCache(name="_CombinedRegistry._cache")
 
     @property
     def _version(self) -> Hashable:
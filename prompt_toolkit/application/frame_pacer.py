@@ -0,0 +1,104 @@
+"""
+Adaptive spacing of redraws.
+
+When something invalidates the UI very often (progress bars, a stream of
+`patch_stdout` output, ...), redrawing for every invalidation keeps the CPU
+busy rendering, while a fixed `min_redraw_interval` is either too short for a
+complex layout or makes a simple one lag. A :class:`.FramePacer` measures how
+long rendering takes and how long keystrokes wait for their echo, and derives
+the interval between redraws from that.
+"""
+
+from __future__ import annotations
+
+import time
+
+__all__ = [
+    "FramePacer",
+]
+
+
+class FramePacer:
+    """
+    Chooses the minimum interval between two redraws that were caused by
+    background invalidations. (Redraws caused by key presses are never
+    delayed.) Assign one to :attr:`.Application.frame_pacer`.
+
+    :param max_load: Fraction of the time that may be spent rendering.
+        Background redraws are spaced so that rendering takes at most this
+        much of the time.
+    :param min_interval: Lower bound for the interval in seconds.
+    :param max_interval: Upper bound for the interval in seconds. (The UI
+        still updates at least this often under load.)
+    :param latency_target: When key presses take longer than this (in
+        seconds) to be drawn, background redraws are spaced further apart
+        while the user is typing.
+    :param smoothing: Weight of a new measurement in the moving averages.
+    """
+
+    #: Seconds after the last key press during which the user counts as typing.
+    typing_timeout = 1.0
+
+    def __init__(
+        self,
+        max_load: float = 0.5,
+        min_interval: float = 0.0,
+        max_interval: float = 0.25,
+        latency_target: float = 0.02,
+        smoothing: float = 0.2,
+    ) -> None:
+        assert 0 < max_load <= 1
+        assert 0 <= min_interval <= max_interval
+        assert 0 < smoothing <= 1
+
+        self.max_load = max_load
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.latency_target = latency_target
+        self.smoothing = smoothing
+
+        #: Moving average of the duration of a redraw in seconds.
+        self.render_time = 0.0
+
+        #: Moving average of the time between receiving a key press and the end
+        #: of the redraw that shows it, in seconds.
+        self.input_latency = 0.0
+
+        self._last_input_time: float | None = None
+
+    def _average(self, average: float, value: float) -> float:
+        return average + (value - average) * self.smoothing
+
+    def record_render(self, seconds: float) -> None:
+        "Called after every redraw with its duration."
+        self.render_time = self._average(self.render_time, seconds)
+
+    def record_input_latency(self, seconds: float) -> None:
+        "Called after a redraw that shows a key press, with the time it took."
+        self.input_latency = self._average(self.input_latency, seconds)
+        self._last_input_time = time.monotonic()
+
+    @property
+    def typing(self) -> bool:
+        "True when a key press was drawn in the last `typing_timeout` seconds."
+        last = self._last_input_time
+        return last is not None and time.monotonic() - last < self.typing_timeout
+
+    @property
+    def interval(self) -> float:
+        "Minimum number of seconds between the start of two background redraws."
+        # Spend `max_load` of the time rendering, the rest in between.
+        interval = self.render_time / self.max_load
+
+        # Keystrokes that take too long to appear are competing with background
+        # redraws: back off in proportion.
+        if self.input_latency > self.latency_target and self.typing:
+            interval *= self.input_latency / self.latency_target
+
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def reset(self) -> None:
+        "Forget all measurements."
+        self.render_time = 0.0
+        self.input_latency = 0.0
+        self._last_input_time = None
@@ -280,7 +280,7 @@ class Buffer:
         # Document cache. (Avoid creating new Document instances.)
         self._document_cache: FastDictCache[
             tuple[str, int, SelectionState | None], Document
-        ] = FastDictCache(Document, size=10)
+        ] = FastDictCache(Document, size=10, name="Buffer._document_cache")
 
         # Create completer / auto suggestion / validation coroutines.
         self._async_suggester = self._create_auto_suggest_coroutine()
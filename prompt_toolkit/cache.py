@@ -1,33 +1,233 @@
 from __future__ import annotations
 
-from collections import deque
+import sys
+from collections import OrderedDict, deque
 from functools import wraps
-from typing import Any, Callable, Dict, Generic, Hashable, Tuple, TypeVar, cast
+from itertools import count
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    NamedTuple,
+    Tuple,
+    TypeVar,
+    cast,
+)
+from weakref import WeakValueDictionary
 
 __all__ = [
     "SimpleCache",
     "FastDictCache",
     "memoized",
+    "CacheStats",
+    "CacheInfo",
+    "register_cache",
+    "cache_info",
+    "count_cache_hits",
+    "reset_cache_stats",
 ]
 
 _T = TypeVar("_T", bound=Hashable)
 _U = TypeVar("_U")
 
 
+class CacheStats:
+    """
+    Counters of one cache, see :func:`.register_cache`.
+
+    Misses and evictions are always counted. Hits of caches that are
+    dictionaries (lookups that never leave C code) are only counted while
+    :func:`.count_cache_hits` is enabled.
+    """
+
+    __slots__ = ("name", "maxsize", "hits", "misses", "evictions")
+
+    def __init__(self, name: str, maxsize: int | None = None) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def reset(self) -> None:
+        self.hits = self.misses = self.evictions = 0
+
+
+class CacheInfo(NamedTuple):
+    """
+    Numbers of all registered caches with the same name, as returned by
+    :func:`.cache_info`.
+    """
+
+    name: str
+    instances: int
+    size: int
+    maxsize: int | None  # Per instance. `None` for unbounded caches.
+    hits: int
+    misses: int
+    evictions: int
+
+    @property
+    def hit_rate(self) -> float | None:
+        "Hits per lookup, `None` before the first lookup."
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else None
+
+
+# Every cache that registered itself. Weak, so that caches of for instance
+# a `Window` go away together with the window.
+_caches: WeakValueDictionary[int, Any] = WeakValueDictionary()
+_cache_ids = count()
+
+# Subclasses of dictionary caches that count their hits, by original class.
+_hit_counting_classes: dict[type, type] = {}
+_counting_hits = False
+
+
+def register_cache(cache: Any, name: str, maxsize: int | None = None) -> CacheStats:
+    """
+    Add a cache to the process wide registry of caches, and return the
+    :class:`.CacheStats` that it should update.
+
+    A cache should have a `stats` attribute with these stats, and `__len__`
+    or a `cache_size()` method, which returns the number of entries.
+
+    :param name: Name under which the numbers are reported. Caches with the
+        same name (like the caches of all windows) are reported together.
+    :param maxsize: Maximum number of entries, `None` when unbounded.
+    """
+    stats = CacheStats(name, maxsize)
+    _caches[next(_cache_ids)] = cache
+
+    if _counting_hits and isinstance(cache, dict):
+        cache.__class__ = _hit_counting_class(type(cache))
+    return stats
+
+
+def cache_info() -> list[CacheInfo]:
+    """
+    Size, hits, misses and evictions of all registered caches, summed per
+    cache name, sorted by name.
+    """
+    totals: dict[str, list[Any]] = {}
+
+    for cache in list(_caches.values()):
+        stats: CacheStats = cache.stats
+        size = cache.cache_size() if hasattr(cache, "cache_size") else len(cache)
+        total = totals.get(stats.name)
+        if total is None:
+            totals[stats.name] = [
+                1,
+                size,
+                stats.maxsize,
+                stats.hits,
+                stats.misses,
+                stats.evictions,
+            ]
+        else:
+            total[0] += 1
+            total[1] += size
+            total[3] += stats.hits
+            total[4] += stats.misses
+            total[5] += stats.evictions
+
+    return [CacheInfo(name, *total) for name, total in sorted(totals.items())]
+
+
+def reset_cache_stats() -> None:
+    "Set the counters of all registered caches to zero."
+    for cache in list(_caches.values()):
+        cache.stats.reset()
+
+
+def count_cache_hits(enable: bool = True) -> None:
+    """
+    Start (or stop) counting the hits of caches that are dictionaries.
+
+    Lookups in these caches are plain dictionary lookups, which is why they
+    are fast, and why their hits can't be counted for free. While enabled,
+    every lookup goes through a Python method instead.
+    """
+    global _counting_hits
+    _counting_hits = enable
+
+    for cache in list(_caches.values()):
+        if not isinstance(cache, dict):
+            continue
+        cls = type(cache)
+        if enable and cls not in _hit_counting_classes.values():
+            cache.__class__ = _hit_counting_class(cls)
+        elif not enable and cls in _hit_counting_classes.values():
+            cache.__class__ = cls.__bases__[0]
+
+
+def _hit_counting_class(cls: type) -> type:
+    """
+    Subclass of a dictionary cache class that counts the hits. (Instances are
+    switched to this class and back by changing their `__class__`.)
+    """
+    try:
+        return _hit_counting_classes[cls]
+    except KeyError:
+
+        def __getitem__(self: Any, key: Any) -> Any:
+            if dict.__contains__(self, key):
+                self.stats.hits += 1
+            return dict.__getitem__(self, key)
+
+        counting = type(cls.__name__, (cls,), {"__getitem__": __getitem__})
+        _hit_counting_classes[cls] = counting
+        return counting
+
+
+def _getsizeof(key: Any, value: Any) -> int:
+    """
+    Approximate number of bytes of a cache entry: the shallow sizes of the key
+    and the value. (Objects that they refer to are usually shared.)
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
 class SimpleCache(Generic[_T, _U]):
     """
     Very simple cache that discards the oldest item when the cache size is
     exceeded.
 
     :param maxsize: Maximum size of the cache. (Don't make it too big.)
+    :param name: Name in the cache registry, see :func:`.cache_info`.
+    :param policy: "fifo" to discard the item that was added first, "lru" to
+        discard the item that was used least recently.
+    :param maxbytes: When given, also discard items when the approximate size
+        of the cached keys and values exceeds this number of bytes.
+    :param getsizeof: Callable that returns the approximate size of a
+        `(key, value)` pair in bytes.
     """
 
-    def __init__(self, maxsize: int = 8) -> None:
+    def __init__(
+        self,
+        maxsize: int = 8,
+        name: str = "SimpleCache",
+        policy: str = "fifo",
+        maxbytes: int | None = None,
+        getsizeof: Callable[[Any, Any], int] = _getsizeof,
+    ) -> None:
         assert maxsize > 0
+        assert policy in ("fifo", "lru")
 
-        self._data: dict[_T, _U] = {}
-        self._keys: deque[_T] = deque()
+        # Ordered from the first item to discard to the last.
+        self._data: OrderedDict[_T, _U] = OrderedDict()
+        self._sizes: dict[_T, int] = {}  # Only with `maxbytes`.
         self.maxsize: int = maxsize
+        self.policy = policy
+        self.maxbytes = maxbytes
+        self.getsizeof = getsizeof
+        self.nbytes = 0
+        self.stats = register_cache(self, name, maxsize)
+
+    def __len__(self) -> int:
+        return len(self._data)
 
     def get(self, key: _T, getter_func: Callable[[], _U]) -> _U:
         """
@@ -37,42 +237,77 @@ class SimpleCache(Generic[_T, _U]):
         """
         # Look in cache first.
         try:
-            return self._data[key]
+            value = self._data[key]
         except KeyError:
-            # Not found? Get it.
-            value = getter_func()
-            self._data[key] = value
-            self._keys.append(key)
+            pass
+        else:
+            self.stats.hits += 1
+            if self.policy == "lru":
+                self._data.move_to_end(key)
+            return value
 
-            # Remove the oldest key when the size is exceeded.
-            if len(self._data) > self.maxsize:
-                key_to_remove = self._keys.popleft()
-                if key_to_remove in self._data:
-                    del self._data[key_to_remove]
+        # Not found? Get it.
+        self.stats.misses += 1
+        value = getter_func()
+        self._data[key] = value
 
-            return value
+        if self.maxbytes is not None:
+            nbytes = self.getsizeof(key, value)
+            self.nbytes += nbytes - self._sizes.get(key, 0)
+            self._sizes[key] = nbytes
+
+        # Remove the oldest keys when the size is exceeded. (Keep at least the
+        # new one.)
+        while len(self._data) > 1 and (
+            len(self._data) > self.maxsize
+            or (self.maxbytes is not None and self.nbytes > self.maxbytes)
+        ):
+            key_to_remove, _ = self._data.popitem(last=False)
+            if self.maxbytes is not None:
+                self.nbytes -= self._sizes.pop(key_to_remove)
+            self.stats.evictions += 1
+
+        return value
 
     def clear(self) -> None:
         "Clear cache."
-        self._data = {}
-        self._keys = deque()
+        self._data = OrderedDict()
+        self._sizes = {}
+        self.nbytes = 0
 
 
 _K = TypeVar("_K", bound=Tuple[Hashable, ...])
 _V = TypeVar("_V")
 
+_NOT_FOUND = object()
+
 
 class FastDictCache(Dict[_K, _V]):
     """
     Fast, lightweight cache which keeps at most `size` items.
-    It will discard the oldest items in the cache first.
+    By default, it will discard the oldest items in the cache first.
 
     The cache is a dictionary, which doesn't keep track of access counts.
     It is perfect to cache little immutable objects which are not expensive to
     create, but where a dictionary lookup is still much faster than an object
     instantiation.
 
+    With `policy="lru"`, eviction is an approximation of least recently used,
+    which keeps lookups plain dictionary lookups: the items live in two
+    generations of at most `size / 2` items each. New items go into the
+    current generation (the dictionary itself). When it's full, it becomes
+    the old generation, and the previous old generation is discarded. A
+    lookup of an item in the old generation moves it back into the current
+    one. So frequently used items are never discarded, and items that were
+    only used once are discarded after two generations.
+
     :param get_value: Callable that's called in case of a missing key.
+    :param name: Name in the cache registry, see :func:`.cache_info`.
+    :param policy: "fifo" or "lru", see above.
+    :param maxbytes: When given, also discard items when the approximate size
+        of the cached keys and values exceeds this number of bytes.
+    :param getsizeof: Callable that returns the approximate size of a
+        `(key, value)` pair in bytes.
     """
 
     # NOTE: This cache is used to cache `prompt_toolkit.layout.screen.Char` and
@@ -83,25 +318,136 @@ class FastDictCache(Dict[_K, _V]):
     #       SimpleCache is still required for cases where the cache key is not
     #       the same as the arguments given to the function that creates the
     #       value.)
-    def __init__(self, get_value: Callable[..., _V], size: int = 1000000) -> None:
+    def __init__(
+        self,
+        get_value: Callable[..., _V],
+        size: int = 1000000,
+        name: str = "FastDictCache",
+        policy: str = "fifo",
+        maxbytes: int | None = None,
+        getsizeof: Callable[[Any, Any], int] = _getsizeof,
+    ) -> None:
         assert size > 0
+        assert policy in ("fifo", "lru")
 
-        self._keys: deque[_K] = deque()
         self.get_value = get_value
         self.size = size
+        self.policy = policy
+        self.maxbytes = maxbytes
+        self.getsizeof = getsizeof
+        self.nbytes = 0  # Approximate size of the items in this dictionary.
+
+        # FIFO: keys in the order in which they were added, and for keys that
+        # were deleted by hand, how many of their entries in there are stale.
+        self._keys: deque[_K] = deque()
+        self._stale: dict[_K, int] = {}
+
+        # Sizes of the items in this dictionary (with LRU: of the current
+        # generation). Only with `maxbytes`.
+        self._sizes: dict[_K, int] = {}
+
+        # LRU: the old generation.
+        self._old: dict[_K, _V] = {}
+
+        self.stats = register_cache(self, name, size)
+
+    def cache_size(self) -> int:
+        "Number of cached items, including the old generation."
+        return len(self) + len(self._old)
+
+    def __contains__(self, key: object) -> bool:
+        return dict.__contains__(self, key) or key in self._old
+
+    def __delitem__(self, key: _K) -> None:
+        if self.policy == "lru" and not dict.__contains__(self, key):
+            del self._old[key]
+            return
+
+        dict.__delitem__(self, key)
+        self.nbytes -= self._sizes.pop(key, 0)
+        if self.policy == "fifo":
+            self._stale[key] = self._stale.get(key, 0) + 1
 
     def __missing__(self, key: _K) -> _V:
-        # Remove the oldest key when the size is exceeded.
-        if len(self) > self.size:
-            key_to_remove = self._keys.popleft()
-            if key_to_remove in self:
-                del self[key_to_remove]
+        if self.policy == "lru":
+            return self._missing_lru(key)
 
+        self.stats.misses += 1
         result = self.get_value(*key)
         self[key] = result
         self._keys.append(key)
+
+        if self.maxbytes is not None:
+            nbytes = self.getsizeof(key, result)
+            self.nbytes += nbytes
+            self._sizes[key] = nbytes
+
+        # Remove the oldest keys when the size is exceeded.
+        keys = self._keys
+        stale = self._stale
+        while len(self) > self.size or (
+            self.maxbytes is not None and self.nbytes > self.maxbytes and len(self) > 1
+        ):
+            key_to_remove = keys.popleft()
+            if key_to_remove in stale:
+                stale[key_to_remove] -= 1
+                if not stale[key_to_remove]:
+                    del stale[key_to_remove]
+                continue
+
+            dict.__delitem__(self, key_to_remove)
+            self.stats.evictions += 1
+            if self.maxbytes is not None:
+                self.nbytes -= self._sizes.pop(key_to_remove)
+
+        # Don't let the stale keys pile up: rebuild the deque from the
+        # dictionary, which is in insertion order too.
+        if len(keys) > 2 * len(self) + 64:
+            self._keys = deque(self)
+            self._stale = {}
+
         return result
 
+    def _missing_lru(self, key: _K) -> _V:
+        result = self._old.pop(key, _NOT_FOUND)
+        if result is _NOT_FOUND:
+            self.stats.misses += 1
+            result = self.get_value(*key)
+        else:
+            # Found in the old generation: move it back into the current one.
+            self.stats.hits += 1
+
+        nbytes = 0
+        if self.maxbytes is not None:
+            nbytes = self.getsizeof(key, result)
+
+        # Start a new generation when the current one is full.
+        if len(self) >= max(1, self.size // 2) or (
+            self.maxbytes is not None
+            and self.nbytes + nbytes > self.maxbytes // 2
+            and len(self) > 0
+        ):
+            self.stats.evictions += len(self._old)
+            self._old = dict(self)
+            dict.clear(self)
+            self._sizes = {}
+            self.nbytes = 0
+
+        self[key] = result
+        if self.maxbytes is not None:
+            self._sizes[key] = nbytes
+            self.nbytes += nbytes
+        return result
+
+    def clear(self) -> None:
+        "Clear cache."
+        dict.clear(self)
+        self._keys = deque()
+        self._stale = {}
+        self._sizes = {}
+        self._old = {}
+        self.nbytes = 0
+
 
 _F = TypeVar("_F", bound=Callable[..., object])
 
@@ -112,7 +458,9 @@ def memoized(maxsize: int = 1024) -> Callable[[_F], _F]:
     """
 
     def decorator(obj: _F) -> _F:
-        cache: SimpleCache[Hashable, Any] = SimpleCache(maxsize=maxsize)
+        cache: SimpleCache[Hashable, Any] = SimpleCache(
+            maxsize=maxsize, name=f"memoized({obj.__module__}.{obj.__qualname__})"
+        )
 
         @wraps(obj)
         def new_callable(*a: Any, **kw: Any) -> Any:
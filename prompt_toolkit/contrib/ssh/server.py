@@ -111,6 +111,9 @@ class PromptToolkitSSHSession(asyncssh.SSHServerSession):  # type: ignore
     def terminal_size_changed(
         self, width: int, height: int, pixwidth: object, pixheight: object
     ) -> None:
+        if self._output is not None:
+            self._output.invalidate_size()
+
         # Send resize event to the current application.
         if self.app_session and self.app_session.app:
             self.app_session.app._on_resize()
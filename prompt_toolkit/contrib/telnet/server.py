@@ -163,6 +163,8 @@ class TelnetConnection:
         def size_received(rows: int, columns: int) -> None:
             """TelnetProtocolParser 'size_received' callback"""
             self.size = Size(rows=rows, columns=columns)
+            if self.vt100_output is not None:
+                self.vt100_output.invalidate_size()
             if self.vt100_output is not None and self.context:
                 self.context.run(lambda: get_app()._on_resize())
 
@@ -278,6 +280,9 @@ class TelnetServer:
         async def main():
             server = TelnetServer(interact=interact, port=2323)
             await server.run()
+
+    :param backlog: Size of the queue of not yet accepted connections. Raise
+        it when many clients connect at the same time.
     """
 
     def __init__(
@@ -290,6 +295,7 @@ class TelnetServer:
         encoding: str = "utf-8",
         style: BaseStyle | None = None,
         enable_cpr: bool = True,
+        backlog: int = 4,
     ) -> None:
         self.host = host
         self.port = port
@@ -297,6 +303,7 @@ class TelnetServer:
         self.encoding = encoding
         self.style = style
         self.enable_cpr = enable_cpr
+        self.backlog = backlog
 
         self._run_task: asyncio.Task[None] | None = None
         self._application_tasks: list[asyncio.Task[None]] = []
@@ -304,13 +311,13 @@ class TelnetServer:
         self.connections: set[TelnetConnection] = set()
 
     @classmethod
-    def _create_socket(cls, host: str, port: int) -> socket.socket:
+    def _create_socket(cls, host: str, port: int, backlog: int = 4) -> socket.socket:
         # Create and bind socket
         s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
         s.bind((host, port))
 
-        s.listen(4)
+        s.listen(backlog)
         return s
 
     async def run(self, ready_cb: Callable[[], None] | None = None) -> None:
@@ -320,7 +327,7 @@ class TelnetServer:
         :param ready_cb: Callback that will be called at the point that we're
             actually listening.
         """
-        socket = self._create_socket(self.host, self.port)
+        socket = self._create_socket(self.host, self.port, self.backlog)
         logger.info(
             "Listening for telnet connections on %s port %r", self.host, self.port
         )
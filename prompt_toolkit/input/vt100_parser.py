@@ -7,6 +7,7 @@ from __future__ import annotations
 import re
 from typing import Callable, Dict, Generator
 
+from ..cache import register_cache
 from ..key_binding.key_processor import KeyPress
 from ..keys import Keys
 from .ansi_escape_sequences import ANSI_SEQUENCES
@@ -45,7 +46,11 @@ class _IsPrefixOfLongerMatchCache(Dict[str, bool]):
     any key that start with this characters.
     """
 
+    def __init__(self) -> None:
+        self.stats = register_cache(self, "_IsPrefixOfLongerMatchCache")
+
     def __missing__(self, prefix: str) -> bool:
+        self.stats.misses += 1
         # (hard coded) If this could be a prefix of a CPR response, return
         # True.
         if _cpr_response_prefix_re.match(prefix) or _mouse_event_prefix_re.match(
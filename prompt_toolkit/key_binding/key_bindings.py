@@ -226,11 +226,15 @@ class KeyBindings(KeyBindingsBase):
     def __init__(self) -> None:
         self._bindings: list[Binding] = []
         self._get_bindings_for_keys_cache: SimpleCache[KeysTuple, list[Binding]] = (
-            SimpleCache(maxsize=10000)
+            SimpleCache(
+                maxsize=10000, name="KeyBindings._get_bindings_for_keys_cache"
+            )
         )
         self._get_bindings_starting_with_keys_cache: SimpleCache[
             KeysTuple, list[Binding]
-        ] = SimpleCache(maxsize=1000)
+        ] = SimpleCache(
+            maxsize=1000, name="KeyBindings._get_bindings_starting_with_keys_cache"
+        )
         self.__version = 0  # For cache invalidation.
 
     def _clear_cache(self) -> None:
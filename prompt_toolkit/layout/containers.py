@@ -8,7 +8,8 @@ from __future__ import annotations
 from abc import ABCMeta, abstractmethod
 from enum import Enum
 from functools import partial
-from typing import TYPE_CHECKING, Callable, Sequence, Union, cast
+from itertools import repeat
+from typing import TYPE_CHECKING, Callable, Hashable, NamedTuple, Sequence, Union, cast
 
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.cache import SimpleCache
@@ -30,6 +31,7 @@ from prompt_toolkit.formatted_text.utils import (
 )
 from prompt_toolkit.key_binding import KeyBindingsBase
 from prompt_toolkit.mouse_events import MouseEvent, MouseEventType
+from prompt_toolkit.render_profiler import measured
 from prompt_toolkit.utils import get_cwidth, take_using_weights, to_int, to_str
 
 from .controls import (
@@ -48,7 +50,7 @@ from .dimension import (
 )
 from .margins import Margin
 from .mouse_handlers import MouseHandlers
-from .screen import _CHAR_CACHE, Screen, WritePosition
+from .screen import _CHAR_CACHE, Char, Screen, WritePosition
 from .utils import explode_text_fragments
 
 if TYPE_CHECKING:
@@ -297,7 +299,7 @@ class HSplit(_Split):
         self.align = align
 
         self._children_cache: SimpleCache[tuple[Container, ...], list[Container]] = (
-            SimpleCache(maxsize=1)
+            SimpleCache(maxsize=1, name="HSplit._children_cache")
         )
         self._remaining_space_window = Window()  # Dummy window.
 
@@ -415,6 +417,7 @@ class HSplit(_Split):
                     z_index,
                 )
 
+    @measured
     def _divide_heights(self, write_position: WritePosition) -> list[int] | None:
         """
         Return the heights for all rows.
@@ -534,7 +537,7 @@ class VSplit(_Split):
         self.align = align
 
         self._children_cache: SimpleCache[tuple[Container, ...], list[Container]] = (
-            SimpleCache(maxsize=1)
+            SimpleCache(maxsize=1, name="VSplit._children_cache")
         )
         self._remaining_space_window = Window()  # Dummy window.
 
@@ -610,6 +613,7 @@ class VSplit(_Split):
 
         return self._children_cache.get(tuple(self.children), get)
 
+    @measured
     def _divide_widths(self, width: int) -> list[int] | None:
         """
         Return the widths for all columns.
@@ -1382,6 +1386,86 @@ class WindowAlign(Enum):
     CENTER = "CENTER"
 
 
+class _LineLayout(NamedTuple):
+    """
+    A line of a :class:`.UIContent`, laid out for a given width: what
+    `Window._copy_body` writes to the screen for it, relative to where the
+    line starts.
+    """
+
+    #: For every (wrapped) row, the characters from column zero on.
+    rows: list[list[Char]]
+    #: For every row, the columns in the content of the characters on it...
+    cols: list[list[int]]
+    #: ... and their x positions in the row.
+    xs: list[list[int]]
+    #: For every row, the x position after the last character.
+    ends: list[int]
+    #: For every row, the cells and `rowcol_to_yx` entries of the last place
+    #: where the row was copied to, as `((lineno, y, xpos), cells, rowcol_to_yx)`.
+    #: (Usually, a line stays where it is from one frame to the next.)
+    placed: list[
+        tuple[
+            tuple[int, int, int],
+            dict[int, Char],
+            dict[tuple[int, int], tuple[int, int]],
+        ]
+        | None
+    ]
+
+
+def _layout_line(
+    line: StyleAndTextTuples, width: int, wrap_lines: bool
+) -> _LineLayout | None:
+    """
+    Lay out a line the way `Window._copy_body` does when there is no
+    horizontal scrolling or alignment, starting after the line prefix (if
+    any), with `width` the room that is left. Returns `None` for lines that
+    depend on what is already on the screen: lines with zero width escapes or
+    zero width characters (which are merged into the previous cell).
+    """
+    empty_char = _CHAR_CACHE["", ""]
+    row: list[Char] = []
+    cols: list[int] = []
+    xs: list[int] = []
+    layout = _LineLayout([row], [cols], [xs], [], [])
+    x = 0
+    col = 0
+
+    for style, text, *_ in line:
+        if "[ZeroWidthEscape]" in style:
+            return None
+
+        for c in text:
+            char = _CHAR_CACHE[c, style]
+            char_width = char.width
+            if char_width == 0:
+                return None
+
+            # Wrap when the line width is exceeded.
+            if wrap_lines and x + char_width > width:
+                layout.ends.append(x)
+                row, cols, xs = [], [], []
+                layout.rows.append(row)
+                layout.cols.append(cols)
+                layout.xs.append(xs)
+                x = 0
+
+            if x < width:
+                row.append(char)
+                # Erase the neighbors of multi width characters.
+                row.extend([empty_char] * (char_width - 1))
+                cols.append(col)
+                xs.append(x)
+
+            col += 1
+            x += char_width
+
+    layout.ends.append(x)
+    layout.placed.extend([None] * len(layout.rows))
+    return layout
+
+
 class Window(Container):
     """
     Container that holds a control.
@@ -1500,10 +1584,15 @@ class Window(Container):
 
         # Cache for the screens generated by the margin.
         self._ui_content_cache: SimpleCache[tuple[int, int, int], UIContent] = (
-            SimpleCache(maxsize=8)
+            SimpleCache(maxsize=8, name="Window._ui_content_cache")
         )
         self._margin_width_cache: SimpleCache[tuple[Margin, int], int] = SimpleCache(
-            maxsize=1
+            maxsize=1, name="Window._margin_width_cache"
+        )
+
+        # Cache for lines that were wrapped before, see `_layout_line`.
+        self._line_layout_cache: SimpleCache[Hashable, _LineLayout | None] = (
+            SimpleCache(maxsize=1000, name="Window._line_layout_cache", policy="lru")
         )
 
         self.reset()
@@ -1768,6 +1857,7 @@ class Window(Container):
         )
 
         # Erase background and fill with `char`.
+        screen.reserve_area(write_position)
         self._fill_bg(screen, write_position, erase_bg)
 
         # Resolve `align` attribute.
@@ -1979,6 +2069,24 @@ class Window(Container):
                 prompt = to_formatted_text(get_line_prefix(lineno, 0))
                 x, y = copy_line(prompt, lineno, x, y, is_input=False)
 
+            # Lines that were laid out before (for the width after the prefix)
+            # are copied row by row. Every wrapped row can get a prefix of its
+            # own, so with a prefix, only lines that take one row are.
+            if (
+                is_input
+                and not horizontal_scroll
+                and align == WindowAlign.LEFT
+                and x < width
+            ):
+                layout = self._line_layout_cache.get(
+                    (tuple(line), width - x, wrap_lines),
+                    lambda: _layout_line(line, width - x, wrap_lines),
+                )
+                if layout is not None and (
+                    len(layout.rows) == 1 or not get_line_prefix
+                ):
+                    return copy_layout(layout, lineno, x, y)
+
             # Scroll horizontally.
             skipped = 0  # Characters skipped because of horizontal scrolling.
             if horizontal_scroll and is_input:
@@ -2081,6 +2189,63 @@ class Window(Container):
                     x += char_width
             return x, y
 
+        def copy_layout(
+            layout: _LineLayout, lineno: int, x: int, y: int
+        ) -> tuple[int, int]:
+            """
+            Copy a line that was laid out by `_layout_line` to the output
+            screen, with the first row starting at `x`. Does the same as
+            `copy_line`.
+            """
+            for i, cells in enumerate(layout.rows):
+                if i:
+                    x = 0
+                    visible_line_to_row_col[y + 1] = (
+                        lineno,
+                        visible_line_to_row_col[y][1] + layout.ends[i - 1],
+                    )
+                    y += 1
+                    if y >= write_position.height:
+                        return 0, y
+
+                if y >= 0 and cells:
+                    row = new_buffer[y + ypos]
+                    key = (lineno, y + ypos, xpos + x)
+                    placed = layout.placed[i]
+
+                    if placed is not None and placed[0] == key:
+                        # Copied to the same place before: reuse the cells and
+                        # positions from then.
+                        if isinstance(row, dict):
+                            row.update(placed[1])
+                        else:
+                            for cell_x, char in placed[1].items():
+                                row[cell_x] = char
+                        rowcol_to_yx.update(placed[2])
+                        continue
+
+                    positions = dict(
+                        zip(
+                            zip(repeat(lineno), layout.cols[i]),
+                            zip(
+                                repeat(y + ypos),
+                                [cell_x + xpos + x for cell_x in layout.xs[i]],
+                            ),
+                        )
+                    )
+                    placed_cells = dict(
+                        zip(range(xpos + x, xpos + x + len(cells)), cells)
+                    )
+                    layout.placed[i] = (key, placed_cells, positions)
+
+                    if isinstance(row, dict):
+                        row.update(placed_cells)
+                    else:
+                        for cell_x, char in placed_cells.items():
+                            row[cell_x] = char
+                    rowcol_to_yx.update(positions)
+            return x + layout.ends[-1], y
+
         # Copy content.
         def copy() -> int:
             y = -vertical_scroll_2
@@ -6,7 +6,8 @@ from __future__ import annotations
 
 import time
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING, Callable, Hashable, Iterable, NamedTuple
+from bisect import bisect_right
+from typing import TYPE_CHECKING, Callable, Hashable, Iterable, NamedTuple, cast
 
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.buffer import Buffer
@@ -16,13 +17,13 @@ from prompt_toolkit.document import Document
 from prompt_toolkit.filters import FilterOrBool, to_filter
 from prompt_toolkit.formatted_text import (
     AnyFormattedText,
+    OneStyleAndTextTuple,
     StyleAndTextTuples,
     to_formatted_text,
 )
 from prompt_toolkit.formatted_text.utils import (
     fragment_list_to_text,
     fragment_list_width,
-    split_lines,
 )
 from prompt_toolkit.lexers import Lexer, SimpleLexer
 from prompt_toolkit.mouse_events import MouseButton, MouseEvent, MouseEventType
@@ -247,6 +248,135 @@ class UIContent:
             return height
 
 
+class _FragmentsKey:
+    """
+    Fragments as (part of) a cache key. Hashing all the fragments is what
+    makes looking up a long text expensive, so the hash is computed only once.
+
+    :param fragments: List of ``(style_str, text)`` or ``(style_str, text,
+        mouse_handler)`` tuples.
+    """
+
+    __slots__ = ("fragments", "_hash")
+
+    def __init__(self, fragments: StyleAndTextTuples) -> None:
+        self.fragments = tuple(fragments)
+        self._hash = hash(self.fragments)
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        return self is other or (
+            isinstance(other, _FragmentsKey)
+            and self._hash == other._hash
+            and self.fragments == other.fragments
+        )
+
+
+class _FragmentLines:
+    """
+    The lines of a list of fragments, split on demand. (Like `split_lines`,
+    but without splitting all of it.)
+
+    Finding where every line starts takes one pass over the fragments that
+    doesn't create any lists or tuples, so that the cost of rendering a long
+    text doesn't depend on the number of lines, apart from this pass. Lines
+    are only split off when they are asked for, which is usually when they
+    are visible.
+
+    :param fragments: List of ``(style_str, text)`` or ``(style_str, text,
+        mouse_handler)`` tuples.
+    """
+
+    def __init__(self, fragments: StyleAndTextTuples) -> None:
+        self.fragments = fragments
+
+        # (Index of the fragment, offset in its text) of the start of every
+        # line.
+        starts = [(0, 0)]
+        for index, fragment in enumerate(fragments):
+            text = fragment[1]
+            if "\n" in text:
+                offset = text.find("\n")
+                while offset != -1:
+                    starts.append((index, offset + 1))
+                    offset = text.find("\n", offset + 1)
+        self._starts = starts
+        self._lines: dict[int, StyleAndTextTuples] = {}
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def get_line(
+        self, lineno: int, mouse_handlers: bool = False
+    ) -> StyleAndTextTuples:
+        """
+        Return the fragments of the given line.
+
+        :param mouse_handlers: Keep the mouse handlers of the fragments. (The
+            lines without mouse handlers are cached.)
+        """
+        if not mouse_handlers:
+            try:
+                return self._lines[lineno]
+            except KeyError:
+                pass
+
+        fragments = self.fragments
+        starts = self._starts
+        first, offset = starts[lineno]
+
+        # The line ends before the newline at the start of the next line.
+        if lineno + 1 < len(starts):
+            last, end = starts[lineno + 1]
+            end -= 1
+        else:
+            last, end = len(fragments) - 1, None
+
+        line: StyleAndTextTuples = []
+        for index in range(first, last + 1):
+            fragment = fragments[index]
+            text = fragment[1]
+            start = offset if index == first else 0
+            stop = end if index == last else None
+            if start or stop is not None:
+                text = text[start:stop]
+
+            if mouse_handlers:
+                line.append(
+                    cast(OneStyleAndTextTuple, (fragment[0], text, *fragment[2:]))
+                )
+            else:
+                line.append((fragment[0], text))
+
+        if not mouse_handlers:
+            self._lines[lineno] = line
+        return line
+
+    def find_style(self, style: str) -> Point | None:
+        """
+        Return the position of the first fragment that has `style` in its
+        style string.
+        """
+        fragments = self.fragments
+        for index, fragment in enumerate(fragments):
+            if style in fragment[0]:
+                break
+        else:
+            return None
+
+        y = bisect_right(self._starts, (index, 0)) - 1
+        first, offset = self._starts[y]
+        if first == index:
+            return Point(x=0, y=y)
+
+        x = len(fragments[first][1]) - offset
+        for i in range(first + 1, index):
+            x += len(fragments[i][1])
+        return Point(x=x, y=y)
+
+
 class FormattedTextControl(UIControl):
     """
     Control that displays formatted text. This can be either plain text, an
@@ -311,12 +441,18 @@ class FormattedTextControl(UIControl):
         self.get_cursor_position = get_cursor_position
 
         #: Cache for the content.
-        self._content_cache: SimpleCache[Hashable, UIContent] = SimpleCache(maxsize=18)
+        self._content_cache: SimpleCache[Hashable, UIContent] = SimpleCache(
+            maxsize=18, name="FormattedTextControl._content_cache"
+        )
         self._fragment_cache: SimpleCache[int, StyleAndTextTuples] = SimpleCache(
-            maxsize=1
+            maxsize=1, name="FormattedTextControl._fragment_cache"
         )
         # Only cache one fragment list. We don't need the previous item.
 
+        # Render counter and fragments of the last `create_content` call, and
+        # their key in the content cache.
+        self._fragments_key: tuple[int, StyleAndTextTuples, _FragmentsKey] | None = None
+
         # Render info for the mouse support.
         self._fragments: StyleAndTextTuples | None = None
 
@@ -372,49 +508,48 @@ class FormattedTextControl(UIControl):
     def create_content(self, width: int, height: int | None) -> UIContent:
         # Get fragments
         fragments_with_mouse_handlers = self._get_formatted_text_cached()
-        fragment_lines_with_mouse_handlers = list(
-            split_lines(fragments_with_mouse_handlers)
-        )
-
-        # Strip mouse handlers from fragments.
-        fragment_lines: list[StyleAndTextTuples] = [
-            [(item[0], item[1]) for item in line]
-            for line in fragment_lines_with_mouse_handlers
-        ]
 
         # Keep track of the fragments with mouse handler, for later use in
         # `mouse_handler`.
         self._fragments = fragments_with_mouse_handlers
 
-        # If there is a `[SetCursorPosition]` in the fragment list, set the
-        # cursor position here.
-        def get_cursor_position(
-            fragment: str = "[SetCursorPosition]",
-        ) -> Point | None:
-            for y, line in enumerate(fragment_lines):
-                x = 0
-                for style_str, text, *_ in line:
-                    if fragment in style_str:
-                        return Point(x=x, y=y)
-                    x += len(text)
-            return None
-
-        # If there is a `[SetMenuPosition]`, set the menu over here.
-        def get_menu_position() -> Point | None:
-            return get_cursor_position("[SetMenuPosition]")
-
-        cursor_position = (self.get_cursor_position or get_cursor_position)()
-
-        # Create content, or take it from the cache.
-        key = (tuple(fragments_with_mouse_handlers), width, cursor_position)
+        # A `get_cursor_position` callable can return something else every
+        # time. Otherwise, the cursor position follows from the fragments.
+        cursor_position = self.get_cursor_position and self.get_cursor_position()
+
+        # Create content, or take it from the cache. The fragments are
+        # retrieved once per render, so their key is built once per render
+        # too. (The key still compares all fragments when the render counter
+        # changes: a list that is changed in place is recognized that way.)
+        render_counter = get_app().render_counter
+        if (
+            self._fragments_key is None
+            or self._fragments_key[0] != render_counter
+            or self._fragments_key[1] is not fragments_with_mouse_handlers
+        ):
+            self._fragments_key = (
+                render_counter,
+                fragments_with_mouse_handlers,
+                _FragmentsKey(fragments_with_mouse_handlers),
+            )
+        key = (self._fragments_key[2], width, cursor_position)
 
         def get_content() -> UIContent:
+            fragment_lines = _FragmentLines(fragments_with_mouse_handlers)
+
+            # If there is a `[SetCursorPosition]` in the fragment list, set the
+            # cursor position here. If there is a `[SetMenuPosition]`, set the
+            # menu over here.
             return UIContent(
-                get_line=lambda i: fragment_lines[i],
+                get_line=fragment_lines.get_line,
                 line_count=len(fragment_lines),
                 show_cursor=self.show_cursor,
-                cursor_position=cursor_position,
-                menu_position=get_menu_position(),
+                cursor_position=(
+                    cursor_position
+                    if self.get_cursor_position
+                    else fragment_lines.find_style("[SetCursorPosition]")
+                ),
+                menu_position=fragment_lines.find_style("[SetMenuPosition]"),
             )
 
         return self._content_cache.get(key, get_content)
@@ -430,14 +565,15 @@ class FormattedTextControl(UIControl):
         event.)
         """
         if self._fragments:
-            # Read the generator.
-            fragments_for_line = list(split_lines(self._fragments))
+            fragment_lines = _FragmentLines(self._fragments)
 
-            try:
-                fragments = fragments_for_line[mouse_event.position.y]
-            except IndexError:
+            if not 0 <= mouse_event.position.y < len(fragment_lines):
                 return NotImplemented
             else:
+                fragments = fragment_lines.get_line(
+                    mouse_event.position.y, mouse_handlers=True
+                )
+
                 # Find position in the fragment list.
                 xpos = mouse_event.position.x
 
@@ -551,7 +687,7 @@ class BufferControl(UIControl):
         #: lexed. This is a fairly easy way to cache such an expensive operation.
         self._fragment_cache: SimpleCache[
             Hashable, Callable[[int], StyleAndTextTuples]
-        ] = SimpleCache(maxsize=8)
+        ] = SimpleCache(maxsize=8, name="BufferControl._fragment_cache")
 
         self._last_click_timestamp: float | None = None
         self._last_get_processed_line: Callable[[int], _ProcessedLine] | None = None
@@ -350,7 +350,9 @@ class HighlightMatchingBracketProcessor(Processor):
         self.max_cursor_distance = max_cursor_distance
 
         self._positions_cache: SimpleCache[Hashable, list[tuple[int, int]]] = (
-            SimpleCache(maxsize=8)
+            SimpleCache(
+                maxsize=8, name="HighlightMatchingBracketProcessor._positions_cache"
+            )
         )
 
     def _get_positions_to_highlight(self, document: Document) -> list[tuple[int, int]]:
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 from collections import defaultdict
-from typing import TYPE_CHECKING, Callable
+from typing import TYPE_CHECKING, Callable, Dict, List
 
 from prompt_toolkit.cache import FastDictCache
 from prompt_toolkit.data_structures import Point
@@ -13,6 +13,7 @@ if TYPE_CHECKING:
 
 __all__ = [
     "Screen",
+    "ArrayScreen",
     "Char",
 ]
 
@@ -142,7 +143,7 @@ class Char:
 
 
 _CHAR_CACHE: FastDictCache[tuple[str, str], Char] = FastDictCache(
-    Char, size=1000 * 1000
+    Char, size=1000 * 1000, name="_CHAR_CACHE", policy="lru"
 )
 Transparent = "[transparent]"
 
@@ -275,6 +276,13 @@ class Screen:
             for x, char in row.items():
                 row[x] = char_cache[char.char, char.style + append_style]
 
+    def reserve_area(self, write_position: WritePosition) -> None:
+        """
+        Called before a container writes cells in this area. (Rows of a
+        :class:`.Screen` are dictionaries that accept any column, so this does
+        nothing.)
+        """
+
     def fill_area(
         self, write_position: WritePosition, style: str = "", after: bool = False
     ) -> None:
@@ -308,6 +316,183 @@ class Screen:
                 ]
 
 
+class _ArrayRow(List[Char]):
+    """
+    One row of an :class:`.ArrayScreen`: a preallocated list of :class:`.Char`
+    instances, indexed by column.
+
+    The list is twice as long as the screen is wide (or `capacity` long).
+    Writes to negative columns (floats that are partially visible) wrap around
+    into the part beyond `width`, which is never displayed, instead of hitting
+    visible cells.
+    """
+
+    __slots__ = ("width", "default_char")
+
+    def __init__(self, default_char: Char, width: int, capacity: int = 0) -> None:
+        super().__init__([default_char] * max(capacity, 2 * width))
+        self.width = width
+        self.default_char = default_char
+
+    def items(self) -> list[tuple[int, Char]]:
+        """
+        The written (non-default) cells as `(column, char)` tuples, like the
+        `items()` of the rows of a :class:`.Screen`.
+        """
+        default_char = self.default_char
+        return [(x, c) for x, c in enumerate(self[: self.width]) if c is not default_char]
+
+
+class _ArrayBuffer(Dict[int, _ArrayRow]):
+    """
+    Rows of an :class:`.ArrayScreen`. All rows that fit in the terminal are
+    allocated up front; rows outside of it are created on first access.
+    """
+
+    def __init__(self, default_char: Char, columns: int, rows: int) -> None:
+        super().__init__()
+        self.default_char = default_char
+        self.columns = columns
+        self.capacity = 2 * columns
+        for y in range(rows):
+            self[y] = _ArrayRow(default_char, columns)
+
+    def __missing__(self, y: int) -> _ArrayRow:
+        row = self[y] = _ArrayRow(self.default_char, self.columns, self.capacity)
+        return row
+
+    def reserve(self, xmin: int, xmax: int) -> None:
+        """
+        Make the rows long enough for writes to the columns `xmin` up to (not
+        including) `xmax`, so that negative columns still land beyond the
+        visible width.
+        """
+        capacity = max(xmax, self.columns - xmin)
+        if capacity > self.capacity:
+            capacity = max(capacity, 2 * self.capacity)
+            for row in self.values():
+                row.extend([self.default_char] * (capacity - len(row)))
+            self.capacity = capacity
+
+
+class _Restyler:
+    """
+    Maps row slices of :class:`.Char` objects through `get_char`, calling it
+    only once for each distinct object. (Cells are interned, so all rows of an
+    area usually hold only a few distinct objects.)
+    """
+
+    def __init__(self, get_char: Callable[[Char], Char]) -> None:
+        self.get_char = get_char
+        self.mapping: dict[int, Char] = {}
+        # Keep the originals alive, so that their ids can't be reused.
+        self.originals: dict[int, Char] = {}
+
+    def __call__(self, cells: list[Char]) -> list[Char]:
+        mapping = self.mapping
+        distinct = dict(zip(map(id, cells), cells))
+
+        for key in distinct.keys() - mapping.keys():
+            char = self.originals[key] = distinct[key]
+            mapping[key] = self.get_char(char)
+
+        return list(map(mapping.__getitem__, map(id, cells)))
+
+
+class ArrayScreen(Screen):
+    """
+    :class:`.Screen` backed by preallocated rows for the whole terminal.
+
+    Rows are flat lists of interned :class:`.Char` objects instead of
+    dictionaries, so reading and writing a cell is a plain list index, and
+    filling or restyling an area works on whole row slices. Two rows with the
+    same content hold the same objects, which makes comparing them with `==`
+    cheap. The `data_buffer` keeps the interface of :class:`.Screen`:
+    `data_buffer[y][x]`, also for rows outside of the terminal.
+
+    Rows don't track whether they were written to: the renderer draws every
+    frame into a new screen, so all rows are written anyway, and only
+    comparing a row with the one of the previous frame tells whether it
+    changed.
+
+    :param columns: Width of the preallocated raster (the terminal width).
+        Rows are grown when a container (a float that sticks out of the
+        terminal) reserves an area beyond twice this width.
+    :param rows: Number of rows to allocate up front.
+    """
+
+    def __init__(
+        self,
+        default_char: Char | None = None,
+        initial_width: int = 0,
+        initial_height: int = 0,
+        columns: int = 0,
+        rows: int = 0,
+    ) -> None:
+        super().__init__(default_char, initial_width, initial_height)
+
+        if default_char is None:
+            default_char = _CHAR_CACHE[" ", Transparent]
+
+        self.data_buffer = _ArrayBuffer(  # type: ignore[assignment]
+            default_char, max(columns, initial_width, 1), rows
+        )
+
+    def append_style_to_content(self, style_str: str) -> None:
+        char_cache = _CHAR_CACHE
+        append_style = " " + style_str
+
+        def get_char(char: Char) -> Char:
+            if char is row.default_char:
+                return char
+            return char_cache[char.char, char.style + append_style]
+
+        restyle = _Restyler(get_char)
+
+        for row in self.data_buffer.values():
+            row[: row.width] = restyle(row[: row.width])
+
+    def reserve_area(self, write_position: WritePosition) -> None:
+        self.data_buffer.reserve(  # type: ignore[attr-defined]
+            write_position.xpos, write_position.xpos + write_position.width
+        )
+
+    def fill_area(
+        self, write_position: WritePosition, style: str = "", after: bool = False
+    ) -> None:
+        if not style.strip():
+            return
+
+        self.reserve_area(write_position)
+
+        xmin = write_position.xpos
+        xmax = write_position.xpos + write_position.width
+        char_cache = _CHAR_CACHE
+        data_buffer = self.data_buffer
+
+        if after:
+            append_style = " " + style
+            prepend_style = ""
+        else:
+            append_style = ""
+            prepend_style = style + " "
+
+        def get_char(char: Char) -> Char:
+            return char_cache[char.char, prepend_style + char.style + append_style]
+
+        restyle = _Restyler(get_char)
+
+        for y in range(
+            write_position.ypos, write_position.ypos + write_position.height
+        ):
+            row = data_buffer[y]
+            if 0 <= xmin and xmax <= len(row):
+                row[xmin:xmax] = restyle(row[xmin:xmax])
+            else:
+                for x in range(xmin, xmax):
+                    row[x] = get_char(row[x])
+
+
 class WritePosition:
     def __init__(self, xpos: int, ypos: int, width: int, height: int) -> None:
         assert height >= 0
@@ -11,6 +11,7 @@ import re
 from abc import ABCMeta, abstractmethod
 from typing import TYPE_CHECKING, Callable, Dict, Generator, Iterable, Tuple
 
+from prompt_toolkit.cache import register_cache
 from prompt_toolkit.document import Document
 from prompt_toolkit.filters import FilterOrBool, to_filter
 from prompt_toolkit.formatted_text.base import StyleAndTextTuples
@@ -131,7 +132,11 @@ class _TokenCache(Dict[Tuple[str, ...], str]):
     ``class:pygments,pygments.A,pygments.A.B,pygments.A.B.C``
     """
 
+    def __init__(self) -> None:
+        self.stats = register_cache(self, "_TokenCache")
+
     def __missing__(self, key: tuple[str, ...]) -> str:
+        self.stats.misses += 1
         result = "class:" + pygments_token_to_classname(key)
         self[key] = result
         return result
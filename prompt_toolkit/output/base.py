@@ -178,6 +178,13 @@ class Output(metaclass=ABCMeta):
     def get_size(self) -> Size:
         "Return the size of the output window."
 
+    def invalidate_size(self) -> None:
+        """
+        Called when the size of the output window changed (or could have
+        changed). Outputs that cache the result of :meth:`.get_size` should
+        ask again next time.
+        """
+
     def bell(self) -> None:
         "Sound bell."
 
@@ -4,6 +4,7 @@ import errno
 import os
 import sys
 from contextlib import contextmanager
+from io import FileIO
 from typing import IO, Iterator, TextIO
 
 __all__ = ["flush_stdout"]
@@ -30,7 +31,18 @@ def flush_stdout(stdout: TextIO, data: str) -> None:
             # My Arch Linux installation of july 2015 reported 'ANSI_X3.4-1968'
             # for sys.stdout.encoding in xterm.
             if has_binary_io:
-                stdout.buffer.write(data.encode(stdout.encoding or "utf-8", "replace"))
+                encoded = data.encode(stdout.encoding or "utf-8", "replace")
+                fd = _get_direct_fileno(stdout)
+
+                if fd is None:
+                    stdout.buffer.write(encoded)
+                else:
+                    # Write the data straight to the file descriptor, in one
+                    # system call if possible, instead of going through the
+                    # buffered writer. (Text that was written to `stdout`
+                    # before has to go out first.)
+                    stdout.flush()
+                    _write_all(fd, encoded)
             else:
                 stdout.write(data)
 
@@ -53,6 +65,40 @@ def flush_stdout(stdout: TextIO, data: str) -> None:
             raise
 
 
+def _get_direct_fileno(stdout: TextIO) -> int | None:
+    """
+    Return the file descriptor that the encoded output of `stdout` can be
+    written to directly, or `None` if it has to go through `stdout.buffer`.
+
+    That's only the case when the binary buffer of `stdout` writes into a plain
+    `FileIO`. On Windows, the console is a `_WindowsConsoleIO` that writes
+    UTF-16 to the console API; bytes written to its file descriptor would be
+    interpreted in the console code page instead.
+    """
+    if sys.platform == "win32":
+        return None
+
+    # (Unbuffered, `stdout.buffer` is the `FileIO` itself.)
+    buffer = stdout.buffer
+    if not isinstance(getattr(buffer, "raw", buffer), FileIO):
+        return None
+
+    try:
+        return stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        # `io.UnsupportedOperation` is both an `OSError` and a `ValueError`.
+        return None
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    """
+    Write all of `data` to `fd`. (`os.write` can write less than was given.)
+    """
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view) :]
+
+
 @contextmanager
 def _blocking_io(io: IO[str]) -> Iterator[None]:
     """
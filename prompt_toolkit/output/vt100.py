@@ -14,6 +14,7 @@ import os
 import sys
 from typing import Callable, Dict, Hashable, Iterable, Sequence, TextIO, Tuple
 
+from prompt_toolkit.cache import register_cache
 from prompt_toolkit.cursor_shapes import CursorShape
 from prompt_toolkit.data_structures import Size
 from prompt_toolkit.output import Output
@@ -225,8 +226,10 @@ class _256ColorCache(Dict[Tuple[int, int, int], int]):
             colors.append((v, v, v))
 
         self.colors = colors
+        self.stats = register_cache(self, "_256ColorCache")
 
     def __missing__(self, value: tuple[int, int, int]) -> int:
+        self.stats.misses += 1
         r, g, b = value
 
         # Find closest color.
@@ -265,8 +268,10 @@ class _EscapeCodeCache(Dict[Attrs, str]):
 
     def __init__(self, color_depth: ColorDepth) -> None:
         self.color_depth = color_depth
+        self.stats = register_cache(self, "_EscapeCodeCache")
 
     def __missing__(self, attrs: Attrs) -> str:
+        self.stats.misses += 1
         (
             fgcolor,
             bgcolor,
@@ -375,6 +380,24 @@ class _EscapeCodeCache(Dict[Attrs, str]):
         return map(str, result)
 
 
+#: Escape sequences for moving the cursor by one cell, per direction.
+_CURSOR_MOVES = {
+    "A": "\x1b[A",  # Up.
+    "B": "\x1b[B",  # Down.
+    "C": "\x1b[C",  # Forward.
+    "D": "\b",  # Backward. (Shorter than '\x1b[D'.)
+}
+
+
+def _cursor_move_code(direction: str, amount: int) -> str:
+    """
+    Escape sequence for moving the cursor `amount` cells in `direction`.
+    """
+    if amount == 1:
+        return _CURSOR_MOVES[direction]
+    return "\x1b[%i%s" % (amount, direction)
+
+
 def _get_size(fileno: int) -> tuple[int, int]:
     """
     Get the size of this pseudo terminal.
@@ -389,6 +412,7 @@ def _get_size(fileno: int) -> tuple[int, int]:
 class Vt100_Output(Output):
     """
     :param get_size: A callable which returns the `Size` of the output terminal.
+        Its result is cached until :meth:`.invalidate_size` is called.
     :param stdout: Any object with has a `write` and `flush` method + an 'encoding' property.
     :param term: The terminal environment variable. (xterm, xterm-256color, linux, ...)
     :param enable_cpr: When `True` (the default), send "cursor position
@@ -423,6 +447,21 @@ class Vt100_Output(Output):
         self.enable_bell = enable_bell
         self.enable_cpr = enable_cpr
 
+        # What the last item of `_buffer` is: a cursor movement (the letter of
+        # its direction in `_CURSOR_MOVES`, `_tail_amount` is the distance), an
+        # SGR sequence ("m") or something else (""). Used for merging
+        # sequences that follow each other.
+        self._tail = ""
+        self._tail_amount = 0
+
+        # The SGR sequence that is active in the terminal, when we know it.
+        self._sgr: str | None = None
+
+        # The size of the terminal, until `invalidate_size` is called. (Asking
+        # a tty for its size is a system call, and the renderer asks several
+        # times per frame.)
+        self._size: Size | None = None
+
         # Cache for escape codes.
         self._escape_code_caches: dict[ColorDepth, _EscapeCodeCache] = {
             ColorDepth.DEPTH_1_BIT: _EscapeCodeCache(ColorDepth.DEPTH_1_BIT),
@@ -495,7 +534,13 @@ class Vt100_Output(Output):
         )
 
     def get_size(self) -> Size:
-        return self._get_size()
+        size = self._size
+        if size is None:
+            size = self._size = self._get_size()
+        return size
+
+    def invalidate_size(self) -> None:
+        self._size = None
 
     def fileno(self) -> int:
         "Return file descriptor."
@@ -510,6 +555,12 @@ class Vt100_Output(Output):
         Write raw data to output.
         """
         self._buffer.append(data)
+        self._tail = ""
+
+        # Raw data can contain SGR sequences (which end with an "m") that
+        # change the attributes.
+        if "m" in data:
+            self._sgr = None
 
     def write(self, data: str) -> None:
         """
@@ -517,6 +568,40 @@ class Vt100_Output(Output):
         (Removes vt100 escape codes. -- used for safely writing text.)
         """
         self._buffer.append(data.replace("\x1b", "?"))
+        self._tail = ""
+
+    def _write_sgr(self, data: str) -> None:
+        """
+        Write an SGR sequence. All the sequences that we write start by
+        resetting the attributes, so only the last one of several consecutive
+        sequences matters, and a sequence that is already active can be left
+        out.
+        """
+        if data == self._sgr:
+            return
+
+        if self._tail == "m":
+            self._buffer[-1] = data
+        else:
+            self._buffer.append(data)
+            self._tail = "m"
+        self._sgr = data
+
+    def _move_cursor(self, direction: str, amount: int) -> None:
+        """
+        Write a cursor movement. A movement in the same direction as the one
+        that was written right before is merged into it.
+        """
+        if amount == 0:
+            return
+
+        if self._tail == direction:
+            amount += self._tail_amount
+            self._buffer[-1] = _cursor_move_code(direction, amount)
+        else:
+            self._buffer.append(_cursor_move_code(direction, amount))
+            self._tail = direction
+        self._tail_amount = amount
 
     def set_title(self, title: str) -> None:
         """
@@ -581,7 +666,7 @@ class Vt100_Output(Output):
         self.write_raw("\x1b[J")
 
     def reset_attributes(self) -> None:
-        self.write_raw("\x1b[0m")
+        self._write_sgr("\x1b[0m")
 
     def set_attributes(self, attrs: Attrs, color_depth: ColorDepth) -> None:
         """
@@ -593,7 +678,7 @@ class Vt100_Output(Output):
         escape_code_cache = self._escape_code_caches[color_depth]
 
         # Write escape character.
-        self.write_raw(escape_code_cache[attrs])
+        self._write_sgr(escape_code_cache[attrs])
 
     def disable_autowrap(self) -> None:
         self.write_raw("\x1b[?7l")
@@ -622,38 +707,18 @@ class Vt100_Output(Output):
         self.write_raw("\x1b[%i;%iH" % (row, column))
 
     def cursor_up(self, amount: int) -> None:
-        if amount == 0:
-            pass
-        elif amount == 1:
-            self.write_raw("\x1b[A")
-        else:
-            self.write_raw("\x1b[%iA" % amount)
+        self._move_cursor("A", amount)
 
     def cursor_down(self, amount: int) -> None:
-        if amount == 0:
-            pass
-        elif amount == 1:
-            # Note: Not the same as '\n', '\n' can cause the window content to
-            #       scroll.
-            self.write_raw("\x1b[B")
-        else:
-            self.write_raw("\x1b[%iB" % amount)
+        # Note: Not the same as '\n', '\n' can cause the window content to
+        #       scroll.
+        self._move_cursor("B", amount)
 
     def cursor_forward(self, amount: int) -> None:
-        if amount == 0:
-            pass
-        elif amount == 1:
-            self.write_raw("\x1b[C")
-        else:
-            self.write_raw("\x1b[%iC" % amount)
+        self._move_cursor("C", amount)
 
     def cursor_backward(self, amount: int) -> None:
-        if amount == 0:
-            pass
-        elif amount == 1:
-            self.write_raw("\b")  # '\x1b[D'
-        else:
-            self.write_raw("\x1b[%iD" % amount)
+        self._move_cursor("D", amount)
 
     def hide_cursor(self) -> None:
         if self._cursor_visible in (True, None):
@@ -699,6 +764,11 @@ class Vt100_Output(Output):
 
         data = "".join(self._buffer)
         self._buffer = []
+        self._tail = ""
+
+        # Once the data is out, anything could write to the terminal in
+        # between, so don't assume anything about the attributes.
+        self._sgr = None
 
         flush_stdout(self.stdout, data)
 
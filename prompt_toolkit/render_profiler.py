@@ -0,0 +1,261 @@
+"""
+Instrumentation of the render pipeline.
+
+Assign a :class:`.RenderProfiler` to :attr:`.Application.render_profiler` to
+record how long every phase of a frame takes, how many cells and bytes were
+written and how the caches of the renderer did. Without a profiler (the default),
+the pipeline only checks for `None` a few times per frame.
+
+::
+
+    app.render_profiler = RenderProfiler()
+    app.render_profiler.show_overlay = True  # Draw the numbers on the screen.
+    ...
+    print(app.render_profiler.summary())
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from functools import wraps
+from time import perf_counter
+from typing import TYPE_CHECKING, Any, Callable, TypeVar, cast
+
+from prompt_toolkit.application.current import get_app_or_none
+
+if TYPE_CHECKING:
+    from prompt_toolkit.cache import CacheStats
+    from prompt_toolkit.layout.screen import Screen
+    from prompt_toolkit.output import Output
+
+__all__ = [
+    "FrameProfile",
+    "RenderProfiler",
+]
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+
+#: The phases of a frame, in the order in which they happen.
+PHASES = (
+    "before_render",  # `Application.before_render` handlers.
+    "prepare",  # Terminal modes and size, a new screen, style caches.
+    "measure",  # Computing preferred sizes of containers.
+    "write_to_screen",  # Containers and controls writing to the screen.
+    "floats",  # Floats, exit style and the profiler overlay.
+    "style",  # Resolving style strings that weren't cached yet.
+    "diff",  # Comparing with the previous screen, generating output.
+    "flush",  # Writing the output to the terminal.
+    "after_render",  # `Application.after_render` handlers.
+)
+
+
+class FrameProfile:
+    """
+    Measurements of one rendered frame.
+
+    :param render_counter: :attr:`.Application.render_counter` of the frame.
+    """
+
+    __slots__ = (
+        "render_counter",
+        "phases",
+        "cells_written",
+        "bytes_written",
+        "caches",
+    )
+
+    def __init__(self, render_counter: int) -> None:
+        self.render_counter = render_counter
+        #: Phase name -> seconds.
+        self.phases: dict[str, float] = {}
+        #: Cells that were different from the previous screen.
+        self.cells_written = 0
+        #: Characters written to the output. (Escape sequences are ASCII, so
+        #: this is close to the number of bytes.) 0 when the output doesn't
+        #: buffer in memory.
+        self.bytes_written = 0
+        #: Cache name -> (hits, misses) during this frame. Hits are only
+        #: counted while :func:`~prompt_toolkit.cache.count_cache_hits` is
+        #: enabled.
+        self.caches: dict[str, tuple[int, int]] = {}
+
+    def add_cache_counts(
+        self, name: str, stats: CacheStats, before: tuple[int, int]
+    ) -> None:
+        """
+        Add the hits and misses of a cache since `before`, a `(hits, misses)`
+        tuple taken from the same stats earlier.
+        """
+        hits, misses = self.caches.get(name, (0, 0))
+        self.caches[name] = (
+            hits + stats.hits - before[0],
+            misses + stats.misses - before[1],
+        )
+
+    @property
+    def total(self) -> float:
+        "Total duration of the frame in seconds."
+        return sum(self.phases.values())
+
+    def __repr__(self) -> str:
+        total = self.total * 1000
+        return f"FrameProfile({self.render_counter!r}, total={total:.2f}ms)"
+
+
+class RenderProfiler:
+    """
+    Records a :class:`.FrameProfile` for every rendered frame in a ring buffer.
+
+    :param max_frames: Number of frames to remember.
+    """
+
+    def __init__(self, max_frames: int = 120) -> None:
+        assert max_frames > 0
+
+        self.frames: deque[FrameProfile] = deque(maxlen=max_frames)
+
+        #: When `True`, draw the numbers of the last frame in the top right
+        #: corner of the screen.
+        self.show_overlay = False
+
+        #: The frame that is being rendered right now.
+        self.current: FrameProfile | None = None
+
+        self._mark = 0.0
+        self._nested = 0.0  # Time of nested phases since the last mark.
+        self._measuring = False
+
+    def begin_frame(self, render_counter: int) -> FrameProfile:
+        "Start recording a new frame."
+        self.current = FrameProfile(render_counter)
+        self._mark = perf_counter()
+        self._nested = 0.0
+        return self.current
+
+    def end_frame(self) -> None:
+        "Finish recording the current frame and add it to the ring buffer."
+        if self.current is not None:
+            self.frames.append(self.current)
+            self.current = None
+
+    def lap(self, phase: str | None = None) -> None:
+        """
+        Attribute the time since the previous lap to `phase` (minus the time of
+        nested phases that were recorded in between), and start a new lap.
+        """
+        now = perf_counter()
+        if phase is not None:
+            self.add(phase, now - self._mark - self._nested)
+        self._mark = now
+        self._nested = 0.0
+
+    def add(self, phase: str, seconds: float, nested: bool = False) -> None:
+        """
+        Add time to a phase of the current frame.
+
+        :param nested: The time was spent inside of the current lap, and
+            should not be attributed to that lap's phase as well.
+        """
+        frame = self.current
+        if frame is not None:
+            frame.phases[phase] = frame.phases.get(phase, 0.0) + seconds
+            if nested:
+                self._nested += seconds
+
+    @property
+    def last_frame(self) -> FrameProfile | None:
+        "The most recently completed frame."
+        return self.frames[-1] if self.frames else None
+
+    def summary(self) -> dict[str, tuple[float, float]]:
+        """
+        Mean and maximum duration in seconds of every phase (and the total)
+        over the frames in the ring buffer.
+        """
+        result: dict[str, tuple[float, float]] = {}
+        if not self.frames:
+            return result
+
+        for phase in PHASES + ("total",):
+            if phase == "total":
+                values = [frame.total for frame in self.frames]
+            else:
+                values = [frame.phases.get(phase, 0.0) for frame in self.frames]
+            result[phase] = (sum(values) / len(values), max(values))
+        return result
+
+    def clear(self) -> None:
+        "Forget all recorded frames."
+        self.frames.clear()
+
+    def overlay_lines(self) -> list[str]:
+        "Text of the overlay: the numbers of the last frame."
+        frame = self.last_frame
+        if frame is None:
+            return []
+
+        lines = [f"frame #{frame.render_counter}: {frame.total * 1000:.2f} ms"]
+        for phase in PHASES:
+            if phase in frame.phases:
+                lines.append(f"{phase:<16}{frame.phases[phase] * 1000:>7.2f} ms")
+        lines.append(f"cells {frame.cells_written}, bytes {frame.bytes_written}")
+        caches = ", ".join(
+            f"{name} {hits}/{misses}" for name, (hits, misses) in frame.caches.items()
+        )
+        if caches:
+            lines.append(f"hits/misses: {caches}")
+        return lines
+
+    def draw_overlay(self, screen: Screen, width: int) -> None:
+        "Draw the overlay in the top right corner of the screen."
+        from prompt_toolkit.layout.screen import _CHAR_CACHE
+
+        lines = self.overlay_lines()
+        if not lines:
+            return
+
+        overlay_width = max(len(line) for line in lines) + 2
+        xpos = max(0, width - overlay_width)
+        style = "class:render-profiler reverse"
+
+        for y, line in enumerate(lines):
+            row = screen.data_buffer[y]
+            text = f" {line} ".ljust(overlay_width)[: width - xpos]
+            for x, c in enumerate(text, xpos):
+                row[x] = _CHAR_CACHE[c, style]
+
+
+def measured(func: _F) -> _F:
+    """
+    Decorator for methods that compute the size of containers: attribute the
+    time spent in them to the "measure" phase of the current frame. (Nested
+    calls are only counted once.)
+    """
+
+    @wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        app = get_app_or_none()
+        profiler = app.render_profiler if app is not None else None
+        if profiler is None or profiler._measuring:
+            return func(*args, **kwargs)
+
+        profiler._measuring = True
+        start = perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profiler._measuring = False
+            profiler.add("measure", perf_counter() - start, nested=True)
+
+    return cast(_F, wrapper)
+
+
+def pending_output_size(output: Output) -> int:
+    """
+    Number of characters that the output has buffered, but not yet flushed.
+    (0 for outputs that don't buffer in memory.)
+    """
+    buffer = getattr(output, "_buffer", None)
+    if isinstance(buffer, list):
+        return sum(map(len, buffer))
+    return 0
@@ -37,6 +37,7 @@ from prompt_toolkit.application import Application
 from prompt_toolkit.application.current import get_app
 from prompt_toolkit.auto_suggest import AutoSuggest, DynamicAutoSuggest
 from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.cache import SimpleCache
 from prompt_toolkit.clipboard import Clipboard, DynamicClipboard, InMemoryClipboard
 from prompt_toolkit.completion import Completer, DynamicCompleter, ThreadedCompleter
 from prompt_toolkit.cursor_shapes import (
@@ -157,30 +158,47 @@ def _split_multiline_prompt(
     one with the fragments to be shown at the first line of the input.
     """
 
-    def has_before_fragments() -> bool:
-        for fragment, char, *_ in get_prompt_text():
-            if "\n" in char:
-                return True
-        return False
+    # The split only depends on the prompt fragments. `PromptSession` returns
+    # the same fragment list for as long as a static message doesn't change,
+    # so remember the result for the last list that we've seen.
+    last_fragments: StyleAndTextTuples | None = None
+    last_split: tuple[bool, StyleAndTextTuples, StyleAndTextTuples] = (False, [], [])
 
-    def before() -> StyleAndTextTuples:
-        result: StyleAndTextTuples = []
+    def split() -> tuple[bool, StyleAndTextTuples, StyleAndTextTuples]:
+        nonlocal last_fragments, last_split
+
+        fragments = get_prompt_text()
+        if fragments is last_fragments:
+            return last_split
+
+        exploded = explode_text_fragments(fragments)
+        multiline = any("\n" in char for fragment, char, *_ in fragments)
+
+        before: StyleAndTextTuples = []
+        first_input_line: StyleAndTextTuples = []
         found_nl = False
-        for fragment, char, *_ in reversed(explode_text_fragments(get_prompt_text())):
+        for fragment, char, *_ in reversed(exploded):
             if found_nl:
-                result.insert(0, (fragment, char))
+                before.append((fragment, char))
             elif char == "\n":
                 found_nl = True
-        return result
+            else:
+                first_input_line.append((fragment, char))
+        before.reverse()
+        first_input_line.reverse()
+
+        last_fragments = fragments
+        last_split = (multiline, before, first_input_line)
+        return last_split
+
+    def has_before_fragments() -> bool:
+        return split()[0]
+
+    def before() -> StyleAndTextTuples:
+        return split()[1]
 
     def first_input_line() -> StyleAndTextTuples:
-        result: StyleAndTextTuples = []
-        for fragment, char, *_ in reversed(explode_text_fragments(get_prompt_text())):
-            if char == "\n":
-                break
-            else:
-                result.insert(0, (fragment, char))
-        return result
+        return split()[2]
 
     return has_before_fragments, before, first_input_line
 
@@ -321,6 +339,8 @@ class PromptSession(Generic[_T]):
         formatted text.
     :param refresh_interval: (number; in seconds) When given, refresh the UI
         every so many seconds.
+    :param array_screen: (bool) Render into an :class:`~.ArrayScreen` instead
+        of a :class:`~.Screen`. See :class:`~.Application`.
     :param input: `Input` object. (Note that the preferred way to change the
         input/output is by creating an `AppSession`.)
     :param output: `Output` object.
@@ -409,6 +429,7 @@ class PromptSession(Generic[_T]):
         placeholder: AnyFormattedText | None = None,
         key_bindings: KeyBindingsBase | None = None,
         erase_when_done: bool = False,
+        array_screen: bool = False,
         tempfile_suffix: str | Callable[[], str] | None = ".txt",
         tempfile: str | Callable[[], str] | None = None,
         refresh_interval: float = 0,
@@ -468,12 +489,19 @@ class PromptSession(Generic[_T]):
         self.interrupt_exception = interrupt_exception
         self.eof_exception = eof_exception
 
+        #: Formatted text of recently shown plain text messages.
+        self._message_cache: SimpleCache[str, StyleAndTextTuples] = SimpleCache(
+            maxsize=16, name="PromptSession._message_cache"
+        )
+
         # Create buffers, layout and Application.
         self.history = history
         self.default_buffer = self._create_default_buffer()
         self.search_buffer = self._create_search_buffer()
         self.layout = self._create_layout()
-        self.app = self._create_application(editing_mode, erase_when_done)
+        self.app = self._create_application(
+            editing_mode, erase_when_done, array_screen
+        )
 
     def _dyncond(self, attr_name: str) -> Condition:
         """
@@ -711,7 +739,7 @@ class PromptSession(Generic[_T]):
         return Layout(layout, default_buffer_window)
 
     def _create_application(
-        self, editing_mode: EditingMode, erase_when_done: bool
+        self, editing_mode: EditingMode, erase_when_done: bool, array_screen: bool
     ) -> Application[_T]:
         """
         Create the `Application` object.
@@ -757,6 +785,7 @@ class PromptSession(Generic[_T]):
             mouse_support=dyncond("mouse_support"),
             editing_mode=editing_mode,
             erase_when_done=erase_when_done,
+            array_screen=array_screen,
             reverse_vi_search_direction=True,
             color_depth=lambda: self.color_depth,
             cursor=DynamicCursorShapeConfig(lambda: self.cursor),
@@ -1277,7 +1306,16 @@ class PromptSession(Generic[_T]):
         return Dimension()
 
     def _get_prompt(self) -> StyleAndTextTuples:
-        return to_formatted_text(self.message, style="class:prompt")
+        message = self.message
+
+        # Plain text messages are converted only once. Consecutive prompts
+        # that show one of the recent messages again reuse the same fragment
+        # list, which keeps the prompt split and the control caches valid.
+        if isinstance(message, str):
+            return self._message_cache.get(
+                message, lambda: to_formatted_text(message, style="class:prompt")
+            )
+        return to_formatted_text(message, style="class:prompt")
 
     def _get_continuation(
         self, width: int, line_number: int, wrap_count: int
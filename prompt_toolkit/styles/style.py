@@ -374,7 +374,9 @@ class _MergedStyle(BaseStyle):
     #       because it was more precise.)
     def __init__(self, styles: list[BaseStyle]) -> None:
         self.styles = styles
-        self._style: SimpleCache[Hashable, Style] = SimpleCache(maxsize=1)
+        self._style: SimpleCache[Hashable, Style] = SimpleCache(
+            maxsize=1, name="_MergedStyle._style"
+        )
 
     @property
     def _merged_style(self) -> Style:
@@ -17,6 +17,8 @@ from typing import (
 
 from wcwidth import wcwidth
 
+from prompt_toolkit.cache import register_cache
+
 __all__ = [
     "Event",
     "DummyContext",
@@ -136,8 +138,10 @@ class _CharSizesCache(Dict[str, int]):
         super().__init__()
         # Keep track of the "long" strings in this cache.
         self._long_strings: deque[str] = deque()
+        self.stats = register_cache(self, "_CharSizesCache")
 
     def __missing__(self, string: str) -> int:
+        self.stats.misses += 1
         # Note: We use the `max(0, ...` because some non printable control
         #       characters, like e.g. Ctrl-underscore get a -1 wcwidth value.
         #       It can be possible that these characters end up in the input
@@ -145,6 +149,9 @@ class _CharSizesCache(Dict[str, int]):
         result: int
         if len(string) == 1:
             result = max(0, wcwidth(string))
+        elif string.isascii() and string.isprintable():
+            # Printable ASCII characters are all one cell wide.
+            result = len(string)
         else:
             result = sum(self[c] for c in string)
 
@@ -161,6 +168,7 @@ class _CharSizesCache(Dict[str, int]):
                 key_to_remove = long_strings.popleft()
                 if key_to_remove in self:
                     del self[key_to_remove]
+                    self.stats.evictions += 1
 
         return result
 
@@ -1,27 +1,47 @@
 from enum import Enum
-from typing import Union
+from typing import Iterable, Union
+
+# Registry state version, bumped on every registration or builder change so
+# views derived from the registries can be cached until something changes
+version = 0
+
+def touch():
+    global version
+    version += 1
+
+# Dense integer index for an ID, the same ID always gets the same index. Hot
+# paths key dictionaries or index lists by it instead of hashing the objects.
+def intern(indices: dict, ID: str) -> int:
+    index = indices.get(ID)
+    if index is None:
+        index = indices[ID] = len(indices)
+    return index
 
 class Item:
     Registry = {}
+    # ID -> index, see intern
+    Indices = {}
 
     def __init__(self, ID: str, name: str):
         self.ID = ID
         self.name = name
+        self.index = intern(Item.Indices, ID)
 
     def __repr__(self):
         return f"<Item: {self.name}>"
 
     def __eq__(self, other):
-        return isinstance(other, Item) and self.ID == other.ID
+        return self is other or (isinstance(other, Item) and self.index == other.index)
 
     def __hash__(self):
-        return hash(self.ID)
+        return self.index
 
     @classmethod
     def register(cls, ID: str, name: str):
         item = cls(ID, name)
         cls.Registry[ID] = item
         setattr(cls, ID.upper(), item)
+        touch()
         return item
 
     @classmethod
@@ -34,6 +54,7 @@ class Item:
 
 class Tool:
     Registry = {}
+    Indices = {}
 
     def __init__(self, ID: str, name: str):
         self.ID = ID
@@ -46,21 +67,23 @@ class Tool:
             raise TypeError(f"Tool ID must be a string: {ID}")
         if not isinstance(name, str):
             raise TypeError(f"Tool name must be a string: {name}")
+        self.index = intern(Tool.Indices, ID)
 
     def __repr__(self):
         return f"<Tool: {self.name} (Lvl {self.miningLevel})>"
 
     def __eq__(self, other):
-        return isinstance(other, Tool) and self.ID == other.ID
+        return self is other or (isinstance(other, Tool) and self.index == other.index)
 
     def __hash__(self):
-        return hash(self.ID)
+        return self.index
 
     @classmethod
     def register(cls, ID: str, name: str):
         tool = cls(ID, name)
         cls.Registry[ID] = tool
         setattr(cls, ID.upper(), tool)
+        touch()
         return ToolBuilder(tool)
 
     @classmethod
@@ -83,14 +106,17 @@ class ToolBuilder:
                 self.tool.costs.append(item)  # Already (Item, quantity)
             else:
                 self.tool.costs.append((item, 1))  # Single item, quantity 1
+        touch()
         return self
 
     def level(self, miningLevel: int):
         self.tool.miningLevel = miningLevel
+        touch()
         return self
 
     def timeFac(self, timeFac: float):
         self.tool.timeFac = timeFac
+        touch()
         return self
 
 DropRateEnum = Enum('DropRate', 'MIN MAX RATE')
@@ -122,11 +148,27 @@ class DropRates:
         else:
             raise ValueError(f"Invalid DropRateEnum value: {dropRate}")
 
+    # Items dropped by mining one block per draw (floats in [0, 1)): every extra
+    # drop above the minimum needs one more success, so a block drops more than
+    # _min + k items with a chance of rate^(k+1).
+    def roll(self, draws: Iterable[float]) -> int:
+        thresholds = [self.rate ** k for k in range(1, self._max - self._min + 1)]
+        total = 0
+        for draw in draws:
+            total += self._min
+            for threshold in thresholds:
+                if draw > threshold:
+                    break
+                total += 1
+        return total
+
 class Block:
     Registry = {}
+    Indices = {}
 
     def __init__(self, ID: str):
         self.ID = ID
+        self.index = intern(Block.Indices, ID)
         self.dropItem = None
         self.miningLevel = 0
         self.miningTime = 1.0
@@ -136,16 +178,17 @@ class Block:
         return f"<Block: {self.ID} drops {self.dropItem.name} with min. mining level {self.miningLevel} and relative time {self.miningTime} seconds>"
 
     def __eq__(self, other):
-        return isinstance(other, Block) and self.ID == other.ID
+        return self is other or (isinstance(other, Block) and self.index == other.index)
 
     def __hash__(self):
-        return hash(self.ID)
+        return self.index
 
     @classmethod
     def register(cls, ID: str):
         block = cls(ID)
         cls.Registry[ID] = block
         setattr(cls, ID.upper(), block)
+        touch()
         return BlockBuilder(block)
 
     @classmethod
@@ -173,25 +216,31 @@ class BlockBuilder:
 
     def drops(self, dropItem: Item):
         self.block.dropItem = dropItem
+        touch()
         return self
 
     def level(self, miningLevel: int):
         self.block.miningLevel = miningLevel
+        touch()
         return self
 
     def time(self, miningTime: float):
         self.block.miningTime = miningTime
+        touch()
         return self
 
     def rates(self, _min: int, _max: int, rate: float):
         self.block.dropRates = DropRates(_min, _max, rate)
+        touch()
         return self
 
 class Recipe:
     Registry = {}
+    Indices = {}
 
     def __init__(self, ID: str): # inputs and outputs are lists of tuples (Item, quantity) or just one tuple
         self.ID = ID
+        self.index = intern(Recipe.Indices, ID)
         self.inputs = []
         self.outputs = []
         self.time = 1.0 # in seconds
@@ -204,6 +253,7 @@ class Recipe:
         recipe = cls(ID)
         cls.Registry[ID] = recipe
         setattr(cls, ID.upper(), recipe)
+        touch()
         return RecipeBuilder(recipe)
 
     @classmethod
@@ -226,6 +276,7 @@ class RecipeBuilder:
             else:
                 normalized.append((inp, 1))
         self.recipe.inputs = normalized
+        touch()
         return self
 
     def outputs(self, outputs: list[Union[Item, tuple[Item, int]]]):
@@ -236,10 +287,12 @@ class RecipeBuilder:
             else:
                 normalized.append((out, 1))
         self.recipe.outputs = normalized
+        touch()
         return self
     
     def time(self, time: float = 1.0):
         self.recipe.time = time
+        touch()
         return self
 
 class ResearchPoint:
@@ -269,6 +322,7 @@ class ResearchPoint:
         rp = cls(ID, name)
         cls.Registry[ID] = rp
         setattr(cls, ID.upper(), rp)
+        touch()
         return ResearchBuilder(rp)  # << Here the builder is given back
 
     @classmethod
@@ -298,18 +352,22 @@ class ResearchBuilder:
     def costs(self, items: list[tuple[Item, int]] = [], money: int = 0):
         self.researchPoint.costsItems = items
         self.researchPoint.costsMoney = money
+        touch()
         return self
 
     def blocks(self, blocks: list[Block]):
         self.researchPoint.blocks.extend(blocks)
+        touch()
         return self
 
     def tools(self, tools: list[Tool]):
         self.researchPoint.tools.extend(tools)
+        touch()
         return self
 
     def recipes(self, recipes: list[Recipe]):
         self.researchPoint.recipes.extend(recipes)
+        touch()
         return self
 
 #Item.register("<id>", "<name>")
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import json
+import time
+from typing import List, Optional
+
+import main as game
+from main import Player, gameOutput, realTime, runCommand
+from market import Market
+
+# Recording and replaying of game sessions. A command log stores the player's
+# name, the seed of their random streams and every command they typed, which is
+# enough to play the session again: same seed, same commands, same game.
+# Replays skip all waiting and throw the output away, so they run as fast as the
+# game logic allows. The state at the end of the recording is stored as well,
+# a replay that ends somewhere else means the game logic changed.
+#
+# Record with 'python main.py --record session.log', replay with
+# 'python replay.py session.log' (add --repeat 20 to benchmark it).
+#
+# Log format, one line each:
+#   {"version": 1, "name": "...", "seed": 123}   header
+#   mine coal 5                                  commands, as typed
+#   = {"tool": "...", "money": 0, "items": {}}   state at the end
+
+class CommandLog:
+    version = 1
+
+    def __init__(self, name: str, seed: int, commands: Optional[List[str]] = None, state: Optional[dict] = None):
+        self.name = name
+        self.seed = seed
+        self.commands = commands if commands is not None else []
+        self.state = state
+
+    def record(self, command: str):
+        self.commands.append(command)
+
+    def save(self, path: str, player: Optional[Player] = None):
+        if player is not None:
+            self.state = snapshot(player)
+        lines = [json.dumps({"version": self.version, "name": self.name, "seed": self.seed})]
+        lines.extend(self.commands)
+        if self.state is not None:
+            lines.append("= " + json.dumps(self.state, sort_keys=True))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+    @classmethod
+    def load(cls, path: str) -> "CommandLog":
+        with open(path, encoding="utf-8") as f:
+            lines = f.read().splitlines()
+        header = json.loads(lines[0])
+        if header.get("version") != cls.version:
+            raise ValueError(f"Unsupported command log version: {header.get('version')}")
+        state = None
+        if len(lines) > 1 and lines[-1].startswith("= "):
+            state = json.loads(lines.pop()[2:])
+        return cls(header["name"], header["seed"], lines[1:], state)
+
+# The parts of a player that commands change
+def snapshot(player: Player) -> dict:
+    items = {}
+    for slot in player.inventory.slots:
+        items[slot["item"].ID] = items.get(slot["item"].ID, 0) + slot["count"]
+    return {"tool": player.tool.ID, "money": player.money, "items": dict(sorted(items.items()))}
+
+# Swallows all game output of a replay
+class NullOutput:
+    def write(self, text: str) -> int:
+        return len(text)
+
+    def flush(self):
+        pass
+
+# Plays the log on a fresh player, without waiting and without output
+async def replay(commandLog: CommandLog) -> Player:
+    gameOutput.set(NullOutput())
+    realTime.set(False)
+    # Nobody else trades in a replay
+    game.market = Market()
+    player = Player(commandLog.name, commandLog.seed)
+    for command in commandLog.commands:
+        if not await runCommand(player, command):
+            break
+    return player
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded ZarsianX session.")
+    parser.add_argument("log", help="Command log written by 'python main.py --record <log>'")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay the log this often and report the time per replay")
+    args = parser.parse_args()
+
+    commandLog = CommandLog.load(args.log)
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        player = asyncio.run(replay(commandLog))
+    elapsed = (time.perf_counter() - start) / args.repeat
+
+    print(f"Replayed {len(commandLog.commands)} commands in {elapsed * 1000:.2f} ms "
+          f"({len(commandLog.commands) / elapsed:.0f} commands/s)")
+    if commandLog.state is not None:
+        state = snapshot(player)
+        if state != commandLog.state:
+            print(f"Replay diverged from the recording:\n  recorded {commandLog.state}\n  replayed {state}")
+            raise SystemExit(1)
+        print("Final state matches the recording.")
+
+if __name__ == "__main__":
+    main()
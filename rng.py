@@ -0,0 +1,58 @@
+import random
+from typing import Dict, List, Optional, Sequence
+
+# Seeded random numbers for the game. Every player owns a RandomService with one
+# seed, which hands out independent streams by name ("mining", "text", ...), so
+# adding draws to one system never shifts the numbers of another. Streams draw
+# their numbers in blocks, which keeps the per-draw cost low for bulk users like
+# mining and automation.
+
+class RandomStream:
+    def __init__(self, seed=None, blockSize: int = 1024):
+        self._random = random.Random(seed)
+        self.blockSize = blockSize
+        self._block: List[float] = []
+        self._index = 0
+
+    def _refill(self, n: int):
+        draw = self._random.random
+        rest = self._block[self._index:]
+        self._block = rest + [draw() for _ in range(max(n, self.blockSize) - len(rest))]
+        self._index = 0
+
+    # Next float in [0.0, 1.0)
+    def random(self) -> float:
+        if self._index >= len(self._block):
+            self._refill(1)
+        value = self._block[self._index]
+        self._index += 1
+        return value
+
+    # Next n floats in [0.0, 1.0) at once
+    def floats(self, n: int) -> List[float]:
+        if self._index + n > len(self._block):
+            self._refill(n)
+        start = self._index
+        self._index += n
+        return self._block[start:self._index]
+
+    def choice(self, seq: Sequence):
+        return seq[int(self.random() * len(seq))]
+
+    # Random element for every draw, e.g. one character per letter
+    def choices(self, seq: Sequence, n: int) -> list:
+        size = len(seq)
+        return [seq[int(u * size)] for u in self.floats(n)]
+
+class RandomService:
+    def __init__(self, seed: Optional[int] = None):
+        # Without a seed every game is different, the seed is kept so it can be replayed
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.streams: Dict[str, RandomStream] = {}
+
+    # Stream for one part of the game, derived from the seed and its name
+    def stream(self, name: str) -> RandomStream:
+        stream = self.streams.get(name)
+        if stream is None:
+            stream = self.streams[name] = RandomStream(f"{self.seed}:{name}")
+        return stream
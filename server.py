@@ -0,0 +1,64 @@
+import argparse
+import asyncio
+import logging
+
+from prompt_toolkit.contrib.telnet.server import TelnetConnection, TelnetServer
+from prompt_toolkit.shortcuts import PromptSession
+
+from colors import cachedGradientText
+from main import Player, asciiArtLogo, createSession, gameOutput, play, renderWelcome, say
+from world import World
+
+# Multiplayer ZarsianX: every telnet connection is one pioneer with its own Player,
+# all of them share the registries, the market and the planet's deposits and run
+# in one event loop.
+# Start with 'python server.py --port 2323' and connect with 'telnet localhost 2323'.
+
+logger = logging.getLogger("zarsianx.server")
+
+# Names of the pioneers that are currently connected
+pioneers: list[str] = []
+
+# The planet all pioneers mine on, what one of them mines is gone for the others
+world = World()
+
+async def interact(connection: TelnetConnection):
+    # Everything the game prints for this connection goes to its socket
+    gameOutput.set(connection.stdout)
+
+    say(cachedGradientText(asciiArtLogo, ("#FBC2EB", "#A6C1EE"), "lr"))
+    try:
+        name = (await PromptSession().prompt_async("\nWhat's your name again? # ")).strip()
+    except (KeyboardInterrupt, EOFError):
+        return
+    player = Player(name or "pioneer", world=world)
+    say(renderWelcome(player))
+
+    pioneers.append(player.name)
+    logger.info("%s joined from %s:%s (%d online)", player.name, *connection.addr, len(pioneers))
+    try:
+        await play(player, createSession(player))
+    finally:
+        pioneers.remove(player.name)
+        logger.info("%s left (%d online)", player.name, len(pioneers))
+
+def createServer(host: str = "127.0.0.1", port: int = 2323) -> TelnetServer:
+    # No cursor position requests: they cost a round trip for every prompt.
+    # A large backlog, so hundreds of pioneers can connect at the same time.
+    return TelnetServer(host=host, port=port, interact=interact, enable_cpr=False, backlog=512)
+
+def main():
+    parser = argparse.ArgumentParser(description="Run ZarsianX as a telnet server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2323)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    logger.info("ZarsianX server listening on %s:%d", args.host, args.port)
+    try:
+        asyncio.run(createServer(args.host, args.port).run())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
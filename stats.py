@@ -0,0 +1,97 @@
+import time
+from typing import Callable, Dict, List, Optional
+
+from registry import Item
+
+# Production statistics: how many items of each kind were produced and consumed,
+# over the last minute by the second, the last hour by the minute and the last
+# day by the hour. Every resolution is a fixed-size ring buffer, so memory stays
+# the same however long a session runs. Events only go into the finest ring;
+# when one of its buckets is complete, its sum moves on to the next coarser ring,
+# which is how older data gets downsampled.
+
+# Name -> (seconds per bucket, buckets), finest first
+resolutions = {
+    "second": (1, 60),
+    "minute": (60, 60),
+    "hour": (3600, 24),
+}
+
+class TimeSeries:
+    __slots__ = ("steps", "values", "buckets")
+
+    def __init__(self):
+        self.steps = [step for step, _ in resolutions.values()]
+        self.values = [[0] * size for _, size in resolutions.values()]
+        # Newest bucket number of every level, None while empty
+        self.buckets: List[Optional[int]] = [None] * len(self.steps)
+
+    def add(self, now: float, amount: int, level: int = 0):
+        bucket = int(now // self.steps[level])
+        values = self.values[level]
+        size = len(values)
+        current = self.buckets[level]
+        if bucket != current:
+            if current is not None:
+                # The newest bucket is complete: hand its sum to the coarser level
+                if level + 1 < len(self.steps):
+                    self.add(current * self.steps[level], values[current % size], level + 1)
+                # Buckets that were skipped or wrap around start at zero
+                for skipped in range(current + 1, min(bucket, current + size) + 1):
+                    values[skipped % size] = 0
+            self.buckets[level] = bucket
+        values[bucket % size] += amount
+
+    # Sums of the last buckets of a level, oldest first, the last one contains now
+    def series(self, level: int, now: float) -> List[int]:
+        step = self.steps[level]
+        values = self.values[level]
+        size = len(values)
+        end = int(now // step)
+        first = end - size + 1
+        current = self.buckets[level]
+
+        result = [0] * size
+        if current is not None:
+            for bucket in range(max(first, current - size + 1), min(end, current) + 1):
+                result[bucket - first] = values[bucket % size]
+        # The newest buckets of the finer levels haven't been handed up yet
+        for finer in range(level):
+            newest = self.buckets[finer]
+            if newest is not None:
+                bucket = newest * self.steps[finer] // step
+                if first <= bucket <= end:
+                    result[bucket - first] += self.values[finer][newest % len(self.values[finer])]
+        return result
+
+class ProductionStats:
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.produced: Dict[Item, TimeSeries] = {}
+        self.consumed: Dict[Item, TimeSeries] = {}
+
+    def record(self, item: Item, produced: int = 0, consumed: int = 0):
+        now = self.clock()
+        if produced:
+            series = self.produced.get(item)
+            if series is None:
+                series = self.produced[item] = TimeSeries()
+            series.add(now, produced)
+        if consumed:
+            series = self.consumed.get(item)
+            if series is None:
+                series = self.consumed[item] = TimeSeries()
+            series.add(now, consumed)
+
+    # Produced (or consumed) amounts of an item per bucket of the resolution, oldest first
+    def series(self, item: Item, resolution: str = "minute", kind: str = "produced") -> List[int]:
+        if resolution not in resolutions:
+            raise ValueError(f"Resolution must be one of: {', '.join(resolutions)}")
+        level = list(resolutions).index(resolution)
+        series = (self.produced if kind == "produced" else self.consumed).get(item)
+        if series is None:
+            return [0] * resolutions[resolution][1]
+        return series.series(level, self.clock())
+
+    def items(self) -> List[Item]:
+        return sorted(set(self.produced) | set(self.consumed), key=lambda item: item.name.lower())
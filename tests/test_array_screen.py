@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import io
+
+import pytest
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.input import DummyInput
+from prompt_toolkit.layout import Float, FloatContainer, HSplit, Layout, Window
+from prompt_toolkit.layout.controls import FormattedTextControl
+from prompt_toolkit.output.vt100 import Vt100_Output
+from prompt_toolkit.shortcuts import PromptSession
+from prompt_toolkit.widgets import Frame
+
+
+def _render(array_screen: bool, full_screen: bool) -> list[list[list[str]]]:
+    """
+    Render a few frames and return the visible cells of each of them.
+    (The output itself can differ: for rows with content beyond the right
+    edge, `Screen` also writes the trailing blanks.)
+    """
+    stdout = io.StringIO()
+    output = Vt100_Output(
+        stdout, lambda: Size(rows=12, columns=40), term="xterm-256color"
+    )
+    app: Application[None] = Application(
+        output=output, full_screen=full_screen, array_screen=array_screen
+    )
+    text = FormattedTextControl(
+        lambda: [("fg:red", f"tick {app.render_counter}\n"), ("", "iron " * 12)]
+    )
+    app.layout = Layout(
+        FloatContainer(
+            HSplit([Frame(Window(text)), Window(height=1, style="reverse")]),
+            # Sticking out of the terminal on the left and far on the right.
+            floats=[
+                Float(Window(FormattedTextControl("float")), top=2, left=-3),
+                Float(
+                    Window(FormattedTextControl("wide " * 30)),
+                    top=4,
+                    left=30,
+                    width=150,
+                ),
+            ],
+        )
+    )
+
+    frames = []
+    with set_app(app):
+        for _ in range(3):
+            app.render_counter += 1
+            app.renderer.render(app, app.layout)
+            screen = app.renderer._last_screen
+            assert screen is not None
+            frames.append(
+                [
+                    [f"{screen.data_buffer[y][x]!r}" for x in range(40)]
+                    for y in range(screen.height)
+                ]
+            )
+    return frames
+
+
+@pytest.mark.parametrize("full_screen", [True, False])
+def test_array_screen_renders_like_screen(full_screen):
+    assert _render(True, full_screen) == _render(False, full_screen)
+
+
+def test_array_screen_option():
+    assert Application(array_screen=True).renderer.array_screen
+    assert not Application().renderer.array_screen
+
+    session: PromptSession[str] = PromptSession(
+        array_screen=True,
+        input=DummyInput(),
+        output=Vt100_Output(io.StringIO(), lambda: Size(rows=12, columns=40)),
+    )
+    assert session.app.renderer.array_screen
@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+from prompt_toolkit.cache import FastDictCache, SimpleCache, count_cache_hits
+
+
+def _size_one(key, value):
+    return 1
+
+
+def test_simple_cache_fifo():
+    cache: SimpleCache[int, int] = SimpleCache(maxsize=2)
+    cache.get(1, lambda: 1)
+    cache.get(2, lambda: 2)
+    cache.get(1, lambda: -1)  # A hit doesn't keep it.
+    cache.get(3, lambda: 3)
+
+    assert cache.get(1, lambda: -1) == -1
+    assert cache.stats.evictions == 2
+
+
+def test_simple_cache_lru():
+    cache: SimpleCache[int, int] = SimpleCache(maxsize=2, policy="lru")
+    cache.get(1, lambda: 1)
+    cache.get(2, lambda: 2)
+    cache.get(1, lambda: -1)
+    cache.get(3, lambda: 3)
+
+    assert cache.get(1, lambda: -1) == 1
+    assert cache.get(2, lambda: -2) == -2
+
+
+def test_simple_cache_maxbytes():
+    cache: SimpleCache[int, str] = SimpleCache(
+        maxsize=100, maxbytes=10, getsizeof=lambda key, value: len(value)
+    )
+    cache.get(1, lambda: "aaaa")
+    cache.get(2, lambda: "bbbb")
+    cache.get(3, lambda: "cccc")
+
+    assert len(cache) == 2
+    assert cache.nbytes == 8
+
+    # Keeps the newest item, even when it's larger than the bound.
+    cache.get(4, lambda: "d" * 20)
+    assert len(cache) == 1
+    assert cache.nbytes == 20
+
+
+def test_fast_dict_cache_fifo():
+    cache = FastDictCache(lambda x: x * 2, size=3)
+    assert [cache[x,] for x in range(5)] == [0, 2, 4, 6, 8]
+    assert sorted(cache) == [(2,), (3,), (4,)]
+    assert cache.stats.misses == 5
+    assert cache.stats.evictions == 2
+
+
+def test_fast_dict_cache_fifo_stale_keys():
+    cache = FastDictCache(lambda x: x, size=3)
+    cache[1,], cache[2,], cache[3,]
+
+    # Deleting and adding the key again leaves a stale entry for it in the
+    # queue, which must not evict the new one.
+    del cache[1,]
+    cache[1,]
+    cache[4,]
+    assert sorted(cache) == [(1,), (3,), (4,)]
+
+    cache[5,]
+    assert sorted(cache) == [(1,), (4,), (5,)]
+
+
+def test_fast_dict_cache_fifo_stale_keys_dont_pile_up():
+    cache = FastDictCache(lambda x: x, size=10)
+    for i in range(1000):
+        cache[i,]
+        del cache[i,]
+
+    assert len(cache) == 0
+    assert len(cache._keys) <= 2 * len(cache) + 65
+
+
+def test_fast_dict_cache_lru_generations():
+    cache = FastDictCache(lambda x: x, size=4, policy="lru")
+    cache[1,], cache[2,]  # Fills the current generation (size / 2).
+    cache[3,]  # 1 and 2 become the old generation.
+    assert cache.cache_size() == 3
+    assert (1,) in cache
+
+    cache[1,]  # Moves 1 back into the current generation.
+    cache[4,]  # Discards 2.
+    assert (2,) not in cache
+    assert (1,) in cache
+    assert cache.stats.misses == 4
+    assert cache.stats.hits == 1
+
+
+def test_fast_dict_cache_lru_maxbytes():
+    cache = FastDictCache(
+        lambda x: x, size=100, policy="lru", maxbytes=6, getsizeof=_size_one
+    )
+    for i in range(4):
+        cache[i,]
+
+    # Generations of at most 3 bytes.
+    assert dict(cache) == {(3,): 3}
+    assert cache._old == {(0,): 0, (1,): 1, (2,): 2}
+    assert cache.nbytes == 1
+
+
+def test_fast_dict_cache_lru_delete():
+    cache = FastDictCache(
+        lambda x: x, size=100, policy="lru", maxbytes=6, getsizeof=_size_one
+    )
+    for i in range(4):
+        cache[i,]
+
+    del cache[3,]  # Current generation.
+    assert cache.nbytes == 0
+    del cache[0,]  # Old generation.
+    assert (0,) not in cache
+    assert cache.cache_size() == 2
+
+    # The deleted item doesn't count towards the bound anymore.
+    cache[4,], cache[5,], cache[6,]
+    assert dict(cache) == {(4,): 4, (5,): 5, (6,): 6}
+
+
+def test_fast_dict_cache_counts_old_generation_hit_once():
+    cache = FastDictCache(lambda x: x, size=2, policy="lru")
+    cache[1,], cache[2,]
+    count_cache_hits(True)
+    try:
+        cache[1,]
+        cache[1,]
+    finally:
+        count_cache_hits(False)
+    assert cache.stats.hits == 2
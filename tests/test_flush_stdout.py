@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import io
+import os
+import sys
+
+import pytest
+
+from prompt_toolkit.output import flush_stdout as module
+from prompt_toolkit.output.flush_stdout import flush_stdout
+
+TEXT = "⊛ Done ┌──┐\x1b[0m\r\n"
+
+
+@pytest.fixture
+def pipe():
+    read_fd, write_fd = os.pipe()
+    stdout = io.TextIOWrapper(
+        io.BufferedWriter(io.FileIO(write_fd, "w")), encoding="utf-8"
+    )
+    yield read_fd, stdout
+    stdout.close()
+    os.close(read_fd)
+
+
+def _record_direct_writes(monkeypatch):
+    writes = []
+    write_all = module._write_all
+
+    def record(fd, data):
+        writes.append(data)
+        write_all(fd, data)
+
+    monkeypatch.setattr(module, "_write_all", record)
+    return writes
+
+
+def test_pipe_is_written_directly(pipe, monkeypatch):
+    read_fd, stdout = pipe
+    writes = _record_direct_writes(monkeypatch)
+
+    stdout.write("before ")
+    flush_stdout(stdout, TEXT)
+
+    assert writes == [TEXT.encode("utf-8")]
+    assert os.read(read_fd, 1000).decode("utf-8") == "before " + TEXT
+
+
+def test_no_direct_write_on_windows(pipe, monkeypatch):
+    read_fd, stdout = pipe
+    writes = _record_direct_writes(monkeypatch)
+    monkeypatch.setattr(sys, "platform", "win32")
+
+    flush_stdout(stdout, TEXT)
+
+    assert writes == []
+    assert os.read(read_fd, 1000).decode("utf-8") == TEXT
+
+
+def test_stream_without_fd(monkeypatch):
+    writes = _record_direct_writes(monkeypatch)
+    buffer = io.BytesIO()
+    stdout = io.TextIOWrapper(buffer, encoding="utf-8")
+
+    flush_stdout(stdout, TEXT)
+
+    assert writes == []
+    assert buffer.getvalue().decode("utf-8") == TEXT
+
+
+def test_text_stream():
+    stdout = io.StringIO()
+    flush_stdout(stdout, TEXT)
+    assert stdout.getvalue() == TEXT
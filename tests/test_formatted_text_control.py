@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+import random
+
+import pytest
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.data_structures import Point
+from prompt_toolkit.formatted_text.utils import split_lines
+from prompt_toolkit.layout.controls import FormattedTextControl, _FragmentLines
+
+
+def _handler(mouse_event):
+    return None
+
+
+def _random_fragments(rng: random.Random):
+    texts = ["", "\n", "coal", "iron\n", "\nsmelt", "a\n\nb", "\n\n", "x"]
+    styles = ["", "class:a", "class:b [SetCursorPosition]", "[SetMenuPosition]"]
+    fragments = []
+    for _ in range(rng.randint(0, 20)):
+        fragment = (rng.choice(styles), rng.choice(texts))
+        if rng.random() < 0.3:
+            fragment += (_handler,)
+        fragments.append(fragment)
+    return fragments
+
+
+def _find_style(lines, style):
+    # How `FormattedTextControl` found the markers before `_FragmentLines`.
+    for y, line in enumerate(lines):
+        x = 0
+        for style_str, text, *_ in line:
+            if style in style_str:
+                return Point(x=x, y=y)
+            x += len(text)
+    return None
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_fragment_lines_like_split_lines(seed):
+    fragments = _random_fragments(random.Random(seed))
+    expected = list(split_lines(fragments))
+    lines = _FragmentLines(fragments)
+
+    assert len(lines) == len(expected)
+    # Lines with mouse handlers first, so that the cache can't answer.
+    assert [lines.get_line(i, mouse_handlers=True) for i in range(len(lines))] == (
+        expected
+    )
+    without_handlers = [[fragment[:2] for fragment in line] for line in expected]
+    assert [lines.get_line(i) for i in range(len(lines))] == without_handlers
+    for style in ("[SetCursorPosition]", "[SetMenuPosition]", "class:a"):
+        assert lines.find_style(style) == _find_style(expected, style)
+
+
+def test_content_cache():
+    fragments = [("", "coal\niron")]
+    control = FormattedTextControl(lambda: fragments)
+    app: Application[None] = Application()
+
+    with set_app(app):
+        content = control.create_content(40, 10)
+        assert control.create_content(40, 10) is content
+        assert control.create_content(20, 10) is not content
+
+        # Equal fragments in a new list: taken from the cache.
+        app.render_counter += 1
+        fragments = [("", "coal\niron")]
+        assert control.create_content(40, 10) is content
+
+        # The same list, changed in place.
+        app.render_counter += 1
+        fragments.append(("", "\nsteel"))
+        changed = control.create_content(40, 10)
+        assert changed.line_count == 3
+        assert changed.get_line(2) == [("", "steel")]
@@ -0,0 +1,65 @@
+import pytest
+
+from auto import Belt, Connection, Constructor, LocID, Storage
+from registry import Item, Recipe
+
+
+def test_processing_uses_up_the_inputs():
+    storage = Storage(Item.RAW_IRON, LocID("here"))
+    storage.add(3)
+    constructor = Constructor(Recipe.IRON_INGOT, LocID("here"))
+    constructor.inputs = [Connection(storage, constructor, Item.RAW_IRON)]
+    ((raw, needed),) = Recipe.IRON_INGOT.inputs
+    ((ingot, made),) = Recipe.IRON_INGOT.outputs
+
+    constructor.inventory[raw] = needed
+    constructor.process()
+    assert constructor.inventory[raw] == 1
+    assert constructor.inventory[ingot] == made
+    assert storage.inventory[raw] == 2
+
+
+def test_produce_without_inputs_raises():
+    constructor = Constructor(Recipe.IRON_INGOT, LocID("here"))
+    with pytest.raises(KeyError, match="raw_iron"):
+        constructor.produce()
+    assert constructor.inventory == {}
+
+
+@pytest.mark.parametrize("speed, capacity", [(0, 4), (-1.0, 4), (1.0, 0), (1.0, -2)])
+def test_belt_needs_speed_and_capacity(speed, capacity):
+    with pytest.raises(ValueError):
+        Belt(None, None, Item.RAW_IRON, tiles=3, speed=speed, capacity=capacity)
+
+
+def test_belts_move_with_the_machine_they_feed():
+    storage = Storage(Item.RAW_IRON, LocID("here"))
+    storage.add(100)
+    constructor = Constructor(Recipe.IRON_INGOT, LocID("here"))
+    Belt(storage, constructor, Item.RAW_IRON, tiles=3, capacity=2).plug()
+
+    # Nothing arrives until the items traveled the three tiles
+    for _ in range(3):
+        constructor.process()
+        assert constructor.inventory.get(Item.IRON_INGOT, 0) == 0
+    for tick in range(1, 4):
+        constructor.process()
+        assert constructor.inventory[Item.IRON_INGOT] == tick
+    assert storage.inventory[Item.RAW_IRON] == 100 - 2 * 6
+
+
+def test_storage_takes_in_what_its_belts_deliver():
+    source = Storage(Item.RAW_IRON, LocID("here"))
+    target = Storage(Item.RAW_IRON, LocID("there"))
+    source.add(5)
+    Belt(source, target, Item.RAW_IRON, tiles=1, capacity=4).plug()
+
+    target.process()
+    target.process()
+    target.process()
+    assert (source.inventory[Item.RAW_IRON], target.inventory[Item.RAW_IRON]) == (0, 5)
+
+    target.pause()
+    source.add(4)
+    target.process()
+    assert target.inventory[Item.RAW_IRON] == 5
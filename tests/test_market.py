@@ -0,0 +1,113 @@
+import pytest
+
+from main import Player
+from market import BUY, SELL, Market, Order, OrderBook
+from registry import Item
+
+
+def order(id, side, price, quantity):
+    return Order(id, None, Item.COAL, side, price, quantity)
+
+
+def trader(name, money=0, coal=0):
+    player = Player(name, seed=1)
+    player.money = money
+    if coal:
+        player.inventory.addItem(Item.COAL, coal)
+    return player
+
+
+def test_best_price_first_then_oldest():
+    book = OrderBook(Item.COAL)
+    for id, price in enumerate([12, 10, 11, 10], 1):
+        book.submit(order(id, SELL, price, 5))
+
+    fills = book.submit(order(5, BUY, 11, 12))
+
+    assert [(fill.sell.id, fill.price, fill.quantity) for fill in fills] == [(2, 10, 5), (4, 10, 5), (3, 11, 2)]
+    assert [(resting.id, resting.remaining) for resting in book.depth(SELL)] == [(3, 3), (1, 5)]
+    assert book.depth(BUY) == []
+
+
+def test_rest_of_an_order_waits_in_the_book():
+    book = OrderBook(Item.COAL)
+    book.submit(order(1, BUY, 9, 5))
+    book.submit(order(2, BUY, 10, 5))
+
+    fills = book.submit(order(3, SELL, 10, 8))
+
+    # Only the bid at 10 crosses, the rest of the sell order waits at 10
+    assert [(fill.buy.id, fill.price, fill.quantity) for fill in fills] == [(2, 10, 5)]
+    assert [(resting.id, resting.remaining) for resting in book.depth(SELL)] == [(3, 3)]
+    assert book.best(BUY).id == 1
+
+
+def test_cancelled_orders_are_skipped():
+    book = OrderBook(Item.COAL)
+    cheap = order(1, SELL, 5, 5)
+    book.submit(cheap)
+    book.submit(order(2, SELL, 6, 5))
+    cheap.remaining = 0
+
+    fills = book.submit(order(3, BUY, 10, 5))
+
+    assert [fill.sell.id for fill in fills] == [2]
+    assert book.best(SELL) is None
+
+
+def test_posting_puts_goods_in_escrow():
+    market = Market()
+    seller = trader("seller", coal=10)
+    buyer = trader("buyer", money=100)
+
+    assert market.sell(seller, Item.COAL, 4, 5) is not None
+    assert seller.inventory.totalItemsOf(Item.COAL) == 6
+
+    assert market.buy(buyer, Item.COAL, 10, 8) is not None
+    assert buyer.money == 20
+
+    # Not enough money or items: nothing is posted
+    assert market.buy(buyer, Item.COAL, 10, 8) is None
+    assert market.sell(seller, Item.COAL, 20, 5) is None
+    assert buyer.money == 20
+    assert seller.inventory.totalItemsOf(Item.COAL) == 6
+
+
+def test_settle_pays_sellers_and_refunds_buyers():
+    market = Market()
+    seller = trader("seller", coal=10)
+    buyer = trader("buyer", money=100)
+    market.sell(seller, Item.COAL, 4, 5)
+    bid = market.buy(buyer, Item.COAL, 10, 8)
+
+    assert market.settle() == 1
+
+    # Trades at the price of the waiting order: 4 at 5, 3 back per item
+    assert seller.money == 20
+    assert buyer.inventory.totalItemsOf(Item.COAL) == 4
+    assert buyer.money == 100 - 10 * 8 + 4 * 3
+    assert market.orders == {bid.id: bid}
+
+
+def test_cancel_returns_escrow():
+    market = Market()
+    seller = trader("seller", coal=10)
+    buyer = trader("buyer", money=100)
+    ask = market.sell(seller, Item.COAL, 4, 50)
+    bid = market.buy(buyer, Item.COAL, 10, 8)
+
+    assert market.cancel(ask)
+    assert market.cancel(bid)
+    assert not market.cancel(bid)
+
+    assert seller.inventory.totalItemsOf(Item.COAL) == 10
+    assert buyer.money == 100
+    assert market.book(Item.COAL).depth(BUY) == []
+    assert market.book(Item.COAL).depth(SELL) == []
+
+
+@pytest.mark.parametrize("side, quantity, price", [("swap", 1, 1), (BUY, 0, 1), (BUY, 1, -1)])
+def test_invalid_orders_are_rejected(side, quantity, price):
+    buyer = trader("buyer", money=100)
+    with pytest.raises(ValueError):
+        Market().post(buyer, Item.COAL, side, quantity, price)
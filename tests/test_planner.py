@@ -0,0 +1,110 @@
+import asyncio
+import io
+
+import pytest
+
+from main import Player, gameOutput, runCommand
+from planner import Planner, solveLP
+from registry import Item
+
+
+def approx(values):
+    return pytest.approx(values, abs=1e-7)
+
+
+def test_solve_lp_minimum():
+    # min x + y, x + 2y >= 4, 3x + y >= 6: the optimum is the corner (1.6, 1.2)
+    x = solveLP(
+        [1.0, 1.0], [({0: 1.0, 1: 2.0}, ">=", 4.0), ({0: 3.0, 1: 1.0}, ">=", 6.0)]
+    )
+    assert x == approx([1.6, 1.2])
+
+
+def test_solve_lp_equalities_and_negative_rhs():
+    # x - y = -2 is flipped to y - x = 2 internally
+    x = solveLP([1.0, 1.0], [({0: 1.0, 1: -1.0}, "=", -2.0), ({0: 1.0}, ">=", 1.0)])
+    assert x == approx([1.0, 3.0])
+
+
+def test_solve_lp_infeasible():
+    assert solveLP([1.0], [({0: 1.0}, "<=", 1.0), ({0: 1.0}, ">=", 2.0)]) is None
+    assert solveLP([1.0], [({0: 1.0}, "=", -1.0)]) is None
+
+
+def test_solve_lp_unbounded():
+    assert solveLP([-1.0], [({0: 1.0}, ">=", 1.0)]) is None
+
+
+def test_solve_lp_redundant_rows():
+    # The same equality twice (and a multiple of it) leaves an artificial
+    # variable in the basis at zero after phase 1
+    rows = [
+        ({0: 1.0, 1: 1.0}, "=", 2.0),
+        ({0: 1.0, 1: 1.0}, "=", 2.0),
+        ({0: 2.0, 1: 2.0}, "=", 4.0),
+    ]
+    x = solveLP([1.0, 2.0], rows)
+    assert x == approx([2.0, 0.0])
+
+
+def test_solve_lp_zero_rhs():
+    # Degenerate start: every basic variable is zero
+    x = solveLP([1.0, 1.0], [({0: 1.0, 1: -1.0}, "=", 0.0), ({0: 1.0}, "<=", 0.0)])
+    assert x == approx([0.0, 0.0])
+
+
+def test_solve_lp_no_rows():
+    assert solveLP([1.0, 2.0], []) == [0.0, 0.0]
+
+
+def test_solve_lp_does_not_cycle():
+    # Beale's example, which cycles with Dantzig's rule alone
+    costs = [-0.75, 20.0, -0.5, 6.0]
+    rows = [
+        ({0: 0.25, 1: -8.0, 2: -1.0, 3: 9.0}, "<=", 0.0),
+        ({0: 0.5, 1: -12.0, 2: -0.5, 3: 3.0}, "<=", 0.0),
+        ({2: 1.0}, "<=", 1.0),
+    ]
+    x = solveLP(costs, rows)
+    assert sum(c * v for c, v in zip(costs, x)) == pytest.approx(-1.25)
+
+
+@pytest.mark.parametrize("mode", ["balanced", "min-machines"])
+def test_plan_produces_the_target(mode):
+    plan = Planner().plan({Item.BRASS_INGOT: 60}, mode)
+
+    produced, consumed = plan.flows[Item.BRASS_INGOT]
+    assert produced - consumed == pytest.approx(60)
+    for item in plan.flows:
+        if mode == "balanced":
+            assert plan.surplus(item) == pytest.approx(0, abs=1e-6)
+        else:
+            assert plan.surplus(item) >= -1e-6
+
+
+def test_plan_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        Planner().plan({Item.BRASS_INGOT: 60}, "fastest")
+
+
+def runPlan(command):
+    output = io.StringIO()
+
+    async def run():
+        gameOutput.set(output)
+        await runCommand(Player("test", seed=1), command)
+
+    asyncio.run(run())
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("rate", ["fast", "0", "-5", "nan", "inf"])
+def test_plan_command_rejects_bad_rates(rate):
+    output = runPlan(f"plan brass_ingot {rate}")
+    assert f"'{rate}' is not a rate" in output
+    assert "Plan" not in output
+
+
+def test_plan_command_rates():
+    assert "2.5 Brass Ingot per minute" in runPlan("plan brass_ingot 2.5")
+    assert "60 Brass Ingot per minute" in runPlan("plan brass_ingot")
@@ -0,0 +1,97 @@
+import pytest
+
+from auto import Constructor, Generator, LocID
+from power import PowerGrid
+from registry import Recipe
+
+
+def constructor():
+    return Constructor(Recipe.IRON_INGOT, LocID("here"))
+
+
+def generator(output=10.0):
+    return Generator(output, LocID("here"))
+
+
+def test_connecting_merges_circuits():
+    grid = PowerGrid()
+    a, b, power = constructor(), constructor(), generator()
+    grid.connect(a, b)
+    grid.connect(b, power)
+
+    assert a.circuit is b.circuit is power.circuit
+    assert a.circuit.members == {a, b, power}
+    assert a.circuit.demand == 2 * a.powerUsage
+    assert a.circuit.supply == 10.0
+    assert len(grid.circuits()) == 1
+
+
+def test_short_supply_slows_every_machine_down():
+    grid = PowerGrid()
+    a, b = constructor(), constructor()
+    power = generator(a.powerUsage)  # Enough for one of them
+    grid.connect(a, power)
+    grid.connect(b, power)
+
+    assert a.powerRatio() == pytest.approx(0.5)
+    assert b.cycleTime() == pytest.approx(b.baseTime() * 2)
+
+
+def test_cutting_a_line_splits_the_circuit():
+    grid = PowerGrid()
+    a, b, c, power = constructor(), constructor(), constructor(), generator()
+    grid.connect(a, b)
+    grid.connect(b, c)
+    grid.connect(c, power)
+
+    grid.disconnect(b, c)
+
+    assert a.circuit is b.circuit
+    assert c.circuit is power.circuit
+    assert a.circuit is not c.circuit
+    assert a.circuit.supply == 0.0
+    assert a.powerRatio() == 0.0
+    assert c.powerRatio() == 1.0
+    assert len(grid.circuits()) == 2
+
+
+def test_cutting_a_loop_keeps_the_circuit():
+    grid = PowerGrid()
+    a, b, c = constructor(), constructor(), generator()
+    grid.connect(a, b)
+    grid.connect(b, c)
+    grid.connect(c, a)
+    circuit = a.circuit
+
+    grid.disconnect(a, b)
+
+    assert a.circuit is b.circuit is c.circuit is circuit
+    assert circuit.members == {a, b, c}
+
+
+def test_removing_a_machine_splits_its_neighbours():
+    grid = PowerGrid()
+    hub, a, b = generator(), constructor(), constructor()
+    grid.connect(hub, a)
+    grid.connect(hub, b)
+
+    grid.remove(hub)
+
+    assert hub.circuit is None
+    assert a.circuit is not b.circuit
+    assert a.circuit.members == {a}
+    assert len(grid.circuits()) == 2
+
+
+def test_paused_machines_draw_no_power():
+    grid = PowerGrid()
+    a, b, power = constructor(), constructor(), generator(constructor().powerUsage)
+    grid.connect(a, power)
+    grid.connect(b, power)
+
+    b.pause()
+    assert a.powerRatio() == 1.0
+    power.stop()
+    assert a.powerRatio() == 0.0
+    b.resume()
+    assert a.circuit.demand == 2 * a.powerUsage
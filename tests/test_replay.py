@@ -0,0 +1,61 @@
+import asyncio
+
+import main as game
+from main import Player, gameOutput, realTime, runCommand
+from market import Market
+from replay import CommandLog, NullOutput, replay, snapshot
+
+commands = [
+    "mine coal 20",
+    "mine iron 20",
+    "move 2 -2",
+    "mine coal 30",
+    "mine iron 30",
+    "mine copper 30",
+    "process iron_ingot 5",
+    "sell coal 5 2",
+    "inventory",
+    "plan iron_ingot",
+]
+
+
+def record(name, seed):
+    commandLog = CommandLog(name, seed)
+
+    async def play():
+        # Played like replay() plays it, recording every command
+        gameOutput.set(NullOutput())
+        realTime.set(False)
+        game.market = Market()
+        player = Player(name, seed)
+        for command in commands:
+            commandLog.record(command)
+            await runCommand(player, command)
+        return player
+
+    return commandLog, asyncio.run(play())
+
+
+def test_replay_reproduces_the_recording(tmp_path):
+    commandLog, player = record("testable", 12345)
+    path = tmp_path / "session.log"
+    commandLog.save(str(path), player)
+    assert snapshot(player)["items"]
+
+    loaded = CommandLog.load(str(path))
+    assert (loaded.name, loaded.seed, loaded.commands) == ("testable", 12345, commands)
+    assert loaded.state == snapshot(player)
+    assert snapshot(asyncio.run(replay(loaded))) == loaded.state
+
+
+def test_other_seed_other_game():
+    commandLog, player = record("testable", 12345)
+    commandLog.seed = 54321
+    assert snapshot(asyncio.run(replay(commandLog))) != snapshot(player)
+
+
+def test_log_without_state(tmp_path):
+    path = tmp_path / "session.log"
+    CommandLog("pioneer", 7, ["inventory"]).save(str(path))
+    loaded = CommandLog.load(str(path))
+    assert (loaded.commands, loaded.state) == (["inventory"], None)
@@ -0,0 +1,42 @@
+from rng import RandomService, RandomStream
+
+
+def test_same_seed_and_name_same_numbers():
+    a = RandomService(42).stream("mining")
+    b = RandomService(42).stream("mining")
+    assert [a.random() for _ in range(10)] + a.floats(2000) == [b.random() for _ in range(10)] + b.floats(2000)
+
+
+def test_streams_are_independent():
+    service = RandomService(42)
+    expected = RandomService(42).stream("mining").floats(5)
+
+    # Draws from another stream don't shift the numbers of this one
+    service.stream("text").floats(3000)
+    assert service.stream("mining").floats(5) == expected
+    assert service.stream("text") is service.stream("text")
+
+
+def test_different_seeds_and_names_differ():
+    assert RandomService(1).stream("mining").floats(5) != RandomService(2).stream("mining").floats(5)
+    assert RandomService(1).stream("mining").floats(5) != RandomService(1).stream("text").floats(5)
+
+
+def test_block_size_doesnt_change_the_numbers():
+    small = RandomStream("seed", blockSize=3)
+    large = RandomStream("seed", blockSize=1024)
+    drawn = [small.random(), *small.floats(5), small.random(), *small.floats(10)]
+    assert drawn == large.floats(len(drawn))
+    assert all(0.0 <= value < 1.0 for value in drawn)
+
+
+def test_choices():
+    stream = RandomService(7).stream("text")
+    letters = stream.choices("abc", 100)
+    assert set(letters) <= set("abc")
+    assert stream.choice("xyz") in "xyz"
+
+
+def test_without_seed_a_seed_is_chosen_and_kept():
+    service = RandomService()
+    assert RandomService(service.seed).stream("mining").floats(3) == service.stream("mining").floats(3)
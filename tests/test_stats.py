@@ -0,0 +1,74 @@
+import pytest
+
+from registry import Item
+from stats import ProductionStats, TimeSeries, resolutions
+
+SECOND, MINUTE, HOUR = range(3)
+
+
+def test_events_add_up_in_their_bucket():
+    series = TimeSeries()
+    series.add(10.2, 3)
+    series.add(10.9, 4)
+    series.add(12.0, 1)
+
+    seconds = series.series(SECOND, 12.5)
+    assert seconds[-1] == 1
+    assert seconds[-3] == 7
+    assert sum(seconds) == 8
+
+
+def test_complete_buckets_roll_up():
+    series = TimeSeries()
+    for second in range(180):
+        series.add(second, 1)
+
+    # The last minute is still open, its seconds come from the finer level
+    assert series.series(MINUTE, 179)[-3:] == [60, 60, 60]
+    assert series.series(HOUR, 179)[-1] == 180
+    assert series.values[MINUTE][1] == 60
+
+
+def test_old_buckets_are_dropped():
+    series = TimeSeries()
+    series.add(0, 5)
+    series.add(100, 1)
+
+    # The bucket of second 0 left the last minute, but counts in its minute
+    assert sum(series.series(SECOND, 100)) == 1
+    assert series.series(MINUTE, 100)[-2:] == [5, 1]
+
+
+def test_buckets_that_wrap_around_start_at_zero():
+    series = TimeSeries()
+    series.add(5, 2)
+    series.add(5 + 60, 3)  # Same slot of the ring, a minute later
+
+    assert series.series(SECOND, 65) == [0] * 59 + [3]
+    assert series.series(MINUTE, 65)[-2:] == [2, 3]
+
+
+def test_long_gaps():
+    series = TimeSeries()
+    series.add(0, 1)
+    series.add(3 * 24 * 3600, 2)
+
+    assert sum(series.series(HOUR, 3 * 24 * 3600)) == 2
+    assert sum(series.series(SECOND, 3 * 24 * 3600)) == 2
+
+
+def test_production_stats():
+    clock = [30.0]
+    stats = ProductionStats(lambda: clock[0])
+    stats.record(Item.COAL, produced=5)
+    stats.record(Item.COAL, consumed=2)
+    clock[0] = 90.0
+    stats.record(Item.IRON_INGOT, produced=1)
+
+    assert stats.series(Item.COAL, "minute")[-2:] == [5, 0]
+    assert stats.series(Item.COAL, "minute", "consumed")[-2] == 2
+    assert stats.series(Item.BRASS_INGOT) == [0] * resolutions["minute"][1]
+    assert stats.items() == sorted([Item.COAL, Item.IRON_INGOT], key=lambda item: item.name.lower())
+
+    with pytest.raises(ValueError):
+        stats.series(Item.COAL, "week")
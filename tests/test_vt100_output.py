@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import io
+import random
+import re
+
+import pytest
+
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import set_app
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.layout import Float, FloatContainer, HSplit, Layout, VSplit, Window
+from prompt_toolkit.layout.controls import FormattedTextControl
+from prompt_toolkit.output.color_depth import ColorDepth
+from prompt_toolkit.output.vt100 import Vt100_Output
+from prompt_toolkit.styles import Attrs
+from prompt_toolkit.widgets import Frame
+
+WIDTH, HEIGHT = 60, 20
+
+RED = Attrs(
+    color="ansired",
+    bgcolor="",
+    bold=False,
+    underline=False,
+    strike=False,
+    italic=False,
+    blink=False,
+    reverse=False,
+    hidden=False,
+)
+BOLD = RED._replace(color="", bold=True)
+
+
+class _UncoalescedOutput(Vt100_Output):
+    """
+    Writes every escape sequence as it's asked for, like `Vt100_Output` did
+    before it started merging cursor movements and leaving out SGR sequences.
+    """
+
+    def reset_attributes(self) -> None:
+        self.write_raw("\x1b[0m")
+
+    def set_attributes(self, attrs: Attrs, color_depth: ColorDepth) -> None:
+        self.write_raw(self._escape_code_caches[color_depth][attrs])
+
+    def _move_cursor(self, direction: str, amount: int) -> None:
+        if amount == 1:
+            self.write_raw(
+                {"A": "\x1b[A", "B": "\x1b[B", "C": "\x1b[C"}.get(direction, "\b")
+            )
+        elif amount:
+            self.write_raw(f"\x1b[{amount}{direction}")
+
+
+class _Terminal:
+    """
+    Just enough of a VT100 terminal to replay the output of the renderer: the
+    cells with their SGR parameters, the cursor position and the active SGR
+    parameters.
+    """
+
+    _token = re.compile(r"\x1b\[([?0-9;]*)([A-Za-z])|\x1b\][^\x07]*\x07|(.)", re.DOTALL)
+
+    def __init__(self) -> None:
+        self.cells = [[(" ", "")] * WIDTH for _ in range(HEIGHT)]
+        self.x = self.y = 0
+        self.sgr = ""
+
+    @property
+    def state(self):
+        return self.cells, (self.x, self.y), self.sgr
+
+    def feed(self, data: str) -> None:
+        for match in self._token.finditer(data):
+            params, command, char = match.groups()
+            if char is not None:
+                self._char(char)
+            elif command is not None and not params.startswith("?"):
+                self._command(params, command)
+
+    def _char(self, char: str) -> None:
+        if char == "\r":
+            self.x = 0
+        elif char == "\n":
+            if self.y == HEIGHT - 1:
+                self.cells.pop(0)
+                self.cells.append([(" ", self.sgr)] * WIDTH)
+            else:
+                self.y += 1
+        elif char == "\b":
+            self.x = max(0, self.x - 1)
+        else:
+            self.cells[self.y][self.x] = (char, self.sgr)
+            self.x = min(WIDTH - 1, self.x + 1)
+
+    def _command(self, params: str, command: str) -> None:
+        amount = int(params) if params.isdigit() else 1
+        if command == "A":
+            self.y = max(0, self.y - amount)
+        elif command == "B":
+            self.y = min(HEIGHT - 1, self.y + amount)
+        elif command == "C":
+            self.x = min(WIDTH - 1, self.x + amount)
+        elif command == "D":
+            self.x = max(0, self.x - amount)
+        elif command == "H":
+            row, _, column = params.partition(";")
+            self.y = min(HEIGHT, int(row or 1)) - 1
+            self.x = min(WIDTH, int(column or 1)) - 1
+        elif command == "m":
+            self.sgr = "" if params in ("", "0") else params
+        elif command == "K":
+            self.cells[self.y][self.x :] = [(" ", self.sgr)] * (WIDTH - self.x)
+        elif command == "J":
+            self.cells[self.y][self.x :] = [(" ", self.sgr)] * (WIDTH - self.x)
+            for y in range(self.y + 1, HEIGHT):
+                self.cells[y] = [(" ", self.sgr)] * WIDTH
+
+
+def _output(cls: type[Vt100_Output] = Vt100_Output) -> tuple[Vt100_Output, io.StringIO]:
+    stdout = io.StringIO()
+    output = cls(
+        stdout, lambda: Size(rows=HEIGHT, columns=WIDTH), term="xterm-256color"
+    )
+    return output, stdout
+
+
+def _written(output: Vt100_Output) -> str:
+    return "".join(output._buffer)
+
+
+def _render_frames(cls: type[Vt100_Output], full_screen: bool) -> list[str]:
+    """
+    Render random frames and return the output after each of them.
+    """
+    rng = random.Random(2)
+    words = ["coal", "iron", "smelt", " ", "  ", "constructor"]
+    styles = ["", "fg:red", "bg:blue", "bold", "fg:#ff8800 bg:#001122", "reverse"]
+    lines: list[tuple[str, str]] = []
+
+    output, stdout = _output(cls)
+    app: Application[None] = Application(output=output, full_screen=full_screen)
+    body = FormattedTextControl(lambda: lines)
+    status = FormattedTextControl(lambda: f"tick {app.render_counter}")
+    popup = Window(FormattedTextControl("popup"), style="bg:green")
+    app.layout = Layout(
+        FloatContainer(
+            HSplit(
+                [
+                    VSplit([Frame(Window(body)), Window(width=10, style="bg:#303040")]),
+                    Window(status, height=1, style="reverse"),
+                ]
+            ),
+            floats=[Float(popup, top=3, left=5, width=8, height=2)],
+        )
+    )
+
+    frames = []
+    with set_app(app):
+        for i in range(40):
+            lines[:] = []
+            for _ in range(rng.randint(0, 15)):
+                for _ in range(rng.randint(0, 12)):
+                    lines.append((rng.choice(styles), rng.choice(words)))
+                lines.append(("", "\n"))
+            app.render_counter += 1
+            app.renderer.render(app, app.layout, is_done=i == 39)
+            output.flush()
+            frames.append(stdout.getvalue())
+    return frames
+
+
+@pytest.mark.parametrize("full_screen", [True, False])
+def test_terminal_state_unchanged_after_every_frame(full_screen):
+    old = _render_frames(_UncoalescedOutput, full_screen)
+    new = _render_frames(Vt100_Output, full_screen)
+
+    for old_frame, new_frame in zip(old, new):
+        old_terminal, new_terminal = _Terminal(), _Terminal()
+        old_terminal.feed(old_frame)
+        new_terminal.feed(new_frame)
+        assert new_terminal.state == old_terminal.state
+
+    assert len(new[-1]) <= len(old[-1])
+
+
+def _same_terminal_state(calls) -> str:
+    """
+    Apply `calls` to a new and an uncoalesced output, check that both leave
+    the terminal in the same state, and return what the new one wrote.
+    """
+    written = []
+    terminals = []
+    for cls in (_UncoalescedOutput, Vt100_Output):
+        output, _ = _output(cls)
+        output.cursor_goto(5, 10)
+        for name, *args in calls:
+            getattr(output, name)(*args)
+        terminal = _Terminal()
+        terminal.feed(_written(output))
+        terminals.append(terminal.state)
+        written.append(_written(output))
+    assert terminals[0] == terminals[1]
+    return written[1][len("\x1b[5;10H") :]
+
+
+def test_moves_in_one_direction_are_merged():
+    assert _same_terminal_state([("cursor_up", 2), ("cursor_up", 1)]) == "\x1b[3A"
+    assert _same_terminal_state([("cursor_backward", 1), ("cursor_backward", 1)]) == (
+        "\x1b[2D"
+    )
+    assert _same_terminal_state([("cursor_forward", 1), ("cursor_forward", 0)]) == (
+        "\x1b[C"
+    )
+
+
+def test_moves_in_other_directions_are_not_merged():
+    # The terminal stops at the edge, so going up and down again isn't a no-op.
+    assert _same_terminal_state([("cursor_up", 9), ("cursor_down", 9)]) == (
+        "\x1b[9A\x1b[9B"
+    )
+    assert _same_terminal_state(
+        [("cursor_forward", 2), ("write", "x"), ("cursor_forward", 2)]
+    ) == ("\x1b[2Cx\x1b[2C")
+
+
+def test_active_sgr_is_skipped():
+    written = _same_terminal_state(
+        [
+            ("set_attributes", RED, ColorDepth.DEPTH_8_BIT),
+            ("write", "a"),
+            ("set_attributes", RED, ColorDepth.DEPTH_8_BIT),
+            ("write", "b"),
+            ("reset_attributes",),
+            ("reset_attributes",),
+        ]
+    )
+    assert written == "\x1b[0;31mab\x1b[0m"
+
+
+def test_sgr_without_text_is_replaced():
+    written = _same_terminal_state(
+        [
+            ("set_attributes", RED, ColorDepth.DEPTH_8_BIT),
+            ("set_attributes", BOLD, ColorDepth.DEPTH_8_BIT),
+            ("write", "a"),
+            ("set_attributes", RED, ColorDepth.DEPTH_8_BIT),
+            ("reset_attributes",),
+            ("write", "b"),
+        ]
+    )
+    assert written == "\x1b[0;1ma\x1b[0mb"
+
+
+def test_write_raw_with_sgr_forgets_the_active_one():
+    written = _same_terminal_state(
+        [
+            ("set_attributes", RED, ColorDepth.DEPTH_8_BIT),
+            ("write", "a"),
+            ("write_raw", "\x1b[7m"),
+            ("set_attributes", RED, ColorDepth.DEPTH_8_BIT),
+            ("write", "b"),
+        ]
+    )
+    assert written == "\x1b[0;31ma\x1b[7m\x1b[0;31mb"
+
+
+def test_flush_forgets_the_active_sgr():
+    output, stdout = _output()
+    output.set_attributes(RED, ColorDepth.DEPTH_8_BIT)
+    output.write("a")
+    output.flush()
+    output.set_attributes(RED, ColorDepth.DEPTH_8_BIT)
+    output.write("b")
+    output.flush()
+    assert stdout.getvalue() == "\x1b[0;31ma\x1b[0;31mb"
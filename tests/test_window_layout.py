@@ -0,0 +1,143 @@
+from __future__ import annotations
+
+import asyncio
+import random
+
+import pytest
+
+import prompt_toolkit.layout.containers as containers
+from prompt_toolkit.application import Application
+from prompt_toolkit.application.current import get_app, set_app
+from prompt_toolkit.buffer import Buffer
+from prompt_toolkit.data_structures import Size
+from prompt_toolkit.document import Document
+from prompt_toolkit.layout import Layout, NumberedMargin, VSplit, Window
+from prompt_toolkit.layout.controls import BufferControl, FormattedTextControl
+from prompt_toolkit.output import DummyOutput
+
+
+def _prefix(lineno: int, wrap_count: int):
+    if lineno == 0 and wrap_count == 0:
+        return [("class:prompt", "pioneer> ")]
+    return "." * (wrap_count + 1) + " "
+
+
+def _render(windows, focused, columns, rows, renders=3, change=None):
+    """
+    Render the windows side by side and return the cells of the screen and
+    the render info of the windows after every render. (In an event loop,
+    because buffers load their history in the background.)
+    """
+    app: Application[None] = Application(
+        layout=Layout(VSplit(windows), focused_element=focused),
+        output=DummyOutput(),
+        full_screen=True,
+    )
+    app.output.get_size = lambda: Size(rows=rows, columns=columns)
+
+    async def render():
+        for i in range(renders):
+            app.render_counter += 1
+            app.renderer.render(app, app.layout)
+            screen = app.renderer._last_screen
+            assert screen is not None
+            frames.append(
+                (
+                    {
+                        y: dict(row.items())
+                        for y, row in screen.data_buffer.items()
+                        if row
+                    },
+                    [
+                        (
+                            w.render_info.visible_line_to_row_col,
+                            w.render_info._rowcol_to_yx,
+                        )
+                        for w in windows
+                    ],
+                )
+            )
+            if change:
+                change(i)
+
+    frames = []
+    with set_app(app):
+        asyncio.run(render())
+    return frames
+
+
+def _same_as_copy_line(monkeypatch, make, columns, rows, **kwargs):
+    """
+    Render the windows from `make` with the cached layouts, then again with
+    `copy_line` only, and check that the screens are the same.
+    """
+    cached = _render(*make(), columns, rows, **kwargs)
+    with monkeypatch.context() as m:
+        m.setattr(containers, "_layout_line", lambda *args: None)
+        uncached = _render(*make(), columns, rows, **kwargs)
+    assert cached == uncached
+
+
+# Wide characters that don't fit in the last column, at every offset.
+WIDE = [f"{'a' * i}漢字x{'b' * i}漢" for i in range(12)]
+
+
+@pytest.mark.parametrize("wrap_lines", [True, False])
+@pytest.mark.parametrize("prefix", [None, _prefix])
+def test_wide_characters_at_the_wrap_edge(monkeypatch, wrap_lines, prefix):
+    def make():
+        window = Window(
+            FormattedTextControl("\n".join(WIDE)),
+            wrap_lines=wrap_lines,
+            get_line_prefix=prefix,
+        )
+        return [window], window
+
+    for columns in (7, 8, 9, 10):
+        _same_as_copy_line(monkeypatch, make, columns, 40)
+
+
+@pytest.mark.parametrize("wrap_lines", [True, False])
+def test_prompt_with_cursor(monkeypatch, wrap_lines):
+    text = "mine coal 5\nprocess 漢字 iron_ingot 2\n" + "build " * 12
+
+    def make():
+        buffer = Buffer(document=Document(text, len(text) // 2), multiline=True)
+        window = Window(
+            BufferControl(buffer),
+            wrap_lines=wrap_lines,
+            get_line_prefix=_prefix,
+            left_margins=[NumberedMargin()],
+        )
+        return [window], window
+
+    def change(i):
+        get_app().layout.current_buffer.cursor_position = 3 * i
+
+    _same_as_copy_line(monkeypatch, make, 30, 12, change=change)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_random_lines(monkeypatch, seed):
+    def make():
+        rng = random.Random(seed)
+        chars = "ab c漢字é"
+        text = "\n".join(
+            "".join(rng.choice(chars) for _ in range(rng.randint(0, 40)))
+            for _ in range(rng.randint(1, 20))
+        )
+        left = Window(
+            FormattedTextControl(text),
+            wrap_lines=rng.random() < 0.7,
+            get_line_prefix=_prefix if rng.random() < 0.5 else None,
+        )
+        right = Window(FormattedTextControl(text[::-1]), wrap_lines=True)
+        return [left, right], left
+
+    _same_as_copy_line(monkeypatch, make, 50, 15)
+
+
+def test_lines_after_a_prefix_use_the_cache():
+    window = Window(FormattedTextControl("coal\niron"), get_line_prefix=_prefix)
+    _render([window], window, 40, 5, renders=1)
+    assert len(window._line_layout_cache) == 2
@@ -0,0 +1,108 @@
+import asyncio
+import io
+import os
+
+from auto import LocID
+from main import Player, gameOutput, realTime
+from registry import Block
+from world import World
+
+
+def depositAt(world, x=0):
+    # First cell with a deposit, searching along the x axis from x
+    while True:
+        deposits = world.deposits(LocID("test", x, 0))
+        if deposits:
+            blockID, left = next(iter(deposits.items()))
+            return LocID("test", x, 0), Block.get(blockID), left
+        x += 1
+
+
+def test_same_seed_same_deposits():
+    a, b = World(5), World(5)
+    for x, y in [(0, 0), (17, -3), (-40, 100)]:
+        loc = LocID("test", x, y)
+        assert a.deposits(loc) == b.deposits(loc)
+    assert any(
+        World(5).deposits(LocID("test", x, 0)) != World(6).deposits(LocID("test", x, 0))
+        for x in range(16)
+    )
+
+
+def test_mine_takes_from_the_deposit():
+    world = World(5)
+    loc, block, left = depositAt(world)
+
+    assert world.mine(loc, block, 1) == 1
+    assert world.deposits(loc).get(block.ID) == left - 1
+    assert world.mine(loc, block, left + 10) == left - 1
+    assert block.ID not in world.deposits(loc)
+    assert world.mine(loc, block, 1) == 0
+
+
+def test_evicted_mined_chunk_is_reloaded(tmp_path):
+    world = World(5, maxChunks=2, path=str(tmp_path))
+    loc, block, left = depositAt(world)
+    world.mine(loc, block, 3)
+
+    # Visiting two other chunks evicts the mined one, which is written to disk
+    world.deposits(LocID("test", loc.x + 16, 0))
+    world.deposits(LocID("test", loc.x + 32, 0))
+    key, _ = world.chunkKey(loc)
+    assert key not in world.chunks
+    assert os.listdir(tmp_path) == [f"{key[0]}_{key[1]}.json"]
+
+    assert world.deposits(loc)[block.ID] == left - 3
+
+
+def test_untouched_chunks_are_generated_again(tmp_path):
+    world = World(5, maxChunks=1, path=str(tmp_path))
+    before = world.deposits(LocID("test", 0, 0))
+    world.deposits(LocID("test", 16, 0))
+    assert world.deposits(LocID("test", 0, 0)) == before
+    assert os.listdir(tmp_path) == []
+
+
+def test_without_path_chunks_go_to_a_temporary_directory():
+    world = World(5, maxChunks=1)
+    loc, block, left = depositAt(world)
+    world.mine(loc, block, 1)
+    world.deposits(LocID("test", loc.x + 16, 0))
+
+    assert os.path.isdir(world.path)
+    assert world.deposits(loc)[block.ID] == left - 1
+
+
+def mine(player, material, amount):
+    output = io.StringIO()
+
+    async def run():
+        gameOutput.set(output)
+        realTime.set(False)
+        await player.mine(material, amount)
+
+    asyncio.run(run())
+    return output.getvalue()
+
+
+def test_player_mines_the_world_where_they_stand():
+    world = World(5)
+    player = Player("test", seed=1, world=world)
+    # A deposit that the starting pickaxe can mine
+    loc, block, left = depositAt(world)
+    while block.miningLevel > player.tool.miningLevel:
+        loc, block, left = depositAt(world, loc.x + 1)
+
+    player.moveTo(loc.x, loc.y)
+    assert "You've mined 2x" in mine(player, block.ID, 2)
+    assert world.deposits(loc).get(block.ID, 0) == left - 2
+
+    # Only what is left can be mined
+    assert "Only" in mine(player, block.ID, left)
+    assert block.ID not in world.deposits(loc)
+    assert "No " in mine(player, block.ID, 1)
+
+    # Other players on the same world find it mined out as well
+    other = Player("other", seed=2, world=world)
+    other.moveTo(loc.x, loc.y)
+    assert "No " in mine(other, block.ID, 1)
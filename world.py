@@ -0,0 +1,134 @@
+import json
+import os
+import random
+import tempfile
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from auto import LocID
+from registry import Block
+
+# The planet's ore deposits. Every location (auto.LocID) sits on one cell of a
+# grid, cells are grouped into square chunks. A chunk's deposits are generated
+# from the world seed the first time it is visited, so the same seed always
+# yields the same planet. Loaded chunks live in a bounded LRU cache; chunks that
+# were mined are written to disk when they are evicted and read back from there,
+# untouched chunks are simply generated again. Memory is only spent on the
+# areas that are actually visited.
+#
+# Players mine the deposits at their location (Player.mine), miners the ones at
+# theirs (auto.Miner.extract). The game has no save games, so by default the
+# chunks are paged to a temporary directory that goes away with the world:
+# every session, and every replay of it, starts on the same untouched planet.
+
+class Chunk:
+    def __init__(self, key: Tuple[int, int], cells: Dict[int, Dict[str, int]]):
+        self.key = key
+        # Cell index in the chunk -> block ID -> blocks left, only cells with deposits
+        self.cells = cells
+        # Changed since it was generated or loaded
+        self.dirty = False
+
+class World:
+    chunkSize = 16
+
+    def __init__(self, seed: Optional[int] = None, maxChunks: int = 256, path: Optional[str] = None):
+        self.seed = seed if seed is not None else random.randrange(2 ** 32)
+        self.maxChunks = maxChunks
+        # Where evicted chunks are stored. Without a path, a temporary directory
+        # is created when the first chunk is stored
+        self.path = path
+        self._tempDir = None
+        # Chunk key -> chunk, least recently used first
+        self.chunks: "OrderedDict[Tuple[int, int], Chunk]" = OrderedDict()
+
+    def chunkKey(self, loc: LocID) -> Tuple[Tuple[int, int], int]:
+        cx, x = divmod(loc.x, self.chunkSize)
+        cy, y = divmod(loc.y, self.chunkSize)
+        return (cx, cy), y * self.chunkSize + x
+
+    def chunk(self, key: Tuple[int, int]) -> Chunk:
+        chunk = self.chunks.get(key)
+        if chunk is not None:
+            self.chunks.move_to_end(key)
+            return chunk
+
+        chunk = self.load(key) or self.generate(key)
+        self.chunks[key] = chunk
+        if len(self.chunks) > self.maxChunks:
+            _, evicted = self.chunks.popitem(last=False)
+            if evicted.dirty:
+                self.save(evicted)
+        return chunk
+
+    # Deposits of every cell, from the world seed and the chunk position only.
+    # Harder blocks are rarer and smaller.
+    def generate(self, key: Tuple[int, int]) -> Chunk:
+        rng = random.Random(f"{self.seed}:{key[0]}:{key[1]}")
+        blocks = [block for block in Block.all() if block.dropItem]
+        cells = {}
+        for cell in range(self.chunkSize * self.chunkSize):
+            deposits = {}
+            for block in blocks:
+                rarity = 1 + max(block.miningLevel, 0)
+                if rng.random() < 0.5 / rarity:
+                    deposits[block.ID] = rng.randint(64, 1024) // rarity
+            if deposits:
+                cells[cell] = deposits
+        return Chunk(key, cells)
+
+    def chunkPath(self, key: Tuple[int, int]) -> str:
+        return os.path.join(self.path, f"{key[0]}_{key[1]}.json")
+
+    def load(self, key: Tuple[int, int]) -> Optional[Chunk]:
+        if self.path is None:
+            return None
+        try:
+            with open(self.chunkPath(key), encoding="utf-8") as f:
+                cells = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return Chunk(key, {int(cell): deposits for cell, deposits in cells.items()})
+
+    def save(self, chunk: Chunk):
+        if self.path is None:
+            self._tempDir = tempfile.TemporaryDirectory(prefix=f"zarsianx-world-{self.seed}-")
+            self.path = self._tempDir.name
+        os.makedirs(self.path, exist_ok=True)
+        path = self.chunkPath(chunk.key)
+        # Write to a temporary file first, so a crash never leaves half a chunk
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(chunk.cells, f, separators=(",", ":"))
+        os.replace(tmp, path)
+        chunk.dirty = False
+
+    # Write all mined chunks that are still in memory
+    def flush(self):
+        for chunk in self.chunks.values():
+            if chunk.dirty:
+                self.save(chunk)
+
+    # Block ID -> blocks left at the location
+    def deposits(self, loc: LocID) -> Dict[str, int]:
+        key, cell = self.chunkKey(loc)
+        return dict(self.chunk(key).cells.get(cell, {}))
+
+    # Mines up to amount blocks at the location, returns how many were there
+    def mine(self, loc: LocID, block: Block, amount: int = 1) -> int:
+        key, cell = self.chunkKey(loc)
+        chunk = self.chunk(key)
+        deposits = chunk.cells.get(cell)
+        left = deposits.get(block.ID, 0) if deposits else 0
+        mined = min(left, amount)
+        if mined <= 0:
+            return 0
+
+        if mined == left:
+            del deposits[block.ID]
+            if not deposits:
+                del chunk.cells[cell]
+        else:
+            deposits[block.ID] = left - mined
+        chunk.dirty = True
+        return mined